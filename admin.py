@@ -1,11 +1,19 @@
-import tkinter as tk
-from tkinter import filedialog
-import re
+import bisect
 import urwid
+import config
 from datetime import datetime
-import os
+from functools import partial
+import metricas
+from almacen import texto_cierre_caja
+from lineas import LineasTexto
+from lista_virtual import ListaVirtual
+from visor import VisorLineas
 
+# Operaciones que entran en la pantalla de rendimiento (las que más tiempo llevan)
+MAXIMO_OPERACIONES_RENDIMIENTO = 20
 
+
+@metricas.instrumentar
 class AdminView(urwid.WidgetWrap):
     def __init__(self, main):
         self.main = main
@@ -15,33 +23,20 @@ class AdminView(urwid.WidgetWrap):
         self.mostrar_menu()
 
     def cargar_inventario(self):
-        self.inventario = {}
-        self.ultimo_id = 0  # Inicializar el contador de IDs
-        try:
-            with open("inventario.txt", "r", encoding="utf-8") as file:
-                for linea in file:
-                    linea = re.sub(r"[^\x20-\x7E]", "", linea)
-                    id_producto, nombre, precio_compra, precio_venta, cantidad = linea.strip().split(": ")
-                    self.inventario[id_producto] = {
-                        "nombre": nombre,
-                        "precio_compra": float(precio_compra),
-                        "precio_venta": float(precio_venta),
-                        "cantidad": int(cantidad)
-                    }
-                    # Actualizar el último ID
-                    if int(id_producto) > self.ultimo_id:
-                        self.ultimo_id = int(id_producto)
-        except FileNotFoundError:
-            self.inventario = {}
-
-    def guardar_inventario(self):
-        with open("inventario.txt", "w", encoding="utf-8") as file:
-            for id_producto, datos in self.inventario.items():
-                file.write(f"{id_producto}: {datos['nombre']}: {datos['precio_compra']}: {datos['precio_venta']}: {datos['cantidad']}\n")
-
-    def generar_nuevo_id(self):
-        self.ultimo_id += 1  # Incrementar el último ID
-        return str(self.ultimo_id)
+        # El almacén (texto o SQLite, según config.py) es el mismo para todas las pantallas
+        self.almacen = self.main.servicio.almacen
+        self.gestor_inventario = self.almacen.inventario
+        self.inventario = self.gestor_inventario.productos
+        self.gestor_inventario.suscribir(self.main.tareas.en_el_loop(self.inventario_cambiado))
+
+    def inventario_cambiado(self, cambios):
+        # Después de una recarga completa el inventario es otro diccionario
+        self.inventario = self.gestor_inventario.productos
+
+    def reanudar(self):
+        """Vuelve a mostrar el menú (la pantalla quedó guardada desde el login anterior)"""
+        self.mostrar_menu()
+        self.main.loop.widget = self
 
     def mostrar_menu(self, *args):
         pile = urwid.Pile([
@@ -56,6 +51,8 @@ class AdminView(urwid.WidgetWrap):
             urwid.Button("Cargar pedido", on_press=self.cargar_pedido),
             urwid.Button("Ver ventas", on_press=self.ver_ventas),
             urwid.Button("Reporte de ventas por fecha", on_press=self.reporte_ventas_por_fecha),  # Nuevo botón para ver ventas
+            urwid.Button("Facturas en PDF", on_press=self.facturas_pdf),
+            urwid.Button("Rendimiento", on_press=self.ver_rendimiento),
             urwid.Divider(),
             urwid.Button("Volver al inicio", on_press=self.volver_al_inicio),
         ])
@@ -65,22 +62,13 @@ class AdminView(urwid.WidgetWrap):
 
     def ver_inventario(self, button):
         if not self.inventario:
-            contenido = [urwid.Text("El inventario está vacío.", align='center')]
+            contenido = urwid.SimpleFocusListWalker([urwid.Text("El inventario está vacío.", align='center')])
         else:
-            contenido = [
-                urwid.Text(
-                    f"ID: {id_producto} | Nombre: {datos['nombre']} | "
-                    f"Precio de compra: {datos['precio_compra']} | "
-                    f"Precio de venta: {datos['precio_venta']} | "
-                    f"Cantidad: {datos['cantidad']}" +
-                    (" (!!!)" if datos['cantidad'] < 5 else ""),
-                    align='left'
-                )
-                for id_producto, datos in self.inventario.items()
-            ]
+            # Las filas se crean solo cuando se van a mostrar
+            contenido = ListaVirtual(self.inventario, self.crear_fila_inventario)
         
         # Crear un ListBox para permitir el desplazamiento vertical
-        lista = urwid.ListBox(urwid.SimpleFocusListWalker(contenido))
+        lista = urwid.ListBox(contenido)
         
         body = urwid.Pile([
             urwid.Text("Inventario:", align='center'),
@@ -99,20 +87,53 @@ class AdminView(urwid.WidgetWrap):
             valign='middle'
         )
     
+    def crear_fila_inventario(self, id_producto):
+        datos = self.inventario[id_producto]
+        return urwid.Text(
+            f"ID: {id_producto} | Nombre: {datos.nombre} | "
+            f"Precio de compra: {datos.precio_compra} | "
+            f"Precio de venta: {datos.precio_venta} | "
+            f"Cantidad: {datos.cantidad}" +
+            (" (!!!)" if datos.cantidad < 5 else ""),
+            align='left'
+        )
+    
     def ver_ventas(self, button):
-        try:
-            with open("ventas.txt", "r", encoding="utf-8") as file:
-                contenido = [urwid.Text(linea.strip(), align='left') for linea in file]
-        except FileNotFoundError:
-            contenido = [urwid.Text("No hay ventas registradas.", align='center')]
-
-        # Crear un ListBox para permitir el desplazamiento vertical
-        lista = urwid.ListBox(urwid.SimpleFocusListWalker(contenido))
+        partes = self.almacen.partes_ventas()
+        if partes:
+            # Solo se leen y se muestran las líneas que entran en pantalla (ver visor.py)
+            contenido = self.abrir_visor([abrir for _, abrir in partes], [dia for dia, _ in partes], 0)
+        else:
+            contenido = urwid.SimpleFocusListWalker([urwid.Text("No hay ventas registradas.", align='center')])
+        self.mostrar_visor("Ventas:", contenido, ubicar_facturas=True)
+
+    def abrir_visor(self, partes, dias, primera_parte_dia):
+        """Crea el visor de líneas; dias[i] es el día que empieza en la parte primera_parte_dia + i"""
+        self.cerrar_visor()
+        self.visor = VisorLineas(partes)
+        self.dias_visor = dias
+        self.primera_parte_dia = primera_parte_dia
+        return self.visor
+
+    def cerrar_visor(self):
+        if getattr(self, 'visor', None) is not None:
+            self.visor.cerrar()
+            self.visor = None
+
+    def mostrar_visor(self, titulo, contenido, ubicar_facturas):
+        """Muestra el historial o un reporte con un campo para saltar a una fecha (o a una factura)"""
+        self.ubicar_facturas = ubicar_facturas
+        self.ir_a_edit = urwid.Edit("Ir a fecha (YYYY-MM-DD) o factura (#N): " if ubicar_facturas
+                                    else "Ir a fecha (YYYY-MM-DD): ")
+        self.estado_visor = urwid.Text("")
+        self.lista_visor = urwid.ListBox(contenido)
 
         body = urwid.Pile([
-            urwid.Text("Ventas:", align='center'),
+            urwid.Text(titulo, align='center'),
             urwid.Divider(),
-            urwid.BoxAdapter(lista, height=min(20, len(contenido) + 5)),  # Ajustar altura
+            urwid.Columns([self.ir_a_edit, (8, urwid.Button("Ir", on_press=self.ir_a_linea))]),
+            self.estado_visor,
+            urwid.BoxAdapter(self.lista_visor, height=20),
             urwid.Divider(),
             urwid.Button("Volver", on_press=self.volver)  # Usar self.volver
         ])
@@ -122,10 +143,31 @@ class AdminView(urwid.WidgetWrap):
             self.main.loop.widget,
             align='left',  # Cambia a 'center', 'right', o 'left' para mover el recuadro
             width=100,  # Aumentar el ancho
-            height=min(30, len(contenido) + 10),  # Aumentar la altura
+            height=32,
             valign='middle'
         )
 
+    def ir_a_linea(self, button):
+        """Lleva el visor a la primera venta de una fecha (o a una factura, en el historial)"""
+        if getattr(self, 'visor', None) is None:
+            return
+        texto = self.ir_a_edit.get_edit_text().strip()
+        numero = 0
+        if texto.lstrip("#").isdigit():
+            ubicacion = self.almacen.ubicar_factura(int(texto.lstrip("#")))
+            if ubicacion is None:
+                self.estado_visor.set_text(f"No se encontró la factura {texto.lstrip('#')}.")
+                return
+            texto, numero = ubicacion
+            if not self.ubicar_facturas:
+                numero = 0  # En el reporte se va al comienzo del día de la factura
+        elif len(texto) != 10:
+            self.estado_visor.set_text("Formato de fecha inválido. Use YYYY-MM-DD.")
+            return
+        self.estado_visor.set_text("")
+        self.visor.ir_a(self.primera_parte_dia + bisect.bisect_left(self.dias_visor, texto), numero)
+        self.lista_visor.set_focus_valign('top')
+
     def agregar_producto(self, button):
         self.nombre_edit = urwid.Edit("Nombre del producto: ")
         self.precio_compra_edit = urwid.Edit("Precio de compra: ")
@@ -165,14 +207,7 @@ class AdminView(urwid.WidgetWrap):
             precio_compra = float(precio_compra)
             precio_venta = float(precio_venta)
             cantidad = int(cantidad)
-            id_producto = self.generar_nuevo_id()  # Generar un ID secuencial
-            self.inventario[id_producto] = {
-                "nombre": nombre,
-                "precio_compra": precio_compra,
-                "precio_venta": precio_venta,
-                "cantidad": cantidad
-            }
-            self.guardar_inventario()
+            self.gestor_inventario.agregar(nombre, precio_compra, precio_venta, cantidad)  # Genera un ID secuencial
             self.mostrar_mensaje(f"'{nombre}' agregado al inventario.")
         except ValueError:
             self.mostrar_mensaje("Error: Los precios deben ser números y la cantidad un entero.")
@@ -182,18 +217,7 @@ class AdminView(urwid.WidgetWrap):
             self.mostrar_mensaje("Inventario vacío.")
             return
     
-        items = []
-        for id_producto, datos in self.inventario.items():
-            button = urwid.Button(
-                f"ID: {id_producto} | Nombre: {datos['nombre']} | "
-                f"Precio de compra: {datos['precio_compra']} | "
-                f"Precio de venta: {datos['precio_venta']} | "
-                f"Cantidad: {datos['cantidad']}"
-            )
-            urwid.connect_signal(button, 'click', self.confirmar_borrar, id_producto)
-            items.append(button)
-    
-        lista = urwid.ListBox(urwid.SimpleFocusListWalker(items))
+        lista = urwid.ListBox(ListaVirtual(self.inventario, self.crear_boton_borrar))
     
         body = urwid.Pile([
             urwid.Text("Seleccione el producto a borrar", align='center'),
@@ -213,11 +237,21 @@ class AdminView(urwid.WidgetWrap):
         )
         urwid.Button("Volver", on_press=self.volver)  # Usar self.volver
 
+    def crear_boton_borrar(self, id_producto):
+        datos = self.inventario[id_producto]
+        button = urwid.Button(
+            f"ID: {id_producto} | Nombre: {datos.nombre} | "
+            f"Precio de compra: {datos.precio_compra} | "
+            f"Precio de venta: {datos.precio_venta} | "
+            f"Cantidad: {datos.cantidad}"
+        )
+        urwid.connect_signal(button, 'click', self.confirmar_borrar, id_producto)
+        return button
+
     def confirmar_borrar(self, button, id_producto):
         if id_producto in self.inventario:
-            nombre = self.inventario[id_producto]["nombre"]
-            del self.inventario[id_producto]
-            self.guardar_inventario()
+            nombre = self.inventario[id_producto].nombre
+            self.gestor_inventario.borrar(id_producto)
             self.mostrar_mensaje(f"'{nombre}' eliminado del inventario.")
         else:
             self.mostrar_mensaje("Error: El producto no existe en el inventario.")
@@ -227,16 +261,7 @@ class AdminView(urwid.WidgetWrap):
             self.mostrar_mensaje("Inventario vacío.")
             return
     
-        items = []
-        for id_producto, datos in self.inventario.items():
-            button = urwid.Button(
-                f"ID: {id_producto} | Nombre: {datos['nombre']} | "
-                f"Precio de venta actual: {datos['precio_venta']}"
-            )
-            urwid.connect_signal(button, 'click', self.seleccionar_producto_para_cambiar_precio_venta, id_producto)
-            items.append(button)
-    
-        lista = urwid.ListBox(urwid.SimpleFocusListWalker(items))
+        lista = urwid.ListBox(ListaVirtual(self.inventario, self.crear_boton_cambiar_precio))
     
         body = urwid.Pile([
             urwid.Text("Seleccione el producto para cambiar el precio de venta", align='center'),
@@ -255,13 +280,22 @@ class AdminView(urwid.WidgetWrap):
             valign='middle'
         )
 
+    def crear_boton_cambiar_precio(self, id_producto):
+        datos = self.inventario[id_producto]
+        button = urwid.Button(
+            f"ID: {id_producto} | Nombre: {datos.nombre} | "
+            f"Precio de venta actual: {datos.precio_venta}"
+        )
+        urwid.connect_signal(button, 'click', self.seleccionar_producto_para_cambiar_precio_venta, id_producto)
+        return button
+
     def seleccionar_producto_para_cambiar_precio_venta(self, button, id_producto):
         self.id_producto_seleccionado = id_producto
-        self.nuevo_precio_venta_edit = urwid.Edit(f"Nuevo precio de venta para {self.inventario[id_producto]['nombre']}: ")
+        self.nuevo_precio_venta_edit = urwid.Edit(f"Nuevo precio de venta para {self.inventario[id_producto].nombre}: ")
     
         self.main.loop.widget = urwid.Overlay(
             urwid.LineBox(urwid.Pile([
-                urwid.Text(f"Cambiar precio de venta de {self.inventario[id_producto]['nombre']}", align='center'),
+                urwid.Text(f"Cambiar precio de venta de {self.inventario[id_producto].nombre}", align='center'),
                 urwid.Divider(),
                 self.nuevo_precio_venta_edit,
                 urwid.Divider(),
@@ -285,10 +319,9 @@ class AdminView(urwid.WidgetWrap):
         try:
             nuevo_precio_venta = float(nuevo_precio_venta)
             if self.id_producto_seleccionado in self.inventario:
-                self.inventario[self.id_producto_seleccionado]["precio_venta"] = nuevo_precio_venta
-                self.guardar_inventario()
+                self.gestor_inventario.fijar_precio_venta(self.id_producto_seleccionado, nuevo_precio_venta)
                 self.mostrar_mensaje(
-                    f"Precio de venta de '{self.inventario[self.id_producto_seleccionado]['nombre']}' "
+                    f"Precio de venta de '{self.inventario[self.id_producto_seleccionado].nombre}' "
                     f"actualizado a {nuevo_precio_venta}."
                 )
             else:
@@ -338,6 +371,14 @@ class AdminView(urwid.WidgetWrap):
             self.mostrar_mensaje("Error: El precio debe ser un número y la cantidad un entero.")
 
     def cargar_pedido(self, button):
+        # tkinter se carga recién acá: solo hace falta para el explorador de archivos
+        try:
+            import tkinter as tk
+            from tkinter import filedialog
+        except ImportError:
+            self.pedir_ruta_pedido()
+            return
+
         # Inicializar tkinter
         root = tk.Tk()
         root.withdraw()  # Ocultar la ventana principal de tkinter
@@ -351,38 +392,69 @@ class AdminView(urwid.WidgetWrap):
         if not archivo_pedido:
             self.mostrar_mensaje("No se seleccionó ningún archivo.")
             return
+        self.cargar_archivo_pedido(archivo_pedido)
 
-        try:
-            with open(archivo_pedido, "r", encoding="utf-8") as file:
-                for linea in file:
-                    linea = re.sub(r"[^\x20-\x7E]", "", linea)  # Limpiar caracteres no válidos
-                    nombre, precio, cantidad = linea.strip().split(": ")
-                    precio = float(precio)
-                    cantidad = int(cantidad)
-                    self.agregar_producto_desde_pedido(nombre, precio, cantidad)
+    def pedir_ruta_pedido(self):
+        """Sin tkinter, la ruta del archivo de pedido se escribe a mano"""
+        self.ruta_pedido_edit = urwid.Edit("Archivo del pedido: ")
+        pile = urwid.Pile([
+            urwid.Text("Cargar pedido", align='center'),
+            urwid.Divider(),
+            self.ruta_pedido_edit,
+            urwid.Divider(),
+            urwid.Button("Cargar", on_press=lambda button: self.cargar_archivo_pedido(
+                self.ruta_pedido_edit.get_edit_text().strip())),
+            urwid.Button("Volver", on_press=self.volver)
+        ])
+        self._wrapped_widget = urwid.Filler(pile, valign='top')
+        self.main.loop.widget = self._wrapped_widget
+
+    def cargar_archivo_pedido(self, archivo_pedido):
+        # La carga corre en segundo plano; el resultado se muestra cuando termina
+        self.main.tareas.lanzar("Cargando pedido...", self.importar_archivo_pedido, archivo_pedido,
+                                al_terminar=self.pedido_cargado, al_fallar=self.pedido_fallido)
+
+    @metricas.medido()
+    def importar_archivo_pedido(self, archivo_pedido):
+        """Suma el archivo al inventario; corre en un hilo de tareas.py"""
+        with open(archivo_pedido, "r", encoding="utf-8", errors="replace") as file:
+            return self.gestor_inventario.importar_pedido(file)
+
+    def pedido_cargado(self, resultado):
+        agregados, actualizados, errores = resultado
+        if errores:
+            self.mostrar_errores_pedido(agregados, actualizados, errores)
+        else:
             self.mostrar_mensaje("Pedido cargado exitosamente.")
-        except FileNotFoundError:
+
+    def pedido_fallido(self, error):
+        if isinstance(error, FileNotFoundError):
             self.mostrar_mensaje("Error: No se encontró el archivo de pedido.")
-        except ValueError:
-            self.mostrar_mensaje("Error: Formato incorrecto en el archivo de pedido.")
-
-    def agregar_producto_desde_pedido(self, nombre, precio_compra, cantidad):
-        # Buscar si el producto ya existe en el inventario con el mismo precio de compra
-        for id_producto, datos in self.inventario.items():
-            if datos["nombre"] == nombre and datos["precio_compra"] == precio_compra:
-                self.inventario[id_producto]["cantidad"] += cantidad
-                self.guardar_inventario()
-                return
-        
-        # Si no existe, agregar como un nuevo producto
-        id_producto = self.generar_nuevo_id()  # Generar un ID secuencial
-        self.inventario[id_producto] = {
-            "nombre": nombre,
-            "precio_compra": precio_compra,
-            "precio_venta": precio_compra * 1.5,  # Precio de venta = Precio de compra * 1.5
-            "cantidad": cantidad
-        }
-        self.guardar_inventario()
+        else:
+            self.mostrar_mensaje(f"Error al cargar el pedido: {error}")
+
+    def mostrar_errores_pedido(self, agregados, actualizados, errores):
+        # Las líneas válidas ya quedaron guardadas; se listan las que se omitieron
+        contenido = [urwid.Text(f"Línea {numero}: {mensaje}", align='left') for numero, mensaje in errores]
+        lista = urwid.ListBox(urwid.SimpleFocusListWalker(contenido))
+
+        body = urwid.Pile([
+            urwid.Text(f"Pedido cargado: {agregados} productos nuevos, {actualizados} actualizados.", align='center'),
+            urwid.Text(f"Se omitieron {len(errores)} líneas con errores:", align='center'),
+            urwid.Divider(),
+            urwid.BoxAdapter(lista, height=min(15, len(contenido))),
+            urwid.Divider(),
+            urwid.Button("Volver", on_press=self.volver)
+        ])
+
+        self.main.loop.widget = urwid.Overlay(
+            urwid.LineBox(urwid.Filler(body, valign='top')),
+            self.main.loop.widget,
+            align='center',
+            width=80,
+            height=min(25, len(contenido) + 10),
+            valign='middle'
+        )
 
     def mostrar_mensaje(self, mensaje):
         mensaje_box = urwid.Overlay(
@@ -438,82 +510,123 @@ class AdminView(urwid.WidgetWrap):
             self.mostrar_error("Formato de fecha inválido. Use YYYY-MM-DD.")
             return
 
-        ventas_filtradas = self.filtrar_ventas_por_fecha(fecha_inicio, fecha_fin)
+        self.main.tareas.lanzar("Armando reporte de ventas...", self.filtrar_ventas_por_fecha,
+                                fecha_inicio, fecha_fin, al_terminar=self.mostrar_reporte_ventas)
 
-        if ventas_filtradas:
-            contenido = [urwid.Text(venta, align='left') for venta in ventas_filtradas]
-        else:
+    def mostrar_reporte_ventas(self, resultado):
+        filas, totales = resultado
+        if not filas:
             # Mostrar mensaje de "No hay ventas" con un botón de "Volver"
-            contenido = [
+            contenido = urwid.SimpleFocusListWalker([
                 urwid.Text("No hay ventas en el rango de fechas especificado.", align='center'),
                 urwid.Divider(),
                 urwid.Button("Volver", on_press=self.volver)
-            ]
+            ])
+            self.mostrar_visor("Reporte de ventas:", contenido, ubicar_facturas=False)
+            return
 
-        lista = urwid.ListBox(urwid.SimpleFocusListWalker(contenido))
+        # Primero los totales y una línea por día (precalculados); el detalle de
+        # cada día se lee solo cuando se baja hasta él en el visor
+        total, unidades, facturas, margen = totales
+        resumen = [
+            f"Total del rango: ${total:.2f} - {facturas} facturas - {unidades} unidades - Margen: ${margen:.2f}",
+            "",
+            "Fecha         Total          Facturas  Unidades  Margen",
+        ]
+        for dia, total_dia, unidades_dia, facturas_dia, margen_dia in filas:
+            resumen.append(f"{dia}    ${total_dia:<12.2f}  {facturas_dia:<8}  {unidades_dia:<8}  ${margen_dia:.2f}")
+        resumen.extend(["", "Detalle por día:", ""])
+
+        dias = [fila[0] for fila in filas]
+        partes = [partial(LineasTexto, resumen)] + [partial(self.lineas_reporte_dia, dia) for dia in dias]
+        self.mostrar_visor("Reporte de ventas:", self.abrir_visor(partes, dias, 1), ubicar_facturas=False)
+
+    def facturas_pdf(self, button):
+        """Pantalla para abrir una factura o reimprimir las de un rango de fechas"""
+        self.factura_edit = urwid.Edit("Número de factura: ")
+        self.fecha_inicio_edit = urwid.Edit("Fecha de inicio (YYYY-MM-DD): ")
+        self.fecha_fin_edit = urwid.Edit("Fecha de fin (YYYY-MM-DD): ")
 
-        body = urwid.Pile([
-            urwid.Text("Reporte de ventas:", align='center'),
+        pile = urwid.Pile([
+            urwid.Text("Facturas en PDF", align='center'),
+            urwid.Divider(),
+            self.factura_edit,
+            urwid.Button("Abrir factura", on_press=self.abrir_factura),
             urwid.Divider(),
-            urwid.BoxAdapter(lista, height=min(20, len(contenido) + 5)),
+            urwid.Text("Reimprimir las facturas de un rango de fechas:", align='left'),
+            self.fecha_inicio_edit,
+            self.fecha_fin_edit,
+            urwid.Button("Todas en un solo PDF", on_press=self.reimprimir_facturas, user_data=True),
+            urwid.Button("Un PDF por factura", on_press=self.reimprimir_facturas, user_data=False),
             urwid.Divider(),
-            urwid.Button("Volver", on_press=self.volver)  # Botón de volver adicional
+            urwid.Button("Volver", on_press=self.volver)
         ])
+        self._wrapped_widget = urwid.Filler(pile, valign='top')
+        self.main.loop.widget = self._wrapped_widget
 
-        self.main.loop.widget = urwid.Overlay(
-            urwid.LineBox(urwid.Filler(body, valign='top')),
-            self.main.loop.widget,
-            align='left',
-            width=100,
-            height=min(30, len(contenido) + 10),
-            valign='middle'
-        )
-
-    def filtrar_ventas_por_fecha(self, fecha_inicio, fecha_fin):
-        ventas_filtradas = []
-        total_ventas_rango = 0.0  # Variable para acumular el total de ventas del rango
+    def abrir_factura(self, button):
+        texto = self.factura_edit.get_edit_text().strip().lstrip("#")
+        if not texto.isdigit():
+            self.mostrar_error("Número de factura inválido.")
+            return
+        facturas = self.modulo_facturas()
+        if facturas is None:
+            return
+        self.main.tareas.lanzar(f"Generando factura {texto}...", facturas.pdf_de_factura, self.almacen, int(texto),
+                                al_terminar=facturas.abrir_pdf, al_fallar=self.factura_fallida)
 
-        # Obtener la ruta del directorio actual (donde está admin.py)
-        directorio_actual = os.path.dirname(os.path.abspath(__file__))
-        # Construir la ruta a la carpeta diario de manera relativa
-        carpeta_diario = os.path.join(directorio_actual, "diario")
+    def modulo_facturas(self):
+        """facturas.py (y reportlab) se cargan la primera vez que se pide un PDF"""
+        try:
+            import facturas
+        except ImportError as error:
+            self.mostrar_error(f"No se pueden generar PDF: falta {error.name}.")
+            return None
+        return facturas
+
+    def factura_fallida(self, error):
+        if isinstance(error, KeyError):
+            self.mostrar_error(f"No se encontró la factura {error.args[0]}.")
+        else:
+            self.mostrar_error(f"No se pudo generar la factura: {error}")
 
+    def reimprimir_facturas(self, button, un_archivo):
+        desde = self.fecha_inicio_edit.get_edit_text().strip()
+        hasta = self.fecha_fin_edit.get_edit_text().strip()
         try:
-            # Listar archivos en la carpeta diario
-            for archivo in os.listdir(carpeta_diario):
-                if archivo.startswith("ventas_dia_") and archivo.endswith(".txt"):
-                    # Extraer la fecha del nombre del archivo
-                    fecha_str = archivo.replace("ventas_dia_", "").replace(".txt", "")
-                    try:
-                        fecha_archivo = datetime.strptime(fecha_str, "%Y-%m-%d")
-                        if fecha_inicio <= fecha_archivo <= fecha_fin:
-                            # Leer el archivo y agregar las ventas al reporte
-                            ruta_archivo = os.path.join(carpeta_diario, archivo)
-                            with open(ruta_archivo, "r", encoding="utf-8") as file:
-                                lineas = file.readlines()
-                                ventas_filtradas.extend(lineas)
-
-                                # Buscar el "Total de ventas del día:" y sumar su valor
-                                for linea in lineas:
-                                    if linea.startswith("Total de ventas del día:"):
-                                        # Extraer el valor numérico
-                                        total_dia_str = linea.split("$")[-1].strip()
-                                        total_dia = float(total_dia_str)
-                                        total_ventas_rango += total_dia
-
-                                        # Agregar un salto de línea después del total
-                                        ventas_filtradas.append("\n")
-                                        break  # Salir del bucle una vez encontrado el total
-                    except ValueError:
-                        continue  # Ignorar archivos con nombres no válidos
-        except FileNotFoundError:
-            self.mostrar_error("No se encontró la carpeta de ventas diarias.")
-
-        # Agregar el total de ventas del rango al final del reporte
-        if ventas_filtradas:
-            ventas_filtradas.append(f"\nTotal de ventas del rango de fechas dado: ${total_ventas_rango:.2f}")
-
-        return ventas_filtradas
+            datetime.strptime(desde, "%Y-%m-%d")
+            datetime.strptime(hasta, "%Y-%m-%d")
+        except ValueError:
+            self.mostrar_error("Formato de fecha inválido. Use YYYY-MM-DD.")
+            return
+        if self.modulo_facturas() is None:
+            return
+        destino = f"facturas/facturas_{desde}_a_{hasta}.pdf" if un_archivo else None
+        self.main.tareas.lanzar("Reimprimiendo facturas...", self.generar_facturas_rango, desde, hasta, destino,
+                                al_terminar=self.mostrar_error, al_fallar=self.factura_fallida)
+
+    @metricas.medido()
+    def generar_facturas_rango(self, desde, hasta, destino):
+        """Corre en un hilo de tareas.py; el lote por factura reparte el trabajo en procesos"""
+        textos = self.almacen.facturas_entre(desde, hasta)
+        if not textos:
+            return "No hay ventas en el rango de fechas especificado."
+        from facturas import generar_lote
+        archivos = generar_lote(textos, destino)
+        if destino is not None:
+            return f"{len(textos)} facturas en {destino}."
+        return f"{len(archivos)} facturas reimpresas."
+
+    @metricas.medido()
+    def lineas_reporte_dia(self, dia):
+        """Líneas del detalle de un día en el reporte (como el archivo de cierre de caja)"""
+        ventas, total_dia = self.almacen.ventas_del_dia(dia)
+        return LineasTexto([dia, ""] + texto_cierre_caja(ventas, total_dia).splitlines() + [""])
+
+    @metricas.medido()
+    def filtrar_ventas_por_fecha(self, fecha_inicio, fecha_fin):
+        """Filas por día y totales del rango, desde el resumen precalculado"""
+        return self.almacen.resumen_ventas(fecha_inicio, fecha_fin)
     
     def mostrar_error(self, mensaje):
         error_text = urwid.Text(mensaje, align='center')
@@ -525,7 +638,43 @@ class AdminView(urwid.WidgetWrap):
         ])
         self.main.loop.widget = urwid.Filler(pile, valign='top')
 
+    def ver_rendimiento(self, button):
+        """Tiempos de los botones y de las operaciones con archivos, actualizados cada segundo (ver metricas.py)"""
+        self.texto_rendimiento = urwid.Text("")
+        pile = urwid.Pile([
+            urwid.Text("Rendimiento", align='center'),
+            urwid.Divider(),
+            self.texto_rendimiento,
+            urwid.Divider(),
+            urwid.Button("Volver", on_press=self.volver)
+        ])
+        self._wrapped_widget = urwid.Filler(pile, valign='top')
+        self.main.loop.widget = self._wrapped_widget
+        self.refrescar_rendimiento()
+
+    def refrescar_rendimiento(self, loop=None, user_data=None):
+        widgets = ", ".join(f"{type(vista).__name__} {metricas.contar_widgets(vista)}"
+                            for vista in self.main.vistas.values())
+        lineas = [
+            f"Widgets vivos: {widgets}" if config.METRICAS else "Métricas apagadas (TIENDA_METRICAS=0).",
+            "",
+            f"{'Operación':<44}{'Veces':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Leído':>10}{'Escrito':>10}",
+        ]
+        for nombre, datos in list(metricas.registro.resumen().items())[:MAXIMO_OPERACIONES_RENDIMIENTO]:
+            lineas.append(f"{nombre[:43]:<44}{datos['veces']:>7}{datos['p50_ms']:>10.1f}{datos['p95_ms']:>10.1f}"
+                          f"{datos['p99_ms']:>10.1f}{metricas.tamano(datos['leidos']):>10}"
+                          f"{metricas.tamano(datos['escritos']):>10}")
+        self.texto_rendimiento.set_text("\n".join(lineas))
+        self.alarma_rendimiento = self.main.loop.set_alarm_in(1, self.refrescar_rendimiento)
+
+    def cerrar_rendimiento(self):
+        if getattr(self, 'alarma_rendimiento', None) is not None:
+            self.main.loop.remove_alarm(self.alarma_rendimiento)
+            self.alarma_rendimiento = None
+
     def volver(self, button):
+        self.cerrar_rendimiento()
+        self.cerrar_visor()
         self.mostrar_menu()  # Regenera el menú principal
 
     def volver_al_inicio(self, button):
@@ -0,0 +1,584 @@
+import os
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+import config
+from cola_pedidos import ColaPedidos
+from inventario import Inventario, StockInsuficiente, firma_archivo
+from lineas import LineasArchivo
+from libro_ventas import SEPARADOR_VENTA, LibroVentas, leer_venta_texto
+from numeracion import NumeradorFacturas
+from resumen_ventas import ResumenDiario
+from rutas import elegir_lote
+from transacciones import DiarioOcupado, DiarioTransacciones, cajas_con_diario
+
+SEPARADOR_DIA = "\n\n----------------------------------------------------------------\n\n"
+
+
+def texto_venta(id_factura, fecha, descuento, items, total_con_descuento, cliente=None):
+    """Arma el bloque de texto de una venta tal como se guarda en ventas.txt.
+
+    En las ventas a domicilio cliente es (nombre, dirección) y queda en dos
+    líneas más, para poder armar la factura después (ver facturas.py).
+    """
+    lineas = [
+        f"ID Factura: {id_factura}",
+        f"Fecha: {fecha}",
+        f"Descuento: {descuento}%",
+    ]
+    if cliente is not None:
+        lineas.append(f"Cliente: {cliente[0]}")
+        lineas.append(f"Dirección: {cliente[1]}")
+    for item in items:
+        lineas.append(f"Producto: {item['nombre']} x{item['cantidad']} - "
+                      f"Total: ${item['precio_venta'] * item['cantidad']:.2f}")
+    lineas.append(f"Total con descuento: ${total_con_descuento:.2f}")
+    return "\n".join(lineas) + "\n"
+
+
+def texto_cierre_caja(ventas_del_dia, total_ventas_dia):
+    """Contenido del archivo diario/ventas_dia_<fecha>.txt que se escribe al cerrar la caja"""
+    return SEPARADOR_DIA.join(ventas_del_dia) + "\n\nTotal de ventas del día: ${:.2f}".format(total_ventas_dia)
+
+
+def unidades_y_costo(items):
+    """Unidades vendidas y costo (precio de compra) de los items de una venta"""
+    unidades = sum(item['cantidad'] for item in items)
+    costo = sum((item.get('precio_compra') or 0.0) * item['cantidad'] for item in items)
+    return unidades, costo
+
+
+def cambios_de_stock(items):
+    """{id: diferencia} que una venta le hace al inventario (varias líneas del mismo producto se suman)"""
+    cambios = {}
+    for item in items:
+        cambios[item['id']] = cambios.get(item['id'], 0) - item['cantidad']
+    return cambios
+
+
+def texto_pedido_domicilio(cliente, direccion, items, fecha=None):
+    """Arma el bloque de texto de un pedido a domicilio tal como se guarda en pedidosDom.txt"""
+    lineas = [f"Cliente: {cliente}", f"Dirección: {direccion}"]
+    if fecha is not None:
+        lineas.append(f"Fecha: {fecha}")  # Cuándo se encoló (ver cola_pedidos.lote_listo)
+    lineas.append("Productos:")
+    lineas.extend(f"{item['nombre']} x{item['cantidad']}" for item in items)
+    return "\n".join(lineas)
+
+
+class LoteTomado(FileNotFoundError):
+    """Otro domiciliario aceptó el lote primero (domiciliario es quién, si se sabe)"""
+
+    def __init__(self, nombre_lote, domiciliario=None):
+        super().__init__(nombre_lote)
+        self.nombre_lote = nombre_lote
+        self.domiciliario = domiciliario
+
+
+class AlmacenTexto:
+    """Guarda los datos de la tienda en los archivos de texto de siempre.
+
+    Agrupa las operaciones que usan las vistas (inventario, ventas, número
+    de factura y pedidos a domicilio) para que se pueda cambiar el
+    almacenamiento sin tocar las vistas. Ver AlmacenSQLite.
+    """
+
+    carpeta_pendientes = "pedidos pendientes"
+    carpeta_aceptados = "pedidos aceptados"  # Una subcarpeta por domiciliario
+    carpeta_entregados = "pedidos entregados"  # Archivo: una subcarpeta por día y domiciliario
+    carpeta_domiciliarios = "domiciliarios"  # Un archivo por domiciliario disponible
+    # Cada cuántas transacciones se sincroniza todo y se vacía el diario de transacciones
+    transacciones_por_control = 256
+
+    def __init__(self):
+        self.inventario = Inventario()
+        self.libro_ventas = LibroVentas("ventas")
+        self.libro_ventas.convertir_si_hace_falta("ventas.txt")
+        self.resumen = ResumenDiario(os.path.join("ventas", "resumen.txt"))
+        if not self.resumen.existe() and self.libro_ventas.existe():
+            self.resumen.reconstruir(self._ventas_para_resumen())
+
+        self.numerador = NumeradorFacturas("ultima_factura.txt", config.BLOQUE_FACTURAS)
+        self.transacciones = DiarioTransacciones("transacciones.log", config.ESPERA_GRUPO_MS / 1000)
+        self._lock_ventas = threading.Lock()
+        self._turno = threading.Condition()
+        self._en_curso = 0
+        self._recuperar(self.transacciones)
+        self._recuperar_otras_cajas()
+        self._proxima_a_aplicar = self.transacciones.ultimo + 1
+        self.cola_pedidos = ColaPedidos("pedidosDom.txt", (self.carpeta_pendientes, self.carpeta_aceptados))
+
+    # Ventas
+    def siguiente_id_factura(self):
+        """Reserva y devuelve el siguiente ID de factura (de memoria, ver numeracion.py)"""
+        return self.numerador.siguiente()
+
+    def confirmar_venta(self, fecha, descuento, items, total_con_descuento, cliente=None):
+        """Descuenta el stock, numera la factura y registra la venta en una sola transacción.
+
+        cliente es (nombre, dirección) en las ventas a domicilio. Devuelve el
+        ID de factura. Si algún producto ya no tiene stock (o se borró) lanza
+        StockInsuficiente o KeyError y no cambia nada.
+
+        El stock se revisa y se descuenta con el inventario bloqueado (ver
+        Inventario.bloqueado), contra lo que vendieron también las otras
+        cajas; el fsync de la venta se hace después, compartido.
+        """
+        cambios = cambios_de_stock(items)
+        with self._lock_ventas, self.inventario.bloqueado():
+            self._validar_stock(cambios)
+            id_factura = self.siguiente_id_factura()
+            registro = {"factura": id_factura, "fecha": fecha, "descuento": descuento,
+                        "total": total_con_descuento, "items": items, "cambios": cambios}
+            if cliente is not None:
+                registro["cliente"] = list(cliente)
+            registro["n"] = self.transacciones.agregar(registro)
+            self._en_curso += 1
+            self._aplicar_stock(registro)
+
+        confirmada = False
+        try:
+            self.transacciones.confirmar(registro["n"])
+            confirmada = True
+        finally:
+            # Los efectos se aplican en el orden del diario, aunque el fsync haya sido compartido
+            with self._turno:
+                while self._proxima_a_aplicar != registro["n"]:
+                    self._turno.wait()
+                try:
+                    self._aplicar_venta(registro, confirmada)
+                finally:
+                    self._proxima_a_aplicar += 1
+                    self._turno.notify_all()
+        self._tal_vez_punto_de_control()
+        return id_factura
+
+    def confirmar_ventas(self, ventas, por_grupo=1000):
+        """Confirma muchas ventas de una vez (ver importar_ventas.py).
+
+        ventas son tuplas (fecha, descuento, items, total_con_descuento,
+        cliente) con los argumentos de confirmar_venta. Cada grupo de
+        `por_grupo` ventas va al diario con un solo fsync y al inventario en
+        un solo registro. Devuelve, en el mismo orden, el ID de factura de
+        cada venta o el error (StockInsuficiente o KeyError) de las que no
+        se pudieron hacer; esas no cambian nada.
+        """
+        ventas = list(ventas)
+        resultados = []
+        for inicio in range(0, len(ventas), por_grupo):
+            resultados.extend(self._confirmar_grupo(ventas[inicio:inicio + por_grupo]))
+        return resultados
+
+    def _confirmar_grupo(self, ventas):
+        resultados = []
+        registros = []
+        reservado = {}  # Stock de las ventas del grupo ya validadas
+        with self._lock_ventas, self.inventario.bloqueado():
+            for fecha, descuento, items, total_con_descuento, cliente in ventas:
+                cambios = cambios_de_stock(items)
+                try:
+                    self._validar_stock(cambios, reservado)
+                except (StockInsuficiente, KeyError) as error:
+                    resultados.append(error)
+                    continue
+                for id_producto, diferencia in cambios.items():
+                    reservado[id_producto] = reservado.get(id_producto, 0) + diferencia
+                registro = {"fecha": fecha, "descuento": descuento, "total": total_con_descuento,
+                            "items": items, "cambios": cambios}
+                if cliente is not None:
+                    registro["cliente"] = list(cliente)
+                registros.append(registro)
+                resultados.append(registro)
+            # Los números se piden después de validar: las ventas rechazadas no dejan huecos
+            for registro, id_factura in zip(registros, self.numerador.siguientes(len(registros))):
+                registro["factura"] = id_factura
+                registro["n"] = self.transacciones.agregar(registro)
+            self._en_curso += len(registros)
+            if registros:
+                # Con el número del último, el inventario cuenta todo el grupo como aplicado
+                self._aplicar_stock({"n": registros[-1]["n"], "cambios": reservado})
+        if not registros:
+            return resultados
+
+        confirmada = False
+        try:
+            self.transacciones.confirmar(registros[-1]["n"])
+            confirmada = True
+        finally:
+            with self._turno:
+                while self._proxima_a_aplicar != registros[0]["n"]:
+                    self._turno.wait()
+                try:
+                    self._aplicar_ventas(registros, confirmada)
+                finally:
+                    self._proxima_a_aplicar = registros[-1]["n"] + 1
+                    self._turno.notify_all()
+        self._tal_vez_punto_de_control()
+        return [resultado["factura"] if isinstance(resultado, dict) else resultado for resultado in resultados]
+
+    def _validar_stock(self, cambios, reservado=None):
+        """Con el inventario bloqueado; reservado es lo que ya se apartó para otras ventas del grupo"""
+        productos = self.inventario.productos
+        for id_producto, diferencia in cambios.items():
+            if id_producto not in productos:
+                raise KeyError(id_producto)
+            if productos[id_producto].cantidad + (reservado or {}).get(id_producto, 0) + diferencia < 0:
+                raise StockInsuficiente(id_producto)
+
+    def _aplicar_venta(self, registro, confirmada=True):
+        """Efectos de una transacción ya en disco: libro de ventas y resumen (el stock ya se descontó)"""
+        try:
+            if confirmada:
+                self._registrar_en_libro(registro)
+                self.transacciones.terminar(registro["n"])
+            else:
+                self._devolver_stock(registro["cambios"])
+        finally:
+            with self._lock_ventas:
+                self._en_curso -= 1
+
+    def _aplicar_ventas(self, registros, confirmada=True):
+        """Como _aplicar_venta para un grupo seguido del diario"""
+        try:
+            if confirmada:
+                self._registrar_varias_en_libro(registros)
+                self.transacciones.terminar(*(registro["n"] for registro in registros))
+            else:
+                cambios = {}
+                for registro in registros:
+                    for id_producto, diferencia in registro["cambios"].items():
+                        cambios[id_producto] = cambios.get(id_producto, 0) + diferencia
+                self._devolver_stock(cambios)
+        finally:
+            with self._lock_ventas:
+                self._en_curso -= len(registros)
+
+    def _devolver_stock(self, cambios):
+        """La venta no llegó al disco: vuelve al inventario el stock que se le había descontado"""
+        with self.inventario.bloqueado():
+            self.inventario.ajustar_cantidades({id_producto: -diferencia for id_producto, diferencia in cambios.items()
+                                                if id_producto in self.inventario.productos})
+
+    def _aplicar_stock(self, registro, diario=None):
+        cambios = {id_producto: diferencia for id_producto, diferencia in registro["cambios"].items()
+                   if id_producto in self.inventario.productos}
+        try:
+            self.inventario.ajustar_cantidades(cambios, transaccion=registro["n"],
+                                               caja=(diario or self.transacciones).caja)
+        except StockInsuficiente:
+            # Solo puede pasar al recuperar si el inventario se tocó a mano: la venta igual se registra
+            pass
+
+    def _registrar_en_libro(self, registro):
+        texto = texto_venta(registro["factura"], registro["fecha"], registro["descuento"],
+                            registro["items"], registro["total"], registro.get("cliente"))
+        unidades, costo = unidades_y_costo(registro["items"])
+        self.libro_ventas.registrar(registro["factura"], registro["fecha"], texto, registro["total"], unidades, costo)
+        self.resumen.registrar(registro["fecha"][:10], registro["total"], unidades, costo)
+
+    def _registrar_varias_en_libro(self, registros):
+        ventas = []
+        for registro in registros:
+            texto = texto_venta(registro["factura"], registro["fecha"], registro["descuento"],
+                                registro["items"], registro["total"], registro.get("cliente"))
+            ventas.append((registro["factura"], registro["fecha"], texto, registro["total"])
+                          + unidades_y_costo(registro["items"]))
+        self.libro_ventas.registrar_varias(ventas)
+        self.resumen.registrar_varias([(fecha[:10], total, unidades, costo)
+                                       for _, fecha, _, total, unidades, costo in ventas])
+
+    def _recuperar(self, diario):
+        """Termina de aplicar las ventas confirmadas del diario que quedaron a medias por una caída"""
+        pendientes = diario.pendientes()
+        with self.inventario.bloqueado():
+            aplicada = self.inventario.ultimas_transacciones.get(diario.caja, 0)
+            diario.continuar_desde(aplicada)
+            for registro in pendientes:
+                if registro["n"] > aplicada:
+                    self._aplicar_stock(registro, diario)
+        rehacer_resumen = False
+        for registro in pendientes:
+            if self.libro_ventas.ubicacion(registro["factura"]) is None:
+                self._registrar_en_libro(registro)
+            else:
+                # Se cortó entre el libro y el resumen: el resumen se rehace desde el libro
+                rehacer_resumen = True
+            diario.terminar(registro["n"])
+        if rehacer_resumen:
+            self.resumen.reconstruir(self._ventas_para_resumen())
+        if pendientes:
+            self._punto_de_control(diario)
+
+    def _recuperar_otras_cajas(self):
+        """Recupera los diarios de las cajas que se cayeron y no volvieron a abrir"""
+        for caja in cajas_con_diario("transacciones.log"):
+            if caja == self.transacciones.caja:
+                continue
+            try:
+                diario = DiarioTransacciones("transacciones.log", caja=caja)
+            except DiarioOcupado:
+                continue  # Esa caja sigue abierta
+            try:
+                self._recuperar(diario)
+            finally:
+                diario.cerrar()
+
+    def _tal_vez_punto_de_control(self):
+        if self.transacciones.ultimo - self.transacciones.primero + 1 >= self.transacciones_por_control:
+            self._punto_de_control()
+
+    def _punto_de_control(self, diario=None):
+        """Sincroniza los archivos escritos sin fsync y vacía el diario de transacciones (el de esta caja)"""
+        with self._lock_ventas:
+            if self._en_curso:
+                return  # Hay ventas a medio aplicar: se intenta con la próxima
+            self.inventario.sincronizar()
+            self.libro_ventas.sincronizar()
+            self.resumen.sincronizar()
+            (diario or self.transacciones).reiniciar()
+
+    def registrar_venta(self, id_factura, fecha, descuento, items, total_con_descuento, cliente=None):
+        """Agrega una venta al libro sin tocar el stock (ver confirmar_venta)"""
+        self._registrar_en_libro({"factura": id_factura, "fecha": fecha, "descuento": descuento,
+                                  "items": items, "total": total_con_descuento, "cliente": cliente})
+
+    def _ventas_para_resumen(self):
+        """(dia, total, unidades, costo) de cada venta del libro.
+
+        Las ventas anteriores al índice con unidades y costo se leen del texto,
+        con el precio de compra actual del producto con ese nombre.
+        """
+        costos = None
+        for dia in self.libro_ventas.dias():
+            entradas = self.libro_ventas.entradas(dia)
+            if all(entrada[2] is not None for entrada in entradas):
+                for _, total, unidades, costo in entradas:
+                    yield dia, total, unidades, costo
+                continue
+            if costos is None:
+                costos = {p.nombre: p.precio_compra for p in self.inventario.productos.values()}
+            for (_, total, unidades, costo), texto in zip(entradas, self.libro_ventas.ventas_del_dia(dia)[0]):
+                if unidades is None:
+                    venta = leer_venta_texto(texto)
+                    items = [dict(item, precio_compra=costos.get(item['nombre'], 0.0)) for item in venta[4]]
+                    unidades, costo = unidades_y_costo(items)
+                yield dia, total, unidades, costo
+
+    def ventas_del_dia(self, fecha):
+        """Devuelve (lista de ventas en texto, total) de la fecha YYYY-MM-DD"""
+        return self.libro_ventas.ventas_del_dia(fecha)
+
+    def partes_ventas(self):
+        """[(dia, abrir)] del historial; abrir() devuelve las líneas de ese día (ver lineas.py y visor.py)"""
+        return [(dia, partial(LineasArchivo, self.libro_ventas.ruta_dia(dia))) for dia in self.libro_ventas.dias()]
+
+    def factura(self, id_factura):
+        """Texto guardado de una factura, o None si no existe (ver facturas.py)"""
+        return self.libro_ventas.venta(id_factura)
+
+    def facturas_entre(self, fecha_inicio, fecha_fin):
+        """Textos de las facturas entre dos fechas YYYY-MM-DD (incluidas), en orden"""
+        textos = []
+        for dia in self.libro_ventas.dias(fecha_inicio, fecha_fin):
+            textos.extend(self.ventas_del_dia(dia)[0])
+        return textos
+
+    def ubicar_factura(self, id_factura):
+        """(dia, número de línea dentro del día) donde empieza una factura, o None si no existe"""
+        ubicacion = self.libro_ventas.ubicacion(id_factura)
+        if ubicacion is None:
+            return None
+        dia, posicion = ubicacion
+        with open(self.libro_ventas.ruta_dia(dia), "rb") as f:
+            return dia, f.read(posicion).count(b"\n")
+
+    def resumen_ventas(self, fecha_inicio, fecha_fin):
+        """Totales del rango y filas por día, sin leer las ventas.
+
+        Devuelve ([(dia, total, unidades, facturas, margen)], (total, unidades, facturas, margen)).
+        """
+        desde, hasta = fecha_inicio.strftime("%Y-%m-%d"), fecha_fin.strftime("%Y-%m-%d")
+        return self.resumen.por_dia(desde, hasta), self.resumen.totales(desde, hasta)
+
+    def reporte_ventas(self, fecha_inicio, fecha_fin):
+        """Líneas del reporte de ventas entre dos fechas (datetime), leyendo solo los días del rango"""
+        ventas_filtradas = []
+        total_rango = 0.0
+        for dia in self.libro_ventas.dias(fecha_inicio.strftime("%Y-%m-%d"), fecha_fin.strftime("%Y-%m-%d")):
+            ventas, total_dia = self.ventas_del_dia(dia)
+            ventas_filtradas.extend(texto_cierre_caja(ventas, total_dia).splitlines(keepends=True))
+            ventas_filtradas.append("\n")
+            total_rango += total_dia
+        if ventas_filtradas:
+            ventas_filtradas.append(f"\nTotal de ventas del rango de fechas dado: ${total_rango:.2f}")
+        return ventas_filtradas
+
+    # Pedidos a domicilio
+    def agregar_pedido_domicilio(self, cliente, direccion, items):
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.cola_pedidos.agregar(texto_pedido_domicilio(cliente, direccion, items, fecha))
+
+    def agendar_pedidos(self, cantidad=None, espera_max=None):
+        """Pasa el pedido más viejo de la cola y sus vecinos a un lote en 'pedidos pendientes'.
+
+        El lote se arma con `cantidad` pedidos (config.PEDIDOS_POR_LOTE), o
+        con los que haya si el más viejo esperó más de `espera_max` segundos
+        (config.ESPERA_MAX_LOTE_MIN). Los acompañantes del más viejo son los
+        más cercanos entre los primeros config.VENTANA_PEDIDOS de la cola, y
+        el lote queda en el orden en que conviene entregarlos (ver rutas.py).
+        Devuelve el nombre del lote, o None si todavía no hay lote. Lanza
+        FileNotFoundError si no hay pedidos registrados.
+        """
+        cantidad = cantidad or config.PEDIDOS_POR_LOTE
+        if espera_max is None:
+            espera_max = config.ESPERA_MAX_LOTE_MIN * 60
+        lote = self.cola_pedidos.sacar_lote(cantidad, espera_max, self._escribir_lote,
+                                            ventana=config.VENTANA_PEDIDOS, elegir=elegir_lote)
+        return None if lote is None else f"pedido{lote[0]}.txt"
+
+    def _escribir_lote(self, numero, pedidos):
+        os.makedirs(self.carpeta_pendientes, exist_ok=True)
+        ruta = os.path.join(self.carpeta_pendientes, f"pedido{numero}.txt")
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            f.write(("\n" + SEPARADOR_VENTA + "\n").join(pedidos))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta + ".tmp", ruta)
+
+    @staticmethod
+    def _nombres_lotes(carpeta):
+        if not os.path.isdir(carpeta):
+            return []
+        return [f for f in os.listdir(carpeta) if f.startswith("pedido") and f.endswith(".txt")]
+
+    def _aceptados(self):
+        """(nombre, domiciliario) de los lotes aceptados; domiciliario None en los de antes de las subcarpetas"""
+        aceptados = [(nombre, None) for nombre in self._nombres_lotes(self.carpeta_aceptados)]
+        if os.path.isdir(self.carpeta_aceptados):
+            for entrada in os.scandir(self.carpeta_aceptados):
+                if entrada.is_dir():
+                    aceptados += [(nombre, entrada.name) for nombre in self._nombres_lotes(entrada.path)]
+        return aceptados
+
+    def lotes(self, estado, domiciliario=None):
+        """Nombres de los lotes de pedidos en estado 'pendiente' o 'aceptado'
+        (los aceptados, de un domiciliario o de todos)"""
+        if estado != "aceptado":
+            return self._nombres_lotes(self.carpeta_pendientes)
+        if domiciliario is not None:
+            return self._nombres_lotes(os.path.join(self.carpeta_aceptados, domiciliario))
+        return [nombre for nombre, _ in self._aceptados()]
+
+    def domiciliario_de(self, nombre_lote):
+        """Quién aceptó un lote (None si nadie o si es de antes de las subcarpetas)"""
+        for nombre, domiciliario in self._aceptados():
+            if nombre == nombre_lote:
+                return domiciliario
+        return None
+
+    def leer_lote(self, nombre_lote, estado):
+        """Contenido de un lote (FileNotFoundError si ya no existe)"""
+        ruta = os.path.join(self.carpeta_pendientes, nombre_lote)
+        if estado == "aceptado":
+            ruta = os.path.join(self.carpeta_aceptados, self.domiciliario_de(nombre_lote) or "", nombre_lote)
+        with open(ruta, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def aceptar_lote(self, nombre_lote, domiciliario=None):
+        """Pasa el lote a la carpeta del domiciliario.
+
+        Es un solo rename: si dos domiciliarios lo aceptan a la vez, el
+        archivo ya no está para el segundo y a ese le llega LoteTomado.
+        """
+        carpeta = os.path.join(self.carpeta_aceptados, domiciliario or "")
+        os.makedirs(carpeta, exist_ok=True)
+        try:
+            os.rename(os.path.join(self.carpeta_pendientes, nombre_lote), os.path.join(carpeta, nombre_lote))
+        except FileNotFoundError:
+            raise LoteTomado(nombre_lote, self.domiciliario_de(nombre_lote)) from None
+
+    def entregar_lote(self, nombre_lote, domiciliario=None):
+        """Archiva un lote aceptado como entregado (FileNotFoundError si no lo tiene ese domiciliario)"""
+        carpeta = os.path.join(self.carpeta_entregados, datetime.now().strftime("%Y-%m-%d"), domiciliario or "")
+        os.makedirs(carpeta, exist_ok=True)
+        os.rename(os.path.join(self.carpeta_aceptados, domiciliario or "", nombre_lote),
+                  os.path.join(carpeta, nombre_lote))
+
+    def sello_inventario(self):
+        """Cambia cuando alguien (esta caja u otra) escribe en el inventario: foto y diario"""
+        return firma_archivo(self.inventario.ruta), firma_archivo(self.inventario.ruta_log)
+
+    def sello_ventas(self):
+        """Cambia cuando alguien (esta caja u otra) agrega ventas: índice del libro y resumen"""
+        return firma_archivo(self.libro_ventas.ruta_indice), firma_archivo(self.resumen.ruta)
+
+    def releer_ventas(self):
+        """Carga las ventas que agregaron otras cajas al libro y al resumen"""
+        self.libro_ventas.releer()
+        self.resumen.releer()
+
+    def sello_lotes(self, domiciliario=None):
+        """Cambia cada vez que aparece o se va un lote pendiente, o uno aceptado por el domiciliario.
+
+        Es la fecha de modificación de las carpetas (un stat por carpeta),
+        para revisar seguido sin listar nada.
+        """
+        sello = []
+        for carpeta in (self.carpeta_pendientes, os.path.join(self.carpeta_aceptados, domiciliario or "")):
+            try:
+                sello.append(os.stat(carpeta).st_mtime_ns)
+            except FileNotFoundError:
+                sello.append(None)
+        return tuple(sello)
+
+    def sello_lote(self, nombre_lote, estado):
+        """Cambia si cambia el contenido de un lote; None si ya no está en ese estado"""
+        ruta = os.path.join(self.carpeta_pendientes, nombre_lote)
+        if estado == "aceptado":
+            ruta = os.path.join(self.carpeta_aceptados, self.domiciliario_de(nombre_lote) or "", nombre_lote)
+        try:
+            info = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def marcar_disponible(self, domiciliario, disponible=True):
+        """Anota (o borra) que el domiciliario está trabajando; volver a marcarlo renueva la marca"""
+        ruta = os.path.join(self.carpeta_domiciliarios, domiciliario)
+        if not disponible:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            return
+        os.makedirs(self.carpeta_domiciliarios, exist_ok=True)
+        with open(ruta, "a", encoding="utf-8"):
+            pass
+        os.utime(ruta)
+
+    def domiciliarios_disponibles(self):
+        """Domiciliarios marcados hace menos de config.DOMICILIARIO_INACTIVO_MIN minutos"""
+        if not os.path.isdir(self.carpeta_domiciliarios):
+            return []
+        limite = time.time() - config.DOMICILIARIO_INACTIVO_MIN * 60
+        return sorted(entrada.name for entrada in os.scandir(self.carpeta_domiciliarios)
+                      if entrada.is_file() and entrada.stat().st_mtime >= limite)
+
+    def cerrar(self):
+        self._punto_de_control()
+        self.transacciones.cerrar()
+        self.numerador.cerrar()
+        self.inventario.cerrar()
+
+
+def abrir_almacen():
+    """Abre el almacenamiento configurado en config.ALMACEN"""
+    if config.ALMACEN == "sqlite":
+        from almacen_sqlite import AlmacenSQLite
+        return AlmacenSQLite(config.RUTA_SQLITE)
+    if config.ALMACEN == "servidor":
+        from cliente_almacen import AlmacenRemoto
+        return AlmacenRemoto(config.RUTA_SOCKET)
+    return AlmacenTexto()
@@ -0,0 +1,688 @@
+"""Almacenamiento opcional en SQLite (modo WAL) para inventario, ventas y pedidos.
+
+Se activa con TIENDA_ALMACEN=sqlite (ver config.py) y ofrece las mismas
+operaciones que AlmacenTexto, así que las vistas no cambian. Varias cajas
+pueden compartir el mismo archivo .db: cada cambio es una transacción y
+los descuentos de stock se hacen en la base, no sobre una copia en memoria.
+
+Cada hilo usa su propia conexión (ver ConexionesPorHilo): servidor.py
+atiende los pedidos de las cajas desde varios hilos a la vez.
+
+Para pasar los archivos de texto actuales a la base (una sola vez):
+
+    python almacen_sqlite.py migrar [--db tienda.db] [--desde carpeta]
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+
+import config
+from almacen import (SEPARADOR_VENTA, LoteTomado, cambios_de_stock, texto_cierre_caja, texto_pedido_domicilio,
+                     texto_venta, unidades_y_costo)
+from cola_pedidos import ColaPedidos, lote_listo
+from inventario import AvisosInventario, Inventario, Producto, StockInsuficiente, leer_linea_pedido
+from libro_ventas import LibroVentas, leer_venta_texto
+from lineas import LineasTexto
+from rutas import elegir_lote
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    precio_compra REAL NOT NULL,
+    precio_venta REAL NOT NULL,
+    cantidad INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS productos_compra ON productos (nombre, precio_compra);
+
+CREATE TABLE IF NOT EXISTS ventas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_factura INTEGER,
+    fecha TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    descuento REAL NOT NULL DEFAULT 0,
+    total REAL NOT NULL,
+    texto TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ventas_dia ON ventas (dia);
+CREATE INDEX IF NOT EXISTS ventas_factura ON ventas (id_factura);
+
+CREATE TABLE IF NOT EXISTS venta_items (
+    id_venta INTEGER NOT NULL REFERENCES ventas (id),
+    nombre TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    precio_venta REAL NOT NULL,
+    precio_compra REAL
+);
+CREATE INDEX IF NOT EXISTS venta_items_venta ON venta_items (id_venta);
+
+-- Totales por día para el reporte por fechas (se actualiza con cada venta)
+CREATE TABLE IF NOT EXISTS resumen_dias (
+    dia TEXT PRIMARY KEY,
+    total REAL NOT NULL DEFAULT 0,
+    unidades INTEGER NOT NULL DEFAULT 0,
+    facturas INTEGER NOT NULL DEFAULT 0,
+    costo REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS contadores (
+    nombre TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pedidos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    texto TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'en_cola',
+    lote TEXT
+);
+CREATE INDEX IF NOT EXISTS pedidos_estado ON pedidos (estado, id);
+
+CREATE TABLE IF NOT EXISTS lotes (
+    nombre TEXT PRIMARY KEY,
+    estado TEXT NOT NULL,
+    contenido TEXT NOT NULL,
+    domiciliario TEXT,
+    entregado TEXT
+);
+CREATE INDEX IF NOT EXISTS lotes_estado ON lotes (estado);
+
+CREATE TABLE IF NOT EXISTS domiciliarios (
+    usuario TEXT PRIMARY KEY,
+    visto REAL NOT NULL
+);
+"""
+
+
+def conectar(ruta):
+    conexion = sqlite3.connect(ruta, timeout=10, isolation_level=None, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=FULL")
+    conexion.execute("PRAGMA foreign_keys=ON")
+    conexion.executescript(ESQUEMA)
+    # Columnas que no tenían las bases creadas antes
+    columnas = [fila[1] for fila in conexion.execute("PRAGMA table_info(lotes)")]
+    for columna in ("domiciliario", "entregado"):
+        if columna not in columnas:
+            conexion.execute(f"ALTER TABLE lotes ADD COLUMN {columna} TEXT")
+    return conexion
+
+
+class ConexionesPorHilo:
+    """Una conexión a la base por hilo, abierta la primera vez que el hilo la pide.
+
+    Una conexión de sqlite3 tiene una sola transacción a la vez: compartida
+    entre hilos, el BEGIN IMMEDIATE de uno cae dentro de la transacción de
+    otro ("cannot start a transaction within a transaction").
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._abiertas = []
+        self._lock = threading.Lock()
+
+    def actual(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = conectar(self.ruta)
+            with self._lock:
+                self._abiertas.append(conexion)
+        return conexion
+
+    def cerrar(self):
+        with self._lock:
+            for conexion in self._abiertas:
+                conexion.close()
+            self._abiertas = []
+        self._local = threading.local()
+
+
+@contextmanager
+def transaccion(conexion):
+    """Transacción que toma el candado de escritura desde el inicio (otras cajas esperan)"""
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        yield conexion
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    conexion.execute("COMMIT")
+
+
+class InventarioSQLite(AvisosInventario):
+    """Mismas operaciones que Inventario, guardadas en la tabla productos"""
+
+    def __init__(self, conexiones):
+        self.conexiones = conexiones
+        self.productos = {}
+        self._lock_stock = threading.Lock()
+        self.cargar()
+
+    @property
+    def conexion(self):
+        return self.conexiones.actual()
+
+    def cargar(self):
+        self.productos = {
+            str(id_producto): Producto(nombre, precio_compra, precio_venta, cantidad)
+            for id_producto, nombre, precio_compra, precio_venta, cantidad in self.conexion.execute(
+                "SELECT id, nombre, precio_compra, precio_venta, cantidad FROM productos ORDER BY id")
+        }
+        self._avisar([("carga", None)])
+
+    def releer(self):
+        """Vuelve a leer la tabla (otra caja escribió en la base) y avisa solo lo que cambió"""
+        antes = self.productos
+        ahora = {
+            str(id_producto): (nombre, precio_compra, precio_venta, cantidad)
+            for id_producto, nombre, precio_compra, precio_venta, cantidad in self.conexion.execute(
+                "SELECT id, nombre, precio_compra, precio_venta, cantidad FROM productos ORDER BY id")
+        }
+        cambios = []
+        for id_producto in [id_producto for id_producto in antes if id_producto not in ahora]:
+            del antes[id_producto]
+            cambios.append(("baja", id_producto))
+        for id_producto, (nombre, precio_compra, precio_venta, cantidad) in ahora.items():
+            producto = antes.get(id_producto)
+            if producto is None or producto.nombre != nombre or producto.precio_compra != precio_compra:
+                antes[id_producto] = Producto(nombre, precio_compra, precio_venta, cantidad)
+                cambios.append(("alta", id_producto))
+                continue
+            if producto.precio_venta != precio_venta:
+                producto.precio_venta = precio_venta
+                cambios.append(("precio", id_producto))
+            if producto.cantidad != cantidad:
+                producto.cantidad = cantidad
+                cambios.append(("stock", id_producto))
+        if cambios:
+            self._avisar(cambios)
+        return bool(cambios)
+
+    def agregar(self, nombre, precio_compra, precio_venta, cantidad):
+        with transaccion(self.conexion) as con:
+            cursor = con.execute(
+                "INSERT INTO productos (nombre, precio_compra, precio_venta, cantidad) VALUES (?, ?, ?, ?)",
+                (nombre, precio_compra, precio_venta, cantidad))
+        id_producto = str(cursor.lastrowid)
+        self.productos[id_producto] = Producto(nombre, precio_compra, precio_venta, cantidad)
+        self._avisar([("alta", id_producto)])
+        return id_producto
+
+    def borrar(self, id_producto):
+        with transaccion(self.conexion) as con:
+            cursor = con.execute("DELETE FROM productos WHERE id = ?", (int(id_producto),))
+        self.productos.pop(id_producto, None)
+        if cursor.rowcount == 0:
+            raise KeyError(id_producto)
+        self._avisar([("baja", id_producto)])
+
+    def fijar_precio_venta(self, id_producto, precio_venta):
+        with transaccion(self.conexion) as con:
+            cursor = con.execute("UPDATE productos SET precio_venta = ? WHERE id = ?",
+                                 (precio_venta, int(id_producto)))
+        if cursor.rowcount == 0:
+            raise KeyError(id_producto)
+        self.productos[id_producto].precio_venta = precio_venta
+        self._avisar([("precio", id_producto)])
+
+    def ajustar_cantidades(self, cambios):
+        """Suma las diferencias ({id: diferencia}) en una transacción; nunca deja stock negativo"""
+        with self._transaccion_de_stock() as (con, nuevas):
+            nuevas.update(self._ajustar_en(con, cambios))
+
+    @staticmethod
+    def _ajustar_en(con, cambios):
+        """Aplica los cambios dentro de una transacción ya abierta; devuelve {id: cantidad nueva}"""
+        nuevas = {}
+        for id_producto, diferencia in cambios.items():
+            fila = con.execute("SELECT cantidad FROM productos WHERE id = ?", (int(id_producto),)).fetchone()
+            if fila is None:
+                raise KeyError(id_producto)
+            if fila[0] + diferencia < 0:
+                raise StockInsuficiente(id_producto)
+            con.execute("UPDATE productos SET cantidad = ? WHERE id = ?", (fila[0] + diferencia, int(id_producto)))
+            nuevas[id_producto] = fila[0] + diferencia
+        return nuevas
+
+    @contextmanager
+    def _transaccion_de_stock(self):
+        """Transacción que cambia stock: da (con, {id: cantidad nueva}) y, después del COMMIT, copia esas cantidades.
+
+        La transacción y la copia van juntas bajo un lock: si no, dos hilos
+        podrían copiar sus cantidades en memoria en el orden contrario.
+        """
+        nuevas = {}
+        with self._lock_stock:
+            with transaccion(self.conexion) as con:
+                yield con, nuevas
+            self._poner_cantidades(nuevas)
+
+    def _poner_cantidades(self, nuevas):
+        """Copia en memoria las cantidades ya guardadas en la base y avisa"""
+        for id_producto, cantidad in nuevas.items():
+            if id_producto in self.productos:
+                self.productos[id_producto].cantidad = cantidad
+        self._avisar([("stock", id_producto) for id_producto in nuevas])
+
+    def ajustar_cantidad(self, id_producto, diferencia):
+        self.ajustar_cantidades({id_producto: diferencia})
+
+    def importar_pedido(self, lineas):
+        """Igual que Inventario.importar_pedido; todo el pedido entra en una transacción"""
+        errores = []
+        nuevos = set()
+        actualizados = set()
+        with transaccion(self.conexion) as con:
+            for numero, linea in enumerate(lineas, start=1):
+                linea = linea.strip().lstrip("\ufeff")
+                if not linea:
+                    continue
+                try:
+                    nombre, precio_compra, cantidad = leer_linea_pedido(linea)
+                except ValueError as error:
+                    errores.append((numero, str(error)))
+                    continue
+
+                fila = con.execute(
+                    "SELECT id FROM productos WHERE nombre = ? AND precio_compra = ? ORDER BY id LIMIT 1",
+                    (nombre, precio_compra)).fetchone()
+                if fila is None:
+                    cursor = con.execute(
+                        "INSERT INTO productos (nombre, precio_compra, precio_venta, cantidad) VALUES (?, ?, ?, ?)",
+                        (nombre, precio_compra, precio_compra * 1.5, cantidad))
+                    nuevos.add(cursor.lastrowid)
+                else:
+                    con.execute("UPDATE productos SET cantidad = cantidad + ? WHERE id = ?", (cantidad, fila[0]))
+                    if fila[0] not in nuevos:
+                        actualizados.add(fila[0])
+        self.cargar()
+        return len(nuevos), len(actualizados), errores
+
+    def cerrar(self):
+        pass
+
+
+class AlmacenSQLite:
+    """Mismas operaciones que AlmacenTexto sobre una base SQLite compartida"""
+
+    def __init__(self, ruta="tienda.db"):
+        self.ruta = ruta
+        self.conexiones = ConexionesPorHilo(ruta)
+        self.inventario = InventarioSQLite(self.conexiones)
+        self._llenar_resumen()
+
+    @property
+    def conexion(self):
+        return self.conexiones.actual()
+
+    def _llenar_resumen(self):
+        """Arma resumen_dias para bases creadas antes de que existiera la tabla"""
+        with transaccion(self.conexion) as con:
+            if con.execute("SELECT 1 FROM resumen_dias LIMIT 1").fetchone():
+                return
+            con.execute("""
+                INSERT INTO resumen_dias (dia, total, unidades, facturas, costo)
+                SELECT v.dia, SUM(v.total), SUM(COALESCE(i.unidades, 0)), COUNT(*), SUM(COALESCE(i.costo, 0))
+                FROM ventas v LEFT JOIN (
+                    SELECT id_venta, SUM(cantidad) AS unidades, SUM(COALESCE(precio_compra, 0) * cantidad) AS costo
+                    FROM venta_items GROUP BY id_venta
+                ) i ON i.id_venta = v.id
+                GROUP BY v.dia""")
+
+    # Ventas
+    def siguiente_id_factura(self):
+        with transaccion(self.conexion) as con:
+            return self._siguiente(con, "factura")
+
+    @staticmethod
+    def _siguiente(con, contador):
+        """Incrementa un contador dentro de una transacción ya abierta"""
+        con.execute("INSERT OR IGNORE INTO contadores (nombre, valor) VALUES (?, 0)", (contador,))
+        con.execute("UPDATE contadores SET valor = valor + 1 WHERE nombre = ?", (contador,))
+        return con.execute("SELECT valor FROM contadores WHERE nombre = ?", (contador,)).fetchone()[0]
+
+    def confirmar_venta(self, fecha, descuento, items, total_con_descuento, cliente=None):
+        """Igual que AlmacenTexto.confirmar_venta: stock, número de factura y venta en una transacción"""
+        with self.inventario._transaccion_de_stock() as (con, nuevas):
+            nuevas.update(InventarioSQLite._ajustar_en(con, cambios_de_stock(items)))
+            id_factura = self._siguiente(con, "factura")
+            texto = texto_venta(id_factura, fecha, descuento, items, total_con_descuento, cliente)
+            self._insertar_venta(con, id_factura, fecha, descuento, total_con_descuento, texto, items)
+        return id_factura
+
+    def confirmar_ventas(self, ventas, por_grupo=1000):
+        """Igual que AlmacenTexto.confirmar_ventas; cada grupo de ventas va en una sola transacción"""
+        ventas = list(ventas)
+        resultados = []
+        for inicio in range(0, len(ventas), por_grupo):
+            resultados.extend(self._confirmar_grupo(ventas[inicio:inicio + por_grupo]))
+        return resultados
+
+    def _confirmar_grupo(self, ventas):
+        resultados = []
+        # stock: id -> cantidad, leída una vez por grupo y actualizada en memoria
+        with self.inventario._transaccion_de_stock() as (con, stock):
+            for fecha, descuento, items, total_con_descuento, cliente in ventas:
+                cambios = cambios_de_stock(items)
+                try:
+                    for id_producto, diferencia in cambios.items():
+                        if id_producto not in stock:
+                            fila = None
+                            if str(id_producto).isdigit():
+                                fila = con.execute("SELECT cantidad FROM productos WHERE id = ?",
+                                                   (int(id_producto),)).fetchone()
+                            if fila is None:
+                                raise KeyError(id_producto)
+                            stock[id_producto] = fila[0]
+                        if stock[id_producto] + diferencia < 0:
+                            raise StockInsuficiente(id_producto)
+                except (StockInsuficiente, KeyError) as error:
+                    resultados.append(error)
+                    continue
+                for id_producto, diferencia in cambios.items():
+                    stock[id_producto] += diferencia
+                id_factura = self._siguiente(con, "factura")
+                texto = texto_venta(id_factura, fecha, descuento, items, total_con_descuento, cliente)
+                self._insertar_venta(con, id_factura, fecha, descuento, total_con_descuento, texto, items)
+                resultados.append(id_factura)
+            con.executemany("UPDATE productos SET cantidad = ? WHERE id = ?",
+                            [(cantidad, int(id_producto)) for id_producto, cantidad in stock.items()])
+        return resultados
+
+    def registrar_venta(self, id_factura, fecha, descuento, items, total_con_descuento, cliente=None):
+        texto = texto_venta(id_factura, fecha, descuento, items, total_con_descuento, cliente)
+        with transaccion(self.conexion) as con:
+            self._insertar_venta(con, id_factura, fecha, descuento, total_con_descuento, texto, items)
+
+    @staticmethod
+    def _insertar_venta(con, id_factura, fecha, descuento, total, texto, items):
+        cursor = con.execute(
+            "INSERT INTO ventas (id_factura, fecha, dia, descuento, total, texto) VALUES (?, ?, ?, ?, ?, ?)",
+            (id_factura, fecha, fecha[:10], descuento, total, texto))
+        con.executemany(
+            "INSERT INTO venta_items (id_venta, nombre, cantidad, precio_venta, precio_compra) VALUES (?, ?, ?, ?, ?)",
+            [(cursor.lastrowid, item['nombre'], item['cantidad'], item['precio_venta'], item.get('precio_compra'))
+             for item in items])
+        unidades, costo = unidades_y_costo(items)
+        con.execute("INSERT OR IGNORE INTO resumen_dias (dia) VALUES (?)", (fecha[:10],))
+        con.execute("UPDATE resumen_dias SET total = total + ?, unidades = unidades + ?, facturas = facturas + 1, "
+                    "costo = costo + ? WHERE dia = ?", (total, unidades, costo, fecha[:10]))
+
+    def ventas_del_dia(self, fecha):
+        ventas = []
+        total = 0.0
+        for texto, total_venta in self.conexion.execute(
+                "SELECT texto, total FROM ventas WHERE dia = ? ORDER BY id", (fecha,)):
+            ventas.append(texto.strip())
+            total += total_venta
+        return ventas, total
+
+    def partes_ventas(self):
+        dias = [dia for (dia,) in self.conexion.execute("SELECT dia FROM resumen_dias ORDER BY dia")]
+        return [(dia, partial(self._lineas_dia, dia)) for dia in dias]
+
+    def _lineas_dia(self, dia):
+        lineas = []
+        for (texto,) in self.conexion.execute("SELECT texto FROM ventas WHERE dia = ? ORDER BY id", (dia,)):
+            lineas.extend(texto.splitlines())
+            lineas.append(SEPARADOR_VENTA)
+        return LineasTexto(lineas)
+
+    def factura(self, id_factura):
+        fila = self.conexion.execute(
+            "SELECT texto FROM ventas WHERE id_factura = ? ORDER BY id LIMIT 1", (id_factura,)).fetchone()
+        return None if fila is None else fila[0].strip()
+
+    def facturas_entre(self, fecha_inicio, fecha_fin):
+        return [texto.strip() for (texto,) in self.conexion.execute(
+            "SELECT texto FROM ventas WHERE dia BETWEEN ? AND ? ORDER BY dia, id", (fecha_inicio, fecha_fin))]
+
+    def ubicar_factura(self, id_factura):
+        fila = self.conexion.execute(
+            "SELECT id, dia FROM ventas WHERE id_factura = ? ORDER BY id LIMIT 1", (id_factura,)).fetchone()
+        if fila is None:
+            return None
+        id_venta, dia = fila
+        anteriores = self.conexion.execute(
+            "SELECT texto FROM ventas WHERE dia = ? AND id < ?", (dia, id_venta)).fetchall()
+        return dia, sum(len(texto.splitlines()) + 1 for (texto,) in anteriores)
+
+    def resumen_ventas(self, fecha_inicio, fecha_fin):
+        """Mismo resultado que AlmacenTexto.resumen_ventas, desde la tabla resumen_dias"""
+        rango = (fecha_inicio.strftime("%Y-%m-%d"), fecha_fin.strftime("%Y-%m-%d"))
+        filas = self.conexion.execute(
+            "SELECT dia, total, unidades, facturas, total - costo FROM resumen_dias "
+            "WHERE dia BETWEEN ? AND ? ORDER BY dia", rango).fetchall()
+        total, unidades, facturas, margen = self.conexion.execute(
+            "SELECT COALESCE(SUM(total), 0), COALESCE(SUM(unidades), 0), COALESCE(SUM(facturas), 0), "
+            "COALESCE(SUM(total - costo), 0) FROM resumen_dias WHERE dia BETWEEN ? AND ?", rango).fetchone()
+        return filas, (total, unidades, facturas, margen)
+
+    def reporte_ventas(self, fecha_inicio, fecha_fin):
+        """Mismo formato que el reporte de AlmacenTexto, incluyendo días sin cierre de caja"""
+        ventas_filtradas = []
+        total_rango = 0.0
+        dias = self.conexion.execute(
+            "SELECT DISTINCT dia FROM ventas WHERE dia BETWEEN ? AND ? ORDER BY dia",
+            (fecha_inicio.strftime("%Y-%m-%d"), fecha_fin.strftime("%Y-%m-%d"))).fetchall()
+        for (dia,) in dias:
+            ventas, total_dia = self.ventas_del_dia(dia)
+            ventas_filtradas.extend(texto_cierre_caja(ventas, total_dia).splitlines(keepends=True))
+            ventas_filtradas.append("\n")
+            total_rango += total_dia
+        if ventas_filtradas:
+            ventas_filtradas.append(f"\nTotal de ventas del rango de fechas dado: ${total_rango:.2f}")
+        return ventas_filtradas
+
+    # Pedidos a domicilio
+    def agregar_pedido_domicilio(self, cliente, direccion, items):
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with transaccion(self.conexion) as con:
+            con.execute("INSERT INTO pedidos (texto) VALUES (?)",
+                        (texto_pedido_domicilio(cliente, direccion, items, fecha),))
+
+    def agendar_pedidos(self, cantidad=None, espera_max=None):
+        """Igual que AlmacenTexto.agendar_pedidos; la cola es la tabla pedidos (índice por estado)"""
+        cantidad = cantidad or config.PEDIDOS_POR_LOTE
+        if espera_max is None:
+            espera_max = config.ESPERA_MAX_LOTE_MIN * 60
+        with transaccion(self.conexion) as con:
+            pedidos = con.execute("SELECT id, texto FROM pedidos WHERE estado = 'en_cola' ORDER BY id LIMIT ?",
+                                  (max(cantidad, config.VENTANA_PEDIDOS),)).fetchall()
+            listos = lote_listo([texto for _, texto in pedidos], cantidad, espera_max)
+            if not listos:
+                return None
+            pedidos = [pedidos[indice] for indice in elegir_lote([texto for _, texto in pedidos], listos)]
+            numero = self._siguiente(con, "lote")
+            nombre_lote = f"pedido{numero}.txt"
+            contenido = ("\n" + SEPARADOR_VENTA + "\n").join(texto for _, texto in pedidos)
+            con.execute("INSERT INTO lotes (nombre, estado, contenido) VALUES (?, 'pendiente', ?)",
+                        (nombre_lote, contenido))
+            con.executemany("UPDATE pedidos SET estado = 'agendado', lote = ? WHERE id = ?",
+                            [(nombre_lote, id_pedido) for id_pedido, _ in pedidos])
+            self._siguiente(con, "cambios_lotes")
+        return nombre_lote
+
+    def lotes(self, estado, domiciliario=None):
+        if domiciliario is not None:
+            return [nombre for (nombre,) in self.conexion.execute(
+                "SELECT nombre FROM lotes WHERE estado = ? AND domiciliario = ? ORDER BY rowid", (estado, domiciliario))]
+        return [nombre for (nombre,) in self.conexion.execute(
+            "SELECT nombre FROM lotes WHERE estado = ? ORDER BY rowid", (estado,))]
+
+    def domiciliario_de(self, nombre_lote):
+        fila = self.conexion.execute("SELECT domiciliario FROM lotes WHERE nombre = ?", (nombre_lote,)).fetchone()
+        return None if fila is None else fila[0]
+
+    def leer_lote(self, nombre_lote, estado):
+        fila = self.conexion.execute("SELECT contenido FROM lotes WHERE nombre = ? AND estado = ?",
+                                     (nombre_lote, estado)).fetchone()
+        if fila is None:
+            raise FileNotFoundError(nombre_lote)  # Igual que AlmacenTexto
+        return fila[0]
+
+    def aceptar_lote(self, nombre_lote, domiciliario=None):
+        """Acepta el lote solo si sigue pendiente; si otro lo tomó primero lanza LoteTomado"""
+        with transaccion(self.conexion) as con:
+            cursor = con.execute("UPDATE lotes SET estado = 'aceptado', domiciliario = ? "
+                                 "WHERE nombre = ? AND estado = 'pendiente'", (domiciliario, nombre_lote))
+            if cursor.rowcount == 0:
+                raise LoteTomado(nombre_lote, self.domiciliario_de(nombre_lote))
+            self._siguiente(con, "cambios_lotes")
+
+    def entregar_lote(self, nombre_lote, domiciliario=None):
+        with transaccion(self.conexion) as con:
+            cursor = con.execute("UPDATE lotes SET estado = 'entregado', entregado = ? "
+                                 "WHERE nombre = ? AND estado = 'aceptado' AND domiciliario IS ?",
+                                 (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), nombre_lote, domiciliario))
+            if cursor.rowcount == 0:
+                raise FileNotFoundError(nombre_lote)
+            self._siguiente(con, "cambios_lotes")
+
+    def sello_inventario(self):
+        """Cambia cuando otra conexión guarda algo en la base (PRAGMA data_version)"""
+        return self.conexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def sello_ventas(self):
+        """Las ventas se consultan en la base cada vez: no hay nada que releer"""
+        return None
+
+    def releer_ventas(self):
+        pass
+
+    def sello_lotes(self, domiciliario=None):
+        """Contador de cambios de los lotes (una consulta por la clave primaria)"""
+        fila = self.conexion.execute("SELECT valor FROM contadores WHERE nombre = 'cambios_lotes'").fetchone()
+        return 0 if fila is None else fila[0]
+
+    def sello_lote(self, nombre_lote, estado):
+        """El contenido de un lote no cambia en la base: basta saber si sigue en ese estado"""
+        fila = self.conexion.execute("SELECT 1 FROM lotes WHERE nombre = ? AND estado = ?",
+                                     (nombre_lote, estado)).fetchone()
+        return None if fila is None else estado
+
+    def marcar_disponible(self, domiciliario, disponible=True):
+        with transaccion(self.conexion) as con:
+            if disponible:
+                con.execute("INSERT OR REPLACE INTO domiciliarios (usuario, visto) VALUES (?, ?)",
+                            (domiciliario, time.time()))
+            else:
+                con.execute("DELETE FROM domiciliarios WHERE usuario = ?", (domiciliario,))
+
+    def domiciliarios_disponibles(self):
+        limite = time.time() - config.DOMICILIARIO_INACTIVO_MIN * 60
+        return [usuario for (usuario,) in self.conexion.execute(
+            "SELECT usuario FROM domiciliarios WHERE visto >= ? ORDER BY usuario", (limite,))]
+
+    def cerrar(self):
+        self.conexiones.cerrar()
+
+
+def migrar(almacen, directorio=".", forzar=False):
+    """Copia los archivos de texto de la tienda a la base; devuelve un resumen por tabla"""
+    con = almacen.conexion
+    if not forzar:
+        for tabla in ("productos", "ventas", "pedidos", "lotes"):
+            if con.execute(f"SELECT 1 FROM {tabla} LIMIT 1").fetchone():
+                raise RuntimeError(f"La base ya tiene datos en '{tabla}'. Use --forzar para migrar de todos modos.")
+
+    resumen = {}
+    ruta = lambda nombre: os.path.join(directorio, nombre)
+
+    with transaccion(con):
+        # Inventario (incluye los cambios pendientes del diario)
+        inventario = Inventario(ruta("inventario.txt"))
+        con.executemany(
+            "INSERT OR REPLACE INTO productos (id, nombre, precio_compra, precio_venta, cantidad) VALUES (?, ?, ?, ?, ?)",
+            [(int(id_producto), p.nombre, p.precio_compra, p.precio_venta, p.cantidad)
+             for id_producto, p in inventario.productos.items() if id_producto.isdigit()])
+        inventario.cerrar()
+        resumen["productos"] = len(inventario.productos)
+
+        # Ventas
+        resumen["ventas"] = 0
+        costos = {p.nombre: p.precio_compra for p in inventario.productos.values()}
+        libro = LibroVentas(ruta("ventas"))
+        libro.convertir_si_hace_falta(ruta("ventas.txt"))
+        bloques = [bloque for dia in libro.dias() for bloque in libro.ventas_del_dia(dia)[0]]
+        for bloque in bloques:
+            venta = leer_venta_texto(bloque)
+            if venta is None:
+                continue
+            id_factura, fecha, descuento, total, items = venta
+            # El texto no guarda el precio de compra: se usa el actual del producto con ese nombre
+            items = [dict(item, precio_compra=costos.get(item['nombre'])) for item in items]
+            AlmacenSQLite._insertar_venta(con, id_factura, fecha, descuento, total, bloque.strip() + "\n", items)
+            resumen["ventas"] += 1
+
+        # Último número de factura
+        try:
+            with open(ruta("ultima_factura.txt"), "r", encoding="utf-8") as f:
+                ultima_factura = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            ultima_factura = 0
+        con.execute("INSERT OR REPLACE INTO contadores (nombre, valor) VALUES ('factura', ?)", (ultima_factura,))
+
+        # Pedidos a domicilio sin agendar (desde la cabeza de la cola)
+        cola = ColaPedidos(ruta("pedidosDom.txt"), (ruta("pedidos pendientes"), ruta("pedidos aceptados")))
+        pedidos = cola.primeros(float("inf"))
+        con.executemany("INSERT INTO pedidos (texto) VALUES (?)", [(p,) for p in pedidos])
+        resumen["pedidos"] = len(pedidos)
+
+        # Lotes pendientes y aceptados
+        ultimo_lote = cola.ultimo_lote() if cola.existe() else 0
+        resumen["lotes"] = 0
+        carpetas = [(ruta("pedidos pendientes"), "pendiente", None), (ruta("pedidos aceptados"), "aceptado", None)]
+        if os.path.isdir(ruta("pedidos aceptados")):
+            # Los aceptados por cada domiciliario están en su subcarpeta
+            carpetas += [(entrada.path, "aceptado", entrada.name)
+                         for entrada in os.scandir(ruta("pedidos aceptados")) if entrada.is_dir()]
+        for carpeta, estado, domiciliario in carpetas:
+            if not os.path.isdir(carpeta):
+                continue
+            for nombre in os.listdir(carpeta):
+                match = re.fullmatch(r"pedido(\d+)\.txt", nombre)
+                if not match:
+                    continue
+                with open(os.path.join(carpeta, nombre), "r", encoding="utf-8") as f:
+                    con.execute("INSERT OR REPLACE INTO lotes (nombre, estado, contenido, domiciliario) "
+                                "VALUES (?, ?, ?, ?)", (nombre, estado, f.read(), domiciliario))
+                ultimo_lote = max(ultimo_lote, int(match.group(1)))
+                resumen["lotes"] += 1
+        con.execute("INSERT OR REPLACE INTO contadores (nombre, valor) VALUES ('lote', ?)", (ultimo_lote,))
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Herramientas del almacenamiento SQLite.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_migrar = sub.add_parser("migrar", help="copia los archivos de texto actuales a la base")
+    p_migrar.add_argument("--db", default=config.RUTA_SQLITE, help="archivo de base de datos")
+    p_migrar.add_argument("--desde", default=".", help="carpeta con inventario.txt, ventas.txt, etc.")
+    p_migrar.add_argument("--forzar", action="store_true", help="migrar aunque la base ya tenga datos")
+    args = parser.parse_args(argv)
+
+    almacen = AlmacenSQLite(args.db)
+    try:
+        resumen = migrar(almacen, args.desde, args.forzar)
+    except RuntimeError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        almacen.cerrar()
+    for tabla, cantidad in resumen.items():
+        print(f"{tabla}: {cantidad}")
+    print(f"Migración completa en {args.db}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
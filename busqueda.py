@@ -0,0 +1,146 @@
+import bisect
+import threading
+import unicodedata
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes, para que "Melón" y "melon" coincidan"""
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusqueda:
+    """Índice de búsqueda por nombre e ID de producto, sin recorrer el inventario.
+
+    Las consultas de 3 letras o más se resuelven con un índice de trigramas
+    (cualquier parte del nombre); las de 1 o 2 letras buscan palabras que
+    empiecen así en una lista ordenada. Cada trigrama guarda sus IDs en un
+    dict, que conserva el orden del catálogo, así que la búsqueda puede
+    parar en cuanto junta `limite` resultados.
+
+    Se suscribe a los avisos del inventario y se actualiza en el lugar con
+    cada alta o baja. El índice se arma en un hilo aparte al crearlo; una
+    búsqueda que llegue antes espera a que termine.
+    """
+
+    def __init__(self, gestor_inventario, limite=500, en_el_loop=None):
+        """en_el_loop envuelve la suscripción a los avisos (ver Tareas.en_el_loop)"""
+        self.gestor_inventario = gestor_inventario
+        self.limite = limite
+        self._lock = threading.Lock()
+        self._listo = threading.Event()
+        self._textos = {}
+        self._trigramas = {}
+        self._palabras = []
+        gestor_inventario.suscribir(en_el_loop(self._cambio_inventario) if en_el_loop else self._cambio_inventario)
+        self._armar_en_segundo_plano()
+
+    def _armar_en_segundo_plano(self):
+        self._listo.clear()
+        threading.Thread(target=self._armar, daemon=True).start()
+
+    def _armar(self):
+        with self._lock:
+            productos = list(self.gestor_inventario.productos.items())
+            self._textos = {}
+            self._trigramas = {}
+            palabras = []
+            for id_producto, producto in productos:
+                palabras.extend(self._indexar(id_producto, producto.nombre))
+            palabras.sort()
+            self._palabras = palabras
+        self._listo.set()
+
+    def _indexar(self, id_producto, nombre):
+        """Agrega el producto a los trigramas y devuelve sus (palabra, id) para la lista ordenada"""
+        texto = normalizar(f"{id_producto} {nombre}")
+        self._textos[id_producto] = texto
+        trigramas = self._trigramas
+        for trigrama in _trigramas(texto):
+            ids = trigramas.get(trigrama)
+            if ids is None:
+                trigramas[trigrama] = {id_producto: None}
+            else:
+                ids[id_producto] = None
+        return [(palabra, id_producto) for palabra in set(texto.split())]
+
+    def _quitar(self, id_producto):
+        texto = self._textos.pop(id_producto, None)
+        if texto is None:
+            return
+        for trigrama in _trigramas(texto):
+            ids = self._trigramas.get(trigrama)
+            if ids is not None:
+                ids.pop(id_producto, None)
+                if not ids:
+                    del self._trigramas[trigrama]
+        for palabra in set(texto.split()):
+            posicion = bisect.bisect_left(self._palabras, (palabra, id_producto))
+            if posicion < len(self._palabras) and self._palabras[posicion] == (palabra, id_producto):
+                del self._palabras[posicion]
+
+    def _cambio_inventario(self, cambios):
+        productos = self.gestor_inventario.productos
+        for evento, id_producto in cambios:
+            if evento == "carga":
+                self._armar_en_segundo_plano()
+                return
+        with self._lock:
+            for evento, id_producto in cambios:
+                self._quitar(id_producto)
+                # El aviso puede llegar tarde (en el loop): se indexa lo que hay ahora
+                producto = productos.get(id_producto)
+                if evento == "alta" and producto is not None:
+                    for entrada in self._indexar(id_producto, producto.nombre):
+                        bisect.insort(self._palabras, entrada)
+
+    def buscar(self, consulta):
+        """IDs que coinciden con la consulta, en el orden del catálogo (como mucho self.limite).
+
+        Devuelve None si la consulta está vacía (no hay filtro).
+        """
+        consulta = normalizar(consulta.strip())
+        if not consulta:
+            return None
+        self._listo.wait()
+        with self._lock:
+            if len(consulta) < 3:
+                return self._buscar_prefijo(consulta)
+            return self._buscar_trigramas(consulta)
+
+    def _buscar_prefijo(self, consulta):
+        encontrados = {}
+        palabras = self._palabras
+        posicion = bisect.bisect_left(palabras, (consulta,))
+        while posicion < len(palabras) and len(encontrados) < self.limite:
+            palabra, id_producto = palabras[posicion]
+            if not palabra.startswith(consulta):
+                break
+            encontrados[id_producto] = None
+            posicion += 1
+        return list(encontrados)
+
+    def _buscar_trigramas(self, consulta):
+        conjuntos = []
+        for trigrama in _trigramas(consulta):
+            ids = self._trigramas.get(trigrama)
+            if not ids:
+                return []
+            conjuntos.append(ids)
+        conjuntos.sort(key=len)
+        menor, resto = conjuntos[0], conjuntos[1:]
+
+        encontrados = []
+        for id_producto in menor:
+            # Los trigramas pueden aparecer en desorden: se confirma que el texto contenga la consulta
+            if all(id_producto in ids for ids in resto) and (not resto or consulta in self._textos[id_producto]):
+                encontrados.append(id_producto)
+                if len(encontrados) >= self.limite:
+                    break
+        return encontrados
@@ -0,0 +1,282 @@
+"""Almacén de una terminal conectada al servidor (ver servidor.py).
+
+Con TIENDA_ALMACEN=servidor, abrir_almacen() devuelve un AlmacenRemoto:
+las mismas operaciones que AlmacenTexto y AlmacenSQLite, pero cada una es
+un pedido al servidor por el socket config.RUTA_SOCKET. Los errores vuelven
+con su tipo (StockInsuficiente, LoteTomado, KeyError...), así que las
+vistas no cambian.
+
+El inventario es una copia en memoria: el servidor manda los productos que
+cambian (de cualquier terminal) y un hilo los deja en cola; releer() los
+aplica y avisa a los suscriptores desde el hilo que lo llama, el del loop
+(ServicioDatos lo hace cuando cambia el sello, o la misma terminal justo
+después de una operación suya). Solo funciona en sistemas con sockets Unix.
+"""
+import itertools
+import json
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import config
+from almacen import LoteTomado
+from inventario import AvisosInventario, Producto, StockInsuficiente
+from lineas import LineasTexto
+
+# Errores que se vuelven a lanzar con su tipo en la terminal
+ERRORES = {error.__name__: error for error in (StockInsuficiente, KeyError, ValueError, FileNotFoundError)}
+
+
+class Conexion:
+    """Socket al servidor: pedidos numerados y un hilo que lee respuestas y avisos"""
+
+    def __init__(self, ruta_socket, al_avisar):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(ruta_socket)
+        self._al_avisar = al_avisar
+        self._ids = itertools.count(1)
+        self._esperando = {}  # id -> Future
+        self._lock = threading.Lock()
+        self._cerrada = False
+        self._lector = threading.Thread(target=self._leer, name="conexion-almacen", daemon=True)
+        self._lector.start()
+
+    def pedir(self, operacion, *argumentos):
+        """Manda un pedido y espera la respuesta; lanza el error del servidor si lo hubo"""
+        futuro = Future()
+        with self._lock:
+            if self._cerrada:
+                raise ConnectionError("Sin conexión con el servidor del almacén")
+            id_pedido = next(self._ids)
+            self._esperando[id_pedido] = futuro
+            mensaje = {"id": id_pedido, "op": operacion, "args": argumentos}
+            self._socket.sendall(json.dumps(mensaje, ensure_ascii=False).encode("utf-8") + b"\n")
+        return futuro.result()
+
+    def _leer(self):
+        try:
+            for linea in self._socket.makefile("rb"):
+                mensaje = json.loads(linea)
+                if "aviso" in mensaje:
+                    self._al_avisar(mensaje)
+                    continue
+                futuro = self._esperando.pop(mensaje["id"], None)
+                if futuro is None:
+                    continue
+                if "error" in mensaje:
+                    futuro.set_exception(_error(mensaje))
+                else:
+                    futuro.set_result(mensaje.get("ok"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            # Se cortó: los que esperan no van a tener respuesta
+            with self._lock:
+                self._cerrada = True
+                esperando, self._esperando = self._esperando, {}
+            for futuro in esperando.values():
+                futuro.set_exception(ConnectionError("Se cortó la conexión con el servidor del almacén"))
+
+    def cerrar(self):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._lector.join()
+
+
+def _error(mensaje):
+    """Reconstruye la excepción que mandó el servidor"""
+    nombre, argumentos = mensaje["error"], mensaje.get("args", [])
+    if nombre == "LoteTomado":
+        return LoteTomado(*argumentos[:1], mensaje.get("domiciliario"))
+    if nombre in ERRORES:
+        return ERRORES[nombre](*argumentos)
+    return RuntimeError(f"{nombre}: {', '.join(argumentos)}")
+
+
+def _en_el_loop():
+    return threading.current_thread() is threading.main_thread()
+
+
+class InventarioRemoto(AvisosInventario):
+    """Copia del inventario del servidor, con la misma interfaz que Inventario"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.productos = {}
+        self.recibidos = 0  # Sello: avisos llegados del servidor
+        self._mensajes = deque()
+
+    def recibir(self, mensaje):
+        """Llamado desde el hilo de la conexión: solo se deja en cola"""
+        self._mensajes.append(mensaje)
+        self.recibidos += 1
+
+    def cargar(self):
+        """Pide el catálogo completo al servidor"""
+        self._mensajes.clear()
+        self.productos = {id_producto: Producto(*datos)
+                          for id_producto, datos in self.conexion.pedir("productos").items()}
+        self._avisar([("carga", None)])
+
+    def releer(self):
+        """Aplica los cambios que mandó el servidor y avisa; devuelve True si hubo alguno"""
+        cambios = []
+        while self._mensajes:
+            mensaje = self._mensajes.popleft()
+            if "carga" in mensaje:
+                self.productos = {id_producto: Producto(*datos) for id_producto, datos in mensaje["carga"].items()}
+                cambios.append(("carga", None))
+                continue
+            for id_producto, (nombre, precio_compra, precio_venta, cantidad) in mensaje["productos"].items():
+                producto = self.productos.get(id_producto)
+                if producto is None:
+                    self.productos[id_producto] = Producto(nombre, precio_compra, precio_venta, cantidad)
+                    cambios.append(("alta", id_producto))
+                    continue
+                if (producto.nombre, producto.precio_venta) != (nombre, precio_venta):
+                    cambios.append(("precio", id_producto))
+                if producto.cantidad != cantidad:
+                    cambios.append(("stock", id_producto))
+                producto.nombre, producto.precio_compra = nombre, precio_compra
+                producto.precio_venta, producto.cantidad = precio_venta, cantidad
+            for id_producto in mensaje["bajas"]:
+                if self.productos.pop(id_producto, None) is not None:
+                    cambios.append(("baja", id_producto))
+        if cambios:
+            self._avisar(list(dict.fromkeys(cambios)))
+        return bool(cambios)
+
+    def _pedir(self, operacion, *argumentos):
+        resultado = self.conexion.pedir("inventario." + operacion, *argumentos)
+        # El aviso del servidor llega antes que la respuesta: la pantalla se actualiza ya
+        if _en_el_loop():
+            self.releer()
+        return resultado
+
+    def agregar(self, nombre, precio_compra, precio_venta, cantidad):
+        return self._pedir("agregar", nombre, precio_compra, precio_venta, cantidad)
+
+    def borrar(self, id_producto):
+        self._pedir("borrar", id_producto)
+
+    def fijar_precio_venta(self, id_producto, precio_venta):
+        self._pedir("fijar_precio_venta", id_producto, precio_venta)
+
+    def ajustar_cantidades(self, cambios):
+        self._pedir("ajustar_cantidades", cambios)
+
+    def ajustar_cantidad(self, id_producto, diferencia):
+        self.ajustar_cantidades({id_producto: diferencia})
+
+    def importar_pedido(self, lineas):
+        agregados, actualizados, errores = self._pedir("importar_pedido", list(lineas))
+        return agregados, actualizados, [tuple(error) for error in errores]
+
+    def sincronizar(self):
+        pass  # Lo hace el servidor
+
+    def cerrar(self):
+        pass
+
+
+def _operacion(nombre, cambia_inventario=False):
+    """Método de AlmacenRemoto que manda la operación `nombre` al servidor"""
+    def metodo(self, *argumentos):
+        resultado = self.conexion.pedir(nombre, *argumentos)
+        if cambia_inventario and _en_el_loop():
+            self.inventario.releer()
+        return resultado
+    metodo.__name__ = nombre
+    return metodo
+
+
+class AlmacenRemoto:
+    """Mismas operaciones que AlmacenTexto, atendidas por el servidor del almacén"""
+
+    def __init__(self, ruta_socket=None):
+        self._cambios_lotes = 0
+        self.inventario = InventarioRemoto(None)
+        # Los avisos pueden llegar apenas se conecta: el inventario ya tiene que existir
+        self.conexion = self.inventario.conexion = Conexion(ruta_socket or config.RUTA_SOCKET, self._aviso)
+        self.inventario.cargar()
+
+    def _aviso(self, mensaje):
+        if mensaje["aviso"] == "inventario":
+            self.inventario.recibir(mensaje)
+        elif mensaje["aviso"] == "lotes":
+            self._cambios_lotes += 1
+
+    # Ventas
+    confirmar_venta = _operacion("confirmar_venta", cambia_inventario=True)
+    registrar_venta = _operacion("registrar_venta")
+    factura = _operacion("factura")
+    facturas_entre = _operacion("facturas_entre")
+
+    def confirmar_ventas(self, ventas, por_grupo=1000):
+        """Como AlmacenTexto.confirmar_ventas, mandando las ventas al servidor de a grupos"""
+        ventas = list(ventas)
+        resultados = []
+        for inicio in range(0, len(ventas), por_grupo):
+            for resultado in self.conexion.pedir("confirmar_ventas", ventas[inicio:inicio + por_grupo]):
+                if isinstance(resultado, list):
+                    resultado = _error({"error": resultado[0], "args": resultado[1]})
+                resultados.append(resultado)
+        if _en_el_loop():
+            self.inventario.releer()
+        return resultados
+
+    def ventas_del_dia(self, fecha):
+        ventas, total = self.conexion.pedir("ventas_del_dia", fecha)
+        return ventas, total
+
+    def ubicar_factura(self, id_factura):
+        ubicacion = self.conexion.pedir("ubicar_factura", id_factura)
+        return None if ubicacion is None else tuple(ubicacion)
+
+    def partes_ventas(self):
+        """[(dia, abrir)] como AlmacenTexto; abrir() trae las líneas de ese día del servidor"""
+        return [(dia, lambda dia=dia: LineasTexto(self.conexion.pedir("lineas_dia", dia)))
+                for dia in self.conexion.pedir("dias_ventas")]
+
+    def resumen_ventas(self, fecha_inicio, fecha_fin):
+        filas, totales = self.conexion.pedir("resumen_ventas", fecha_inicio.strftime("%Y-%m-%d"),
+                                             fecha_fin.strftime("%Y-%m-%d"))
+        return [tuple(fila) for fila in filas], tuple(totales)
+
+    def reporte_ventas(self, fecha_inicio, fecha_fin):
+        return self.conexion.pedir("reporte_ventas", fecha_inicio.strftime("%Y-%m-%d"),
+                                   fecha_fin.strftime("%Y-%m-%d"))
+
+    # Pedidos a domicilio
+    agregar_pedido_domicilio = _operacion("agregar_pedido_domicilio")
+    agendar_pedidos = _operacion("agendar_pedidos")
+    lotes = _operacion("lotes")
+    domiciliario_de = _operacion("domiciliario_de")
+    leer_lote = _operacion("leer_lote")
+    aceptar_lote = _operacion("aceptar_lote")
+    entregar_lote = _operacion("entregar_lote")
+    sello_lote = _operacion("sello_lote")
+    marcar_disponible = _operacion("marcar_disponible")
+    domiciliarios_disponibles = _operacion("domiciliarios_disponibles")
+
+    def sello_inventario(self):
+        """Cambia con cada aviso de inventario que manda el servidor (sin preguntarle nada)"""
+        return self.inventario.recibidos
+
+    def sello_ventas(self):
+        """Las ventas se piden al servidor cada vez: no hay nada que releer"""
+        return None
+
+    def releer_ventas(self):
+        pass
+
+    def sello_lotes(self, domiciliario=None):
+        """Cambia cada vez que el servidor avisa que se agendó, aceptó o entregó un lote"""
+        return self._cambios_lotes
+
+    def cerrar(self):
+        self.conexion.cerrar()
@@ -0,0 +1,218 @@
+"""Cola de pedidos a domicilio guardada en disco.
+
+pedidosDom.txt conserva el formato de siempre (un bloque por pedido y el
+separador) pero ya no se reescribe al agendar: los pedidos nuevos se
+agregan al final y pedidosDom.cabeza guarda
+
+    posicion: ultimo_lote
+
+    tomados: 5120 6144
+
+la posición en bytes del primer pedido sin agendar y el último número de
+lote usado. Agendar un lote lee solo una ventana de pedidos a partir de
+la cabeza y avanza la posición, sin importar cuántos pedidos haya
+esperando detrás. Si el lote no se arma con los primeros de la ventana
+(ver rutas.py, que junta pedidos cercanos), la segunda línea anota dónde
+empiezan los pedidos que ya salieron más adelante; esos se saltan al leer
+y la cabeza los pasa de largo cuando le llegan. Cuando la parte ya
+agendada ocupa más de la mitad del archivo, se copia el resto a un
+archivo nuevo.
+
+Todo se hace con el archivo bloqueado (ver numeracion.py), así varias
+cajas pueden encolar y agendar a la vez.
+"""
+import os
+import re
+from datetime import datetime
+
+from libro_ventas import SEPARADOR_VENTA
+from numeracion import archivo_bloqueado
+
+_FIN_PEDIDO = (SEPARADOR_VENTA + "\n").encode("utf-8")
+_PATRON_LOTE = re.compile(r"pedido(\d+)\.txt")
+_COMPACTAR_DESDE = 64 * 1024  # No vale la pena copiar el archivo por menos que esto
+
+
+def fecha_pedido(texto):
+    """Cuándo se encoló un pedido (línea "Fecha: "), o None en los pedidos anteriores a la cola"""
+    for linea in texto.splitlines():
+        if linea.startswith("Fecha: "):
+            try:
+                return datetime.strptime(linea[7:].strip(), "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                return None
+    return None
+
+
+def lote_listo(pedidos, cantidad, espera_max, ahora=None):
+    """Cuántos de los primeros pedidos forman lote: `cantidad` si ya están, o los que
+    haya si el más viejo esperó más de `espera_max` segundos (0 si todavía no)"""
+    if len(pedidos) >= cantidad:
+        return cantidad
+    if not pedidos or espera_max is None:
+        return 0
+    encolado = fecha_pedido(pedidos[0])
+    if encolado is None:
+        return len(pedidos)  # Sin fecha: viene de antes de la cola, ya esperó bastante
+    ahora = ahora or datetime.now()
+    return len(pedidos) if (ahora - encolado).total_seconds() >= espera_max else 0
+
+
+class ColaPedidos:
+    """Pedidos en orden de llegada con la cabeza guardada en disco (ver el comentario del módulo)"""
+
+    def __init__(self, ruta="pedidosDom.txt", carpetas_lotes=()):
+        self.ruta = ruta
+        self.ruta_cabeza = os.path.splitext(ruta)[0] + ".cabeza"
+        self.ruta_bloqueo = ruta + ".lock"
+        self.carpetas_lotes = carpetas_lotes  # Para seguir la numeración de los lotes que ya existen
+
+    def existe(self):
+        return os.path.exists(self.ruta)
+
+    def agregar(self, texto):
+        """Encola un pedido (texto sin separador)"""
+        datos = texto.rstrip("\n").encode("utf-8") + b"\n" + _FIN_PEDIDO
+        with archivo_bloqueado(self.ruta_bloqueo):
+            with open(self.ruta, "ab") as f:
+                f.write(datos)
+
+    def _leer_cabeza(self):
+        """(posicion, ultimo_lote, tomados)"""
+        try:
+            with open(self.ruta_cabeza, "r", encoding="utf-8") as f:
+                lineas = f.read().splitlines()
+        except FileNotFoundError:
+            lineas = None
+        if lineas:
+            partes = [int(parte) for parte in lineas[0].strip().split(": ")]
+            tomados = set()
+            if len(lineas) > 1 and lineas[1].startswith("tomados:"):
+                tomados = {int(parte) for parte in lineas[1][8:].split()}
+            if len(partes) == 4:
+                # Se cortó a mitad de una compactación: vale la posición del archivo que haya quedado
+                # (los tomados están anotados con las posiciones del archivo viejo)
+                posicion, ultimo_lote, archivo_nuevo, posicion_vieja = partes
+                if os.stat(self.ruta).st_ino != archivo_nuevo:
+                    return posicion_vieja, ultimo_lote, tomados
+                return posicion, ultimo_lote, {tomado - posicion_vieja for tomado in tomados}
+            return partes[0], partes[1], tomados
+
+        # Primera vez: se sigue después del último pedidoN.txt que haya en las carpetas
+        ultimo_lote = 0
+        for carpeta in self.carpetas_lotes:
+            if os.path.isdir(carpeta):
+                for archivo in os.listdir(carpeta):
+                    match = _PATRON_LOTE.fullmatch(archivo)
+                    if match:
+                        ultimo_lote = max(ultimo_lote, int(match.group(1)))
+        return 0, ultimo_lote, set()
+
+    def _guardar_cabeza(self, *partes, tomados=()):
+        temporal = self.ruta_cabeza + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(": ".join(str(parte) for parte in partes) + "\n")
+            if tomados:
+                f.write("tomados: " + " ".join(str(tomado) for tomado in sorted(tomados)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_cabeza)
+
+    def _leer_desde(self, posicion, cantidad, tomados=()):
+        """Hasta `cantidad` pedidos a partir de `posicion`, sin contar los tomados.
+
+        Devuelve los bloques recorridos como (inicio, fin, texto), con texto
+        None en los que ya se tomaron o están vacíos.
+        """
+        bloques = []
+        encontrados = 0
+        with open(self.ruta, "rb") as f:
+            f.seek(posicion)
+            resto = b""
+            while encontrados < cantidad:
+                datos = f.read(16 * 1024)
+                if not datos:
+                    break
+                resto += datos
+                while encontrados < cantidad:
+                    fin = resto.find(_FIN_PEDIDO)
+                    if fin < 0:
+                        break
+                    bloque = resto[:fin]
+                    resto = resto[fin + len(_FIN_PEDIDO):]
+                    inicio, posicion = posicion, posicion + fin + len(_FIN_PEDIDO)
+                    texto = None
+                    if inicio not in tomados and bloque.strip():
+                        texto = bloque.decode("utf-8", errors="replace").strip()
+                        encontrados += 1
+                    bloques.append((inicio, posicion, texto))
+        return bloques
+
+    def primeros(self, cantidad):
+        """Los primeros pedidos sin agendar (sin sacarlos de la cola)"""
+        if not self.existe():
+            return []
+        posicion, _, tomados = self._leer_cabeza()
+        return [texto for _, _, texto in self._leer_desde(posicion, cantidad, tomados) if texto is not None]
+
+    def ultimo_lote(self):
+        """Número del último lote agendado"""
+        return self._leer_cabeza()[1]
+
+    def sacar_lote(self, cantidad, espera_max=None, escribir_lote=None, ventana=None, elegir=None):
+        """Saca el próximo lote de la cola.
+
+        Con `cantidad` pedidos esperando (o menos, si el más viejo esperó
+        más de `espera_max` segundos) llama a escribir_lote(numero, pedidos)
+        con el número de lote siguiente y después avanza la cabeza. Devuelve
+        (numero, pedidos) o None si todavía no hay lote. Lanza
+        FileNotFoundError si nunca se encoló un pedido.
+
+        Con elegir, el lote no son los primeros: se leen hasta `ventana`
+        pedidos y elegir(textos, cantidad) devuelve cuáles van (índices, en
+        el orden en que quedan en el lote).
+        """
+        if not self.existe():
+            raise FileNotFoundError(self.ruta)
+        with archivo_bloqueado(self.ruta_bloqueo):
+            posicion, ultimo_lote, tomados = self._leer_cabeza()
+            leer = max(cantidad, ventana or 0) if elegir is not None else cantidad
+            bloques = self._leer_desde(posicion, leer, tomados)
+            disponibles = [(inicio, texto) for inicio, _, texto in bloques if texto is not None]
+            textos = [texto for _, texto in disponibles]
+            listos = lote_listo(textos, cantidad, espera_max)
+            if not listos:
+                return None
+            elegidos = range(listos) if elegir is None else elegir(textos, listos)
+            pedidos = [textos[indice] for indice in elegidos]
+            numero = ultimo_lote + 1
+            # Si se corta acá, el lote se vuelve a escribir con el mismo número y los mismos pedidos
+            if escribir_lote is not None:
+                escribir_lote(numero, pedidos)
+
+            # La cabeza pasa de largo todo lo que ya salió a partir de ella
+            tomados = tomados | {disponibles[indice][0] for indice in elegidos}
+            for inicio, fin, texto in bloques:
+                if inicio != posicion or (texto is not None and inicio not in tomados):
+                    break
+                tomados.discard(inicio)
+                posicion = fin
+            self._guardar_cabeza(posicion, numero, tomados=tomados)
+            self._tal_vez_compactar(posicion, numero, tomados)
+        return numero, pedidos
+
+    def _tal_vez_compactar(self, posicion, ultimo_lote, tomados=()):
+        """Copia los pedidos sin agendar a un archivo nuevo (con el archivo ya bloqueado)"""
+        tamano = os.path.getsize(self.ruta)
+        if posicion < _COMPACTAR_DESDE or posicion * 2 < tamano:
+            return
+        temporal = self.ruta + ".tmp"
+        with open(self.ruta, "rb") as origen, open(temporal, "wb") as destino:
+            origen.seek(posicion)
+            destino.write(origen.read())
+            destino.flush()
+            os.fsync(destino.fileno())
+        # La cabeza anota las dos posiciones hasta que el archivo nuevo quede en su lugar
+        self._guardar_cabeza(0, ultimo_lote, os.stat(temporal).st_ino, posicion, tomados=tomados)
+        os.replace(temporal, self.ruta)
+        self._guardar_cabeza(0, ultimo_lote, tomados={tomado - posicion for tomado in tomados})
@@ -0,0 +1,62 @@
+import os
+
+# Configuración general de la tienda. Cada valor se puede cambiar con una
+# variable de entorno sin tocar el código.
+
+# Dónde se guardan los datos: "texto" (archivos .txt de siempre), "sqlite" o
+# "servidor" (otro proceso tiene el almacén y las terminales le piden todo,
+# ver servidor.py)
+ALMACEN = os.environ.get("TIENDA_ALMACEN", "texto")
+
+# Socket Unix del servidor del almacén
+RUTA_SOCKET = os.environ.get("TIENDA_SOCKET", "tienda.sock")
+
+# Archivo de base de datos usado cuando ALMACEN = "sqlite"
+RUTA_SQLITE = os.environ.get("TIENDA_SQLITE", "tienda.db")
+
+# Milisegundos que espera una venta antes del fsync de transacciones.log para
+# que otras ventas que llegan al mismo tiempo compartan el mismo fsync
+ESPERA_GRUPO_MS = float(os.environ.get("TIENDA_ESPERA_GRUPO_MS", "0"))
+
+# Cuántos números de factura toma cada caja de una vez (ver numeracion.py)
+BLOQUE_FACTURAS = int(os.environ.get("TIENDA_BLOQUE_FACTURAS", "50"))
+
+# Recibo de las ventas de mostrador: "pdf" (factura en PDF, como las de
+# domicilio), "texto" (ticket de ancho fijo) o "escpos" (bytes para una
+# impresora térmica). Ver tiquete.py
+MODO_RECIBO = os.environ.get("TIENDA_MODO_RECIBO", "pdf")
+
+# Archivo o dispositivo donde se agregan los recibos (por ejemplo /dev/usb/lp0 o LPT1)
+RUTA_RECIBO = os.environ.get("TIENDA_RUTA_RECIBO", "recibos.txt")
+
+# Caracteres por línea del recibo (42 para papel de 80 mm, 32 para 58 mm)
+ANCHO_RECIBO = int(os.environ.get("TIENDA_ANCHO_RECIBO", "42"))
+
+# Pedidos a domicilio por lote, y minutos que puede esperar el pedido más
+# viejo antes de que se agende un lote más chico (ver cola_pedidos.py)
+PEDIDOS_POR_LOTE = int(os.environ.get("TIENDA_PEDIDOS_POR_LOTE", "5"))
+ESPERA_MAX_LOTE_MIN = float(os.environ.get("TIENDA_ESPERA_MAX_LOTE_MIN", "30"))
+
+# Pedidos de la cola entre los que se buscan los más cercanos al más viejo
+# para armar un lote, y dirección de la tienda, de donde sale el
+# domiciliario (vacía: el recorrido empieza en el pedido más viejo). Ver rutas.py
+VENTANA_PEDIDOS = int(os.environ.get("TIENDA_VENTANA_PEDIDOS", "200"))
+DIRECCION_TIENDA = os.environ.get("TIENDA_DIRECCION", "")
+
+# Estimación del tiempo de un lote para repartirlos entre los domiciliarios
+# (ver reparto.py), y minutos sin actividad después de los cuales un
+# domiciliario deja de contar como disponible
+MINUTOS_POR_CUADRA = float(os.environ.get("TIENDA_MINUTOS_POR_CUADRA", "0.5"))
+MINUTOS_POR_PARADA = float(os.environ.get("TIENDA_MINUTOS_POR_PARADA", "5"))
+DOMICILIARIO_INACTIVO_MIN = float(os.environ.get("TIENDA_DOMICILIARIO_INACTIVO_MIN", "60"))
+
+# Cada cuántos segundos se revisa si otra terminal cambió el inventario o los
+# lotes de pedidos (ver servicio.py)
+REVISAR_CAMBIOS_S = float(os.environ.get("TIENDA_REVISAR_CAMBIOS_S", "1"))
+
+# Tiempos de los botones y operaciones con archivos de las pantallas (ver
+# metricas.py): "0" los apaga. El resumen se agrega cada VOLCAR_METRICAS_S
+# segundos a RUTA_METRICAS
+METRICAS = os.environ.get("TIENDA_METRICAS", "1") != "0"
+RUTA_METRICAS = os.environ.get("TIENDA_RUTA_METRICAS", "metricas.jsonl")
+VOLCAR_METRICAS_S = float(os.environ.get("TIENDA_VOLCAR_METRICAS_S", "60"))
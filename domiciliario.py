@@ -1,37 +1,51 @@
+import time
+
 import urwid
-import os
 
+import metricas
+from almacen import LoteTomado
+from indice_lotes import IndiceLotes
+from reparto import plan_reparto
+
+@metricas.instrumentar
 class DomiciliarioView(urwid.WidgetWrap):
     def __init__(self, main):
         self.main = main
-        self.carpeta_pedidos = "pedidos pendientes"  # Carpeta donde se guardan los pedidos pendientes
-        self.carpeta_aceptados = "pedidos aceptados"  # Carpeta donde se guardan los pedidos aceptados
+        self.almacen = main.servicio.almacen  # Texto o SQLite, según config.py (ver servicio.py)
+        self.usuario = main.usuario or "domiciliario"
+        self.almacen.marcar_disponible(self.usuario)
         self.direcciones_aceptadas = []  # Lista para almacenar direcciones de pedidos aceptados
-
-        # Crear la carpeta de pedidos aceptados si no existe
-        if not os.path.exists(self.carpeta_aceptados):
-            os.makedirs(self.carpeta_aceptados)
+        self.sugeridos = []  # Lotes que el reparto le sugiere a este domiciliario
+        self.minutos = {}    # Minutos estimados de cada lote pendiente
+        self.mensaje = urwid.Text("", align='center')
+        self.indice = IndiceLotes(self.almacen, self.usuario)
+        self._vigilados = []
 
         # Cargar los pedidos pendientes y aceptados
-        self.pedidos_pendientes = self.cargar_pedidos(self.carpeta_pedidos)
-        self.pedidos_aceptados = self.cargar_pedidos(self.carpeta_aceptados)
+        self.indice.revisar()
+        self.pedidos_pendientes = self.cargar_pedidos("pendiente")
+        self.pedidos_aceptados = self.cargar_pedidos("aceptado")
 
-        # Crear botones para pedidos pendientes y aceptados
-        self.botones_pendientes = self.crear_botones(self.pedidos_pendientes, self.mostrar_pedido)
-        self.botones_aceptados = self.crear_botones(self.pedidos_aceptados, self.mostrar_pedido_aceptado)
+        # Crear botones para pedidos pendientes y aceptados (nombre -> botón, para tocar solo los que cambian)
+        self.botones_pendientes = dict(zip(self.pedidos_pendientes,
+                                           self.crear_botones(self.pedidos_pendientes, self.mostrar_pedido)))
+        self.botones_aceptados = dict(zip(self.pedidos_aceptados,
+                                          self.crear_botones(self.pedidos_aceptados, self.mostrar_pedido_aceptado)))
 
         # Diseño de la interfaz
-        self.pedidos_pendientes_frame = urwid.LineBox(urwid.Pile([
+        self.lista_pendientes = urwid.Pile([
             urwid.Text("Pedidos Pendientes", align='center'),
             urwid.Divider(),
-            *self.botones_pendientes
-        ]))
+            *self.botones_pendientes.values()
+        ])
+        self.pedidos_pendientes_frame = urwid.LineBox(self.lista_pendientes)
 
-        self.pedidos_aceptados_frame = urwid.LineBox(urwid.Pile([
+        self.lista_aceptados = urwid.Pile([
             urwid.Text("Pedidos Aceptados", align='center'),
             urwid.Divider(),
-            *self.botones_aceptados
-        ]))
+            *self.botones_aceptados.values()
+        ])
+        self.pedidos_aceptados_frame = urwid.LineBox(self.lista_aceptados)
 
         columns = urwid.Columns([
             ('weight', 1, self.pedidos_pendientes_frame),
@@ -40,38 +54,78 @@ class DomiciliarioView(urwid.WidgetWrap):
 
         pile = urwid.Pile([
             urwid.Divider(),
-            urwid.Text("Menú de Domiciliario", align='center'),
+            urwid.Text(f"Menú de Domiciliario ({self.usuario})", align='center'),
             urwid.Divider(),
             columns,
             urwid.Divider(),
+            self.mensaje,
             urwid.Button("Salir", on_press=self.salir)
         ])
 
         super().__init__(urwid.Filler(pile, valign='top'))
-
-    def cargar_pedidos(self, carpeta):
-        """Carga los nombres de los archivos de pedidos en la carpeta especificada."""
-        if not os.path.exists(carpeta):
-            return []  # Si la carpeta no existe, no hay pedidos
-
-        # Obtener todos los archivos que comienzan con "pedido" y terminan con ".txt"
-        pedidos = [f for f in os.listdir(carpeta) if f.startswith("pedido") and f.endswith(".txt")]
-        return pedidos
+        self._vigilar()
+
+    @metricas.medido()
+    def cargar_pedidos(self, estado):
+        """Nombres de los lotes de pedidos en el estado indicado ('pendiente' o 'aceptado'), según el índice.
+
+        Los aceptados son solo los de este domiciliario. Los pendientes van
+        con los que le sugiere el reparto primero (ver reparto.py).
+        """
+        if estado == "aceptado":
+            return list(self.indice.lotes["aceptado"])
+        plan, self.minutos = plan_reparto(self.almacen, incluir=[self.usuario],
+                                          pendientes=self.indice.lotes["pendiente"])
+        self.sugeridos = plan.get(self.usuario, [])
+        otros = [lote for lote in self.indice.lotes["pendiente"] if lote not in self.sugeridos]
+        return self.sugeridos + otros
+
+    def etiqueta(self, pedido):
+        etiqueta = f"Pedido: {pedido}"
+        if pedido in self.minutos:
+            etiqueta += f" (~{self.minutos[pedido]:.0f} min)"
+        if pedido in self.sugeridos:
+            etiqueta += " - sugerido"
+        return etiqueta
 
     def crear_botones(self, pedidos, callback):
         """Crea botones para los pedidos."""
         botones = []
         for pedido in pedidos:
-            boton = urwid.Button(f"Pedido: {pedido}", on_press=callback, user_data=pedido)
+            boton = urwid.Button(self.etiqueta(pedido), on_press=callback, user_data=pedido)
             botones.append(boton)
         return botones
 
+    def _vigilar(self):
+        """Pide al servicio de datos que avise cuando cambien los lotes, y cada minuto para renovar la marca"""
+        servicio = self.main.servicio
+        for clave in self._vigilados:
+            servicio.dejar_de_vigilar(clave)
+        self._vigilados = [
+            servicio.vigilar(lambda: self.almacen.sello_lotes(self.usuario), self._revisar),
+            servicio.vigilar(lambda: int(time.monotonic() // 60),
+                             lambda: self.almacen.marcar_disponible(self.usuario)),  # Sigue trabajando (ver reparto.py)
+        ]
+
+    @metricas.medido()
+    def _revisar(self):
+        """Cambiaron los lotes: actualiza solo los botones afectados"""
+        if self.indice.revisar():
+            self.actualizar_interfaz()
+
+    def reanudar(self):
+        """Vuelve a mostrar la pantalla guardada desde el login anterior, al día"""
+        self.almacen.marcar_disponible(self.usuario)
+        self.mensaje.set_text("")
+        self.indice.revisar(forzar=True)
+        self.actualizar_interfaz()
+        self._vigilar()
+        self.main.loop.widget = self
+
     def mostrar_pedido(self, button, nombre_pedido):
         """Muestra el contenido del pedido pendiente en un recuadro emergente."""
-        ruta_pedido = os.path.join(self.carpeta_pedidos, nombre_pedido)
         try:
-            with open(ruta_pedido, "r", encoding="utf-8") as f:
-                contenido = f.read()
+            contenido = self.indice.contenido(nombre_pedido, "pendiente")[0]
         except FileNotFoundError:
             contenido = "El pedido no pudo ser cargado."
 
@@ -105,47 +159,51 @@ class DomiciliarioView(urwid.WidgetWrap):
 
     def aceptar_pedido(self, button, nombre_pedido):
         """Acepta un pedido y lo mueve a la carpeta de pedidos aceptados."""
-        ruta_pedido = os.path.join(self.carpeta_pedidos, nombre_pedido)
-        ruta_aceptado = os.path.join(self.carpeta_aceptados, nombre_pedido)
-
-        # Mover el archivo a la carpeta de pedidos aceptados
-        os.rename(ruta_pedido, ruta_aceptado)
-
-        # Actualizar las listas de pedidos
-        self.pedidos_pendientes.remove(nombre_pedido)
-        self.pedidos_aceptados.append(nombre_pedido)
-
-        # Actualizar la interfaz en tiempo real
+        # Mover el lote a los pedidos aceptados de este domiciliario
+        try:
+            self.almacen.aceptar_lote(nombre_pedido, self.usuario)
+            self.mensaje.set_text("")
+        except LoteTomado as error:
+            quien = f" por {error.domiciliario}" if error.domiciliario else ""
+            self.mensaje.set_text(('error', f"El {nombre_pedido} ya fue tomado{quien}."))
+        self.almacen.marcar_disponible(self.usuario)
+
+        # Actualizar la interfaz en tiempo real (otros domiciliarios también pueden haber aceptado lotes)
+        self.indice.revisar(forzar=True)
         self.actualizar_interfaz()
 
         # Cerrar el popup
         self.cerrar_popup()
 
     def actualizar_interfaz(self):
-        """Actualiza la interfaz para reflejar los cambios en los pedidos."""
-        # Actualizar los botones de pedidos pendientes y aceptados
-        self.botones_pendientes = self.crear_botones(self.pedidos_pendientes, self.mostrar_pedido)
-        self.botones_aceptados = self.crear_botones(self.pedidos_aceptados, self.mostrar_pedido_aceptado)
-
-        # Actualizar los frames de la interfaz
-        self.pedidos_pendientes_frame.original_widget = urwid.Pile([
-            urwid.Text("Pedidos Pendientes", align='center'),
-            urwid.Divider(),
-            *self.botones_pendientes
-        ])
-
-        self.pedidos_aceptados_frame.original_widget = urwid.Pile([
-            urwid.Text("Pedidos Aceptados", align='center'),
-            urwid.Divider(),
-            *self.botones_aceptados
-        ])
+        """Actualiza la interfaz para reflejar los cambios en los pedidos (según el índice)."""
+        self.pedidos_pendientes = self.cargar_pedidos("pendiente")
+        self.pedidos_aceptados = self.cargar_pedidos("aceptado")
+        self._actualizar_lista(self.lista_pendientes, self.botones_pendientes, self.pedidos_pendientes,
+                               self.mostrar_pedido)
+        self._actualizar_lista(self.lista_aceptados, self.botones_aceptados, self.pedidos_aceptados,
+                               self.mostrar_pedido_aceptado)
+
+    def _actualizar_lista(self, lista, botones, pedidos, callback):
+        """Quita los botones de los lotes que ya no están y agrega al final los nuevos; los demás quedan"""
+        vigentes = set(pedidos)
+        for pedido in [pedido for pedido in botones if pedido not in vigentes]:
+            boton = botones.pop(pedido)
+            for posicion, (widget, _) in enumerate(lista.contents):
+                if widget is boton:
+                    del lista.contents[posicion]
+                    break
+        for pedido in pedidos:
+            if pedido in botones:
+                botones[pedido].set_label(self.etiqueta(pedido))  # El reparto puede haber cambiado
+            else:
+                botones[pedido] = urwid.Button(self.etiqueta(pedido), on_press=callback, user_data=pedido)
+                lista.contents.append((botones[pedido], lista.options()))
 
     def mostrar_pedido_aceptado(self, button, nombre_pedido):
         """Muestra el contenido de un pedido aceptado en un recuadro emergente."""
-        ruta_pedido = os.path.join(self.carpeta_aceptados, nombre_pedido)
         try:
-            with open(ruta_pedido, "r", encoding="utf-8") as f:
-                contenido = f.read()
+            contenido = self.indice.contenido(nombre_pedido, "aceptado")[0]
         except FileNotFoundError:
             contenido = "El pedido no pudo ser cargado."
 
@@ -161,6 +219,7 @@ class DomiciliarioView(urwid.WidgetWrap):
             urwid.Text(f"Contenido de {nombre_pedido}:\n", align='center'),
             urwid.LineBox(urwid.BoxAdapter(lista_pedido, height=10)),  # Limitar la altura del contenido
             urwid.Divider(),
+            urwid.Button("Entregado", on_press=self.entregar_pedido, user_data=nombre_pedido),
             urwid.Button("Cerrar", on_press=self.cerrar_popup)
         ])
 
@@ -176,10 +235,25 @@ class DomiciliarioView(urwid.WidgetWrap):
         # Mostrar el popup
         self.main.loop.widget = self.popup
 
+    def entregar_pedido(self, button, nombre_pedido):
+        """Marca el lote como entregado: se archiva y deja de aparecer en la lista."""
+        try:
+            self.almacen.entregar_lote(nombre_pedido, self.usuario)
+            self.mensaje.set_text(f"{nombre_pedido} entregado.")
+        except FileNotFoundError:
+            self.mensaje.set_text(('error', f"{nombre_pedido} ya no está entre sus pedidos aceptados."))
+        self.indice.revisar(forzar=True)
+        self.actualizar_interfaz()
+        self.cerrar_popup()
+
     def cerrar_popup(self, button=None):
         """Cierra el recuadro emergente y regresa al menú de domiciliario."""
         self.main.loop.widget = self
 
     def salir(self, button):
         """Regresa a la pantalla de inicio de sesión."""
+        for clave in self._vigilados:
+            self.main.servicio.dejar_de_vigilar(clave)
+        self._vigilados = []
+        self.almacen.marcar_disponible(self.usuario, False)
         self.main.mostrar_login()
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""Facturas en PDF, armadas recién cuando se piden.
+
+Cada venta queda guardada como texto en el libro de ventas (ID, fecha,
+descuento, cliente y dirección si es a domicilio, productos y total): ese
+texto es la factura. El PDF se arma cuando alguien lo pide ("Abrir PDF"
+después de la venta, o desde el menú del administrador) y queda en
+facturas/ o facturas_domicilios/ para la próxima vez.
+
+Para reimprimir todas las facturas de un rango de fechas:
+
+    python facturas.py lote --desde 2026-10-01 --hasta 2026-10-31 [--un-archivo octubre.pdf]
+    python facturas.py factura 123
+
+Sin --un-archivo se escribe un PDF por factura repartiendo el trabajo en
+varios procesos. Lo que se repite en todas las páginas (título y
+encabezados de columnas) se dibuja una sola vez por documento como
+plantilla (Form XObject de reportlab) y cada página solo la referencia.
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from libro_ventas import leer_venta_texto
+
+CARPETA_LOCAL = "facturas"
+CARPETA_DOMICILIO = "facturas_domicilios"
+_ANCHO, _ALTO = letter
+_FACTURAS_POR_PARTE = 200  # Facturas que recibe cada proceso de una vez
+
+
+def leer_factura(texto):
+    """Datos de una factura a partir del texto guardado de la venta, o None si no es una venta"""
+    venta = leer_venta_texto(texto)
+    if venta is None:
+        return None
+    id_factura, fecha, descuento, total, items = venta
+    nombre = direccion = None
+    for linea in texto.splitlines():
+        if linea.startswith("Cliente: "):
+            nombre = linea.split(": ", 1)[1]
+        elif linea.startswith("Dirección: "):
+            direccion = linea.split(": ", 1)[1]
+    return {"id_factura": id_factura, "fecha": fecha, "descuento": descuento, "total": total,
+            "items": items, "cliente": None if nombre is None else (nombre, direccion or "")}
+
+
+def ruta_factura(factura):
+    """Dónde queda el PDF de una factura (las ventas viejas sin ID usan la fecha)"""
+    carpeta = CARPETA_LOCAL if factura["cliente"] is None else CARPETA_DOMICILIO
+    nombre = factura["id_factura"]
+    if nombre is None:
+        nombre = factura["fecha"].replace(":", "-")
+    return os.path.join(carpeta, f"factura_{nombre}.pdf")
+
+
+def _encabezado_columnas(c, y):
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "Producto")
+    c.drawString(200, y, "Cantidad")
+    c.drawString(300, y, "Precio Unitario")
+    c.drawString(400, y, "Total")
+
+
+def _armar_plantillas(c):
+    """Dibuja una vez por documento lo fijo de cada tipo de página"""
+    c.beginForm("local")
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, _ALTO - 50, "Factura de Venta")
+    _encabezado_columnas(c, _ALTO - 140)
+    c.endForm()
+
+    c.beginForm("domicilio")
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, _ALTO - 50, "Factura de Venta")
+    _encabezado_columnas(c, _ALTO - 170)
+    c.endForm()
+
+    # Páginas siguientes de una factura con muchos productos
+    c.beginForm("continuacion")
+    _encabezado_columnas(c, _ALTO - 50)
+    c.endForm()
+
+
+def _dibujar(c, factura):
+    """Dibuja una factura desde una página nueva (y las que necesite)"""
+    cliente = factura["cliente"]
+    c.doForm("local" if cliente is None else "domicilio")
+    c.setFont("Helvetica", 12)
+    id_factura = "-" if factura["id_factura"] is None else factura["id_factura"]
+    c.drawString(50, _ALTO - 70, f"ID Factura: {id_factura}")
+    c.drawString(50, _ALTO - 90, f"Fecha: {factura['fecha']}")
+    c.drawString(50, _ALTO - 110, f"Descuento: {factura['descuento']}%")
+    if cliente is not None:
+        c.drawString(50, _ALTO - 130, f"Cliente: {cliente[0]}")
+        c.drawString(50, _ALTO - 150, f"Dirección: {cliente[1]}")
+
+    y = (_ALTO - 140 if cliente is None else _ALTO - 170) - 20
+    for item in factura["items"]:
+        if y < 80:
+            c.showPage()
+            c.doForm("continuacion")
+            c.setFont("Helvetica", 12)
+            y = _ALTO - 70
+        c.drawString(50, y, item['nombre'])
+        c.drawString(200, y, str(item['cantidad']))
+        c.drawString(300, y, f"${item['precio_venta']:.2f}")
+        c.drawString(400, y, f"${item['precio_venta'] * item['cantidad']:.2f}")
+        y -= 20
+
+    # Total de la venta
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(300, y - 20, "Total de la Venta:")
+    c.drawString(400, y - 20, f"${factura['total']:.2f}")
+    c.showPage()
+
+
+def _documento(ruta):
+    c = canvas.Canvas(ruta, pagesize=letter)
+    _armar_plantillas(c)
+    return c
+
+
+def generar_pdf(texto, ruta=None):
+    """Arma el PDF de una factura (el texto guardado de la venta) y devuelve su ruta"""
+    factura = leer_factura(texto)
+    if factura is None:
+        raise ValueError("El texto no es una venta")
+    if ruta is None:
+        ruta = ruta_factura(factura)
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    c = _documento(ruta)
+    _dibujar(c, factura)
+    c.save()
+    return ruta
+
+
+def pdf_de_factura(almacen, id_factura):
+    """Ruta del PDF de una factura guardada; lo arma solo si todavía no existe"""
+    texto = almacen.factura(id_factura)
+    if texto is None:
+        raise KeyError(id_factura)
+    ruta = ruta_factura(leer_factura(texto))
+    if os.path.exists(ruta):
+        return ruta
+    return generar_pdf(texto, ruta)
+
+
+def _generar_parte(textos):
+    """Trabajo de cada proceso del lote: un PDF por factura"""
+    return [generar_pdf(texto) for texto in textos]
+
+
+def generar_lote(textos, destino=None, procesos=None):
+    """Reimprime varias facturas; devuelve la lista de archivos escritos.
+
+    Con destino, todas quedan en un solo PDF de varias páginas (un PDF es
+    un solo archivo que se escribe en orden, así que lo arma este proceso).
+    Sin destino, un PDF por factura repartido entre `procesos` procesos
+    (por defecto, uno por CPU).
+    """
+    if destino is not None:
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+        c = _documento(destino)
+        for texto in textos:
+            factura = leer_factura(texto)
+            if factura is not None:
+                _dibujar(c, factura)
+        c.save()
+        return [destino]
+
+    textos = list(textos)
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(textos) <= _FACTURAS_POR_PARTE:
+        return _generar_parte(textos)
+    for carpeta in (CARPETA_LOCAL, CARPETA_DOMICILIO):
+        os.makedirs(carpeta, exist_ok=True)
+    partes = [textos[i:i + _FACTURAS_POR_PARTE] for i in range(0, len(textos), _FACTURAS_POR_PARTE)]
+    # "spawn": también se llama desde la pantalla, que tiene hilos corriendo
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as grupo:
+        return [ruta for rutas in grupo.map(_generar_parte, partes) for ruta in rutas]
+
+
+def abrir_pdf(ruta):
+    """Abre un PDF con el visor del sistema"""
+    if os.name == 'nt':  # Windows
+        os.startfile(ruta)
+    elif os.name == 'posix':  # Linux o macOS
+        subprocess.run(["xdg-open", ruta])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Facturas en PDF a partir de las ventas guardadas.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_factura = sub.add_parser("factura", help="arma el PDF de una factura")
+    p_factura.add_argument("id_factura", type=int)
+    p_lote = sub.add_parser("lote", help="reimprime las facturas de un rango de fechas")
+    p_lote.add_argument("--desde", required=True, help="primer día (YYYY-MM-DD)")
+    p_lote.add_argument("--hasta", required=True, help="último día (YYYY-MM-DD)")
+    p_lote.add_argument("--un-archivo", metavar="PDF", help="todas las facturas en un solo PDF")
+    p_lote.add_argument("--procesos", type=int, help="procesos para el modo un PDF por factura")
+    args = parser.parse_args(argv)
+
+    from almacen import abrir_almacen
+    almacen = abrir_almacen()
+    try:
+        if args.comando == "factura":
+            texto = almacen.factura(args.id_factura)
+            if texto is None:
+                print(f"Error: no existe la factura {args.id_factura}.", file=sys.stderr)
+                return 1
+            print(generar_pdf(texto))
+            return 0
+        textos = almacen.facturas_entre(args.desde, args.hasta)
+    finally:
+        almacen.cerrar()
+    if not textos:
+        print("No hay ventas en el rango de fechas especificado.")
+        return 0
+    archivos = generar_lote(textos, args.un_archivo, args.procesos)
+    if args.un_archivo:
+        print(f"{len(textos)} facturas en {args.un_archivo}.")
+    else:
+        print(f"{len(archivos)} facturas en {CARPETA_LOCAL}/ y {CARPETA_DOMICILIO}/.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
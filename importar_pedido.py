@@ -0,0 +1,40 @@
+"""Carga un pedido de proveedor al inventario sin abrir la interfaz.
+
+Uso: python importar_pedido.py archivo_pedido.txt
+
+Cada línea del archivo tiene el formato "nombre: precio_compra: cantidad".
+Las líneas válidas se guardan en una sola escritura, en el almacén
+configurado (texto, SQLite o el servidor), y las líneas con errores se
+listan al final.
+"""
+import argparse
+import sys
+
+from almacen import abrir_almacen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga un pedido de proveedor al inventario.")
+    parser.add_argument("archivo", help="archivo de pedido (nombre: precio_compra: cantidad)")
+    args = parser.parse_args(argv)
+
+    try:
+        file = open(args.archivo, "r", encoding="utf-8", errors="replace")
+    except FileNotFoundError:
+        print(f"Error: No se encontró el archivo de pedido {args.archivo}.", file=sys.stderr)
+        return 1
+    almacen = abrir_almacen()
+    try:
+        with file:
+            agregados, actualizados, errores = almacen.inventario.importar_pedido(file)
+    finally:
+        almacen.cerrar()
+
+    print(f"Pedido cargado: {agregados} productos nuevos, {actualizados} actualizados.")
+    for numero, mensaje in errores:
+        print(f"Línea {numero}: {mensaje}", file=sys.stderr)
+    return 2 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Carga ventas hechas fuera de la caja (tienda web, caja sin conexión) sin abrir la interfaz.
+
+Uso: python importar_ventas.py archivo.jsonl|archivo.csv [--formato jsonl|csv]
+
+JSONL: una venta por línea, como la entiende motor_ventas.armar_venta:
+
+    {"fecha": "2024-05-01 10:30:00", "descuento": 10, "items": [{"id": "3", "cantidad": 2}]}
+    {"cliente": ["Ana", "Calle 10 # 5-20"], "items": [{"id": "7", "cantidad": 1, "precio_venta": 2.5}]}
+
+CSV: una fila por producto, con encabezado. Columnas: id y cantidad
+(obligatorias), venta (las filas seguidas con el mismo valor son una sola
+venta; sin esa columna cada fila es una venta), fecha, descuento,
+precio_venta, cliente y direccion (de la primera fila de la venta).
+
+Todas las ventas se validan y se confirman juntas con
+almacen.confirmar_ventas (un fsync por grupo, no uno por venta), en el
+almacén configurado (texto, SQLite o el servidor). Las ventas con errores
+o sin stock no se hacen y se listan al final, con su número de línea.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from almacen import abrir_almacen
+from inventario import StockInsuficiente
+from motor_ventas import VentaInvalida, armar_venta
+
+
+def leer_jsonl(archivo):
+    """(número de línea, datos de la venta) de cada línea no vacía; datos es None si no es JSON"""
+    for numero, linea in enumerate(archivo, start=1):
+        linea = linea.strip().lstrip("\ufeff")
+        if not linea:
+            continue
+        try:
+            datos = json.loads(linea)
+        except ValueError:
+            datos = None
+        yield numero, datos if isinstance(datos, dict) else None
+
+
+def leer_csv(archivo):
+    """(número de línea de la primera fila, datos de la venta) agrupando las filas de cada venta"""
+    lector = csv.DictReader(archivo)
+    actual = None
+    for fila in lector:
+        fila = {(clave or "").strip().lstrip("\ufeff"): (valor or "").strip() for clave, valor in fila.items()}
+        item = {"id": fila.get("id"), "cantidad": fila.get("cantidad"), "precio_venta": fila.get("precio_venta")}
+        clave = fila.get("venta")
+        if actual is not None and clave and clave == actual[0]:
+            actual[2]["items"].append(item)
+            continue
+        if actual is not None:
+            yield actual[1], actual[2]
+        datos = {"fecha": fila.get("fecha"), "descuento": fila.get("descuento"), "items": [item]}
+        if fila.get("cliente") or fila.get("direccion"):
+            datos["cliente"] = [fila.get("cliente"), fila.get("direccion")]
+        actual = (clave, lector.line_num, datos)
+    if actual is not None:
+        yield actual[1], actual[2]
+
+
+def importar(almacen, ventas_leidas):
+    """Arma y confirma las ventas; devuelve (IDs de factura hechos, [(línea, mensaje)])"""
+    productos = almacen.inventario.productos
+    errores = []
+    validas = []
+    for numero, datos in ventas_leidas:
+        if datos is None:
+            errores.append((numero, "No es una venta válida"))
+            continue
+        try:
+            validas.append((numero, armar_venta(productos, datos)))
+        except VentaInvalida as error:
+            errores.append((numero, str(error)))
+
+    facturas = []
+    resultados = almacen.confirmar_ventas([venta for _, venta in validas])
+    for (numero, _), resultado in zip(validas, resultados):
+        if isinstance(resultado, StockInsuficiente):
+            errores.append((numero, f"Stock insuficiente del producto {resultado.args[0]}"))
+        elif isinstance(resultado, KeyError):
+            errores.append((numero, f"No existe el producto {resultado.args[0]}"))
+        else:
+            facturas.append(resultado)
+    errores.sort()
+    return facturas, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga un archivo de ventas (JSONL o CSV) al almacén.")
+    parser.add_argument("archivo", help="archivo de ventas")
+    parser.add_argument("--formato", choices=("jsonl", "csv"),
+                        help="formato del archivo (si no, se deduce de la extensión)")
+    args = parser.parse_args(argv)
+    formato = args.formato or ("csv" if args.archivo.lower().endswith(".csv") else "jsonl")
+
+    inicio = time.perf_counter()
+    try:
+        archivo = open(args.archivo, "r", encoding="utf-8", errors="replace", newline="")
+    except FileNotFoundError:
+        print(f"Error: No se encontró el archivo de ventas {args.archivo}.", file=sys.stderr)
+        return 1
+    almacen = abrir_almacen()
+    try:
+        with archivo:
+            facturas, errores = importar(almacen, leer_csv(archivo) if formato == "csv" else leer_jsonl(archivo))
+    finally:
+        almacen.cerrar()
+
+    rango = f" (facturas {facturas[0]} a {facturas[-1]})" if facturas else ""
+    print(f"{len(facturas)} ventas registradas{rango} en {time.perf_counter() - inicio:.1f} s.")
+    for numero, mensaje in errores:
+        print(f"Línea {numero}: {mensaje}", file=sys.stderr)
+    return 2 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Lotes de un domiciliario y su estado, sin volver a leer todo en cada revisión.
+
+Un lote pasa por pendiente -> aceptado -> entregado. IndiceLotes guarda
+los nombres de los lotes pendientes y de los aceptados por el
+domiciliario, y el contenido ya leído de cada uno. revisar() pregunta
+primero al almacén por el sello de los lotes (un stat por carpeta, o un
+contador en SQLite) y solo si cambió vuelve a listar; devuelve lo que
+apareció y lo que se fue, para que la pantalla toque solo esos botones.
+El contenido de un lote se vuelve a leer solo si cambió su propio sello.
+Los entregados quedan archivados (ver AlmacenTexto.entregar_lote) y no
+se cargan.
+"""
+from libro_ventas import SEPARADOR_VENTA
+
+ESTADOS = ("pendiente", "aceptado")
+
+
+def leer_pedidos(contenido):
+    """Pedidos de un lote: diccionarios con cliente, direccion, fecha y productos (líneas)"""
+    pedidos = []
+    for bloque in contenido.split(SEPARADOR_VENTA):
+        pedido = {"cliente": "", "direccion": "", "fecha": None, "productos": []}
+        en_productos = False
+        for linea in bloque.strip().splitlines():
+            if en_productos:
+                pedido["productos"].append(linea)
+            elif linea.startswith("Cliente: "):
+                pedido["cliente"] = linea.split(": ", 1)[1]
+            elif linea.startswith("Dirección: "):
+                pedido["direccion"] = linea.split(": ", 1)[1]
+            elif linea.startswith("Fecha: "):
+                pedido["fecha"] = linea.split(": ", 1)[1]
+            elif linea.startswith("Productos:"):
+                en_productos = True
+        if pedido["cliente"] or pedido["productos"]:
+            pedidos.append(pedido)
+    return pedidos
+
+
+class IndiceLotes:
+    def __init__(self, almacen, domiciliario=None):
+        self.almacen = almacen
+        self.domiciliario = domiciliario
+        self.lotes = {estado: [] for estado in ESTADOS}
+        self._sello = object()  # Distinto de cualquier sello: la primera revisión lista todo
+        self._contenidos = {}   # (nombre, estado) -> (sello del lote, texto, pedidos)
+
+    def _listar(self, estado):
+        if estado == "aceptado":
+            return self.almacen.lotes("aceptado", self.domiciliario)
+        return self.almacen.lotes("pendiente")
+
+    def revisar(self, forzar=False):
+        """Pone al día las listas; devuelve [(estado, agregados, quitados)] de las que cambiaron"""
+        sello = self.almacen.sello_lotes(self.domiciliario)
+        if sello == self._sello and not forzar:
+            return []
+        self._sello = sello
+        cambios = []
+        for estado in ESTADOS:
+            antes = self.lotes[estado]
+            ahora = self._listar(estado)
+            conjunto_antes, conjunto_ahora = set(antes), set(ahora)
+            agregados = [nombre for nombre in ahora if nombre not in conjunto_antes]
+            quitados = [nombre for nombre in antes if nombre not in conjunto_ahora]
+            self.lotes[estado] = ahora
+            for nombre in quitados:
+                self._contenidos.pop((nombre, estado), None)
+            if agregados or quitados:
+                cambios.append((estado, agregados, quitados))
+        return cambios
+
+    def contenido(self, nombre_lote, estado):
+        """(texto, pedidos) de un lote; FileNotFoundError si ya no está en ese estado"""
+        sello = self.almacen.sello_lote(nombre_lote, estado)
+        if sello is None:
+            raise FileNotFoundError(nombre_lote)
+        guardado = self._contenidos.get((nombre_lote, estado))
+        if guardado is None or guardado[0] != sello:
+            texto = self.almacen.leer_lote(nombre_lote, estado)
+            guardado = (sello, texto, leer_pedidos(texto))
+            self._contenidos[(nombre_lote, estado)] = guardado
+        return guardado[1], guardado[2]
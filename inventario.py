@@ -0,0 +1,586 @@
+import marshal
+import os
+import threading
+from contextlib import contextmanager
+
+from numeracion import archivo_bloqueado
+from transacciones import sincronizar_archivo
+
+# Versión del formato de la foto binaria (inventario.bin)
+VERSION_BINARIO = 1
+
+
+class Producto:
+    """Un producto del inventario. Usa __slots__ para no guardar un dict por producto."""
+
+    __slots__ = ("nombre", "precio_compra", "precio_venta", "cantidad")
+
+    def __init__(self, nombre, precio_compra, precio_venta, cantidad):
+        self.nombre = nombre
+        self.precio_compra = precio_compra
+        self.precio_venta = precio_venta
+        self.cantidad = cantidad
+
+    def __repr__(self):
+        return (f"Producto({self.nombre!r}, {self.precio_compra!r}, "
+                f"{self.precio_venta!r}, {self.cantidad!r})")
+
+
+def leer_linea_inventario(linea):
+    """Interpreta "id: nombre: precio_compra: precio_venta: cantidad"; devuelve (id, Producto) o None.
+
+    Tolera BOM, espacios, finales de línea de Windows y nombres que contienen ": ".
+    """
+    partes = linea.strip().lstrip("\ufeff").split(": ")
+    if len(partes) < 5:
+        return None
+    try:
+        producto = Producto(": ".join(partes[1:-3]), float(partes[-3]), float(partes[-2]), int(partes[-1]))
+    except ValueError:
+        return None
+    return partes[0], producto
+
+
+def numero_transaccion(caja, numero):
+    """Cómo se escribe el número de transacción en el diario: N para la caja 0, caja/N para las demás"""
+    return str(numero) if caja == 0 else f"{caja}/{numero}"
+
+
+def ruta_binaria(ruta):
+    return os.path.splitext(ruta)[0] + ".bin"
+
+
+def firma_archivo(ruta):
+    """(tamaño, fecha de modificación) del archivo, o None si no existe"""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return estado.st_size, estado.st_mtime_ns
+
+
+def firma_diario(ruta):
+    """(inodo, tamaño) del diario, o None si no existe: el inodo cambia cuando otra caja lo compacta"""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return estado.st_ino, estado.st_size
+
+
+def leer_inventario(ruta="inventario.txt", usar_binario=True):
+    """Lee inventario.txt y devuelve {id: Producto}.
+
+    Si junto al archivo hay una foto binaria (inventario.bin) hecha a partir
+    de esta misma versión del texto, se carga esa, que es mucho más rápida.
+    Si no, se lee el texto y se deja la foto binaria lista para la próxima vez.
+    """
+    firma = firma_archivo(ruta)
+    if firma is None:
+        return {}
+    if usar_binario:
+        productos = _leer_binario(ruta_binaria(ruta), firma)
+        if productos is not None:
+            return productos
+
+    productos = {}
+    with open(ruta, "r", encoding="utf-8", errors="replace") as file:
+        for linea in file:
+            leido = leer_linea_inventario(linea)
+            if leido is not None:
+                productos[leido[0]] = leido[1]
+
+    if usar_binario:
+        guardar_binario(ruta, productos, firma)
+    return productos
+
+
+def _leer_binario(ruta_bin, firma):
+    try:
+        with open(ruta_bin, "rb") as file:
+            # Leer todo de una vez: marshal.load sobre el archivo lee en trozos pequeños y es mucho más lento
+            version, firma_guardada, ids, nombres, compras, ventas, cantidades = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != VERSION_BINARIO or tuple(firma_guardada) != firma:
+        return None  # La foto es de otra versión del texto
+    return dict(zip(ids, map(Producto, nombres, compras, ventas, cantidades)))
+
+
+def guardar_binario(ruta, productos, firma):
+    """Escribe la foto binaria de productos, marcada con la firma del texto del que sale"""
+    datos = (
+        VERSION_BINARIO,
+        firma,
+        list(productos),
+        [p.nombre for p in productos.values()],
+        [p.precio_compra for p in productos.values()],
+        [p.precio_venta for p in productos.values()],
+        [p.cantidad for p in productos.values()],
+    )
+    temporal = ruta_binaria(ruta) + ".tmp"
+    try:
+        with open(temporal, "wb") as file:
+            file.write(marshal.dumps(datos))
+        os.replace(temporal, ruta_binaria(ruta))
+    except OSError:
+        pass  # La foto binaria es opcional
+
+
+class StockInsuficiente(Exception):
+    """Un cambio dejaría la cantidad de un producto por debajo de cero"""
+
+
+class AvisosInventario:
+    """Lista de funciones a las que se avisa cuando cambia el catálogo.
+
+    Cada aviso es una lista de (evento, id_producto), con evento "alta",
+    "baja", "precio" o "stock". Después de cargar() se avisa [("carga", None)]:
+    el catálogo completo puede haber cambiado.
+    """
+
+    _suscriptores = ()
+
+    def suscribir(self, funcion):
+        self._suscriptores = list(self._suscriptores) + [funcion]
+
+    def desuscribir(self, funcion):
+        self._suscriptores = [f for f in self._suscriptores if f != funcion]
+
+    def _avisar(self, cambios):
+        for funcion in self._suscriptores:
+            funcion(cambios)
+
+
+class Inventario(AvisosInventario):
+    """Inventario con diario de cambios (solo se agregan registros al final).
+
+    El archivo inventario.txt es la foto completa del catálogo y cada cambio
+    (alta, baja, precio o stock) se agrega como un registro corto a
+    inventario.log. Al cargar se lee la foto y se repite el diario encima.
+    Cuando el diario supera el umbral, un hilo en segundo plano lo compacta
+    en una foto nueva.
+
+    Varias cajas escriben el mismo diario. Cada cambio se hace con el
+    diario bloqueado (ver bloqueado()): primero se aplica lo que agregaron
+    las otras cajas y recién ahí se revisa el stock y se escribe, así que
+    dos ventas del mismo producto en dos cajas no se pisan. Lo nuevo de
+    otras cajas se aplica sumando la diferencia que guarda cada registro;
+    al cargar desde la foto se usa el valor resultante, que también
+    guardan, porque el diario anterior de una compactación cortada puede
+    estar ya incluido en la foto.
+
+    Las ventas llegan como un solo registro "transaccion" con la caja y el
+    número en el diario de transacciones de esa caja (ver transacciones.py);
+    ultimas_transacciones dice, por caja, hasta cuál ya está aplicada,
+    también después de compactar.
+    """
+
+    def __init__(self, ruta="inventario.txt", umbral_compactacion=1000):
+        self.ruta = ruta
+        self.ruta_log = os.path.splitext(ruta)[0] + ".log"
+        self.ruta_log_anterior = self.ruta_log + ".1"
+        self.ruta_bloqueo = os.path.splitext(ruta)[0] + ".lock"
+        self.ruta_bloqueo_compactacion = self.ruta_log + ".lock"
+        self.umbral_compactacion = umbral_compactacion
+        self.productos = {}
+        self.ultimo_id = 0
+        self.ultimas_transacciones = {}  # caja -> última transacción aplicada
+        self._registros_log = 0
+        self._lock = threading.RLock()
+        self._lock_compactacion = threading.Lock()
+        self._profundidad = 0  # Bloqueos anidados del hilo que tiene el diario
+        self._avisos = []      # Avisos que se mandan al soltar el bloqueo
+        self._recargar = False
+        self._log = None
+        self._compactando = None
+        self._firma_foto = None
+        self._inodo_log = None
+        self._leido_log = 0  # Bytes del diario ya aplicados (incluye los de otras cajas)
+        self.cargar()
+
+    @contextmanager
+    def bloqueado(self):
+        """Exclusividad entre hilos y entre cajas para revisar y cambiar el inventario.
+
+        Al entrar se aplica lo que otras cajas agregaron al diario. Se puede
+        anidar; los avisos de todo lo que cambió se mandan al soltar el más
+        externo, ya sin el bloqueo.
+        """
+        avisos = []
+        try:
+            with self._lock:
+                if self._profundidad:
+                    self._profundidad += 1
+                    try:
+                        yield
+                    finally:
+                        self._profundidad -= 1
+                    return
+                with archivo_bloqueado(self.ruta_bloqueo):
+                    self._profundidad = 1
+                    try:
+                        self._ponerse_al_dia()
+                        yield
+                    finally:
+                        self._profundidad = 0
+                        avisos, self._avisos = self._avisos, []
+        finally:
+            if avisos:
+                self._avisar(list(dict.fromkeys(avisos)))
+
+    def cargar(self):
+        """Vuelve a leer la foto del inventario y el diario; avisa [("carga", None)]"""
+        self._recargar = True
+        with self.bloqueado():
+            pass
+
+    def releer(self):
+        """Aplica lo que otras cajas agregaron al diario desde la última lectura.
+
+        Si otra caja compactó, se recarga todo. Devuelve True si hubo algo nuevo.
+        """
+        with self.bloqueado():
+            return bool(self._avisos)
+
+    def _ponerse_al_dia(self):
+        """Con el diario bloqueado: aplica lo nuevo de otras cajas, o recarga si otra compactó"""
+        firma_log = firma_diario(self.ruta_log)
+        inodo, tamano = firma_log if firma_log else (None, 0)
+        if self._inodo_log is None and self._leido_log == 0:
+            self._inodo_log = inodo  # El diario recién apareció: lo escribió otra caja
+        if (self._recargar or firma_archivo(self.ruta) != self._firma_foto or inodo != self._inodo_log or
+                tamano < self._leido_log):
+            self._recargar = False
+            self._cargar()
+            self._avisos.append(("carga", None))
+            if os.path.exists(self.ruta_log_anterior):
+                # Una compactación quedó a medias (la que está en curso tiene tomado su bloqueo)
+                self._compactar(esperar=False)
+            return
+        if tamano > self._leido_log:
+            aplicados, self._leido_log = self._repetir_log(self.ruta_log, self._leido_log, self._avisos,
+                                                           absoluto=False)
+            self._registros_log += aplicados
+            if self._leido_log < tamano:
+                # Registro cortado de una caja que se cayó: se cierra para que no se pegue al próximo
+                self._escribir_texto("\n")
+
+    def _cargar(self):
+        self._cerrar_log()
+        self._firma_foto = firma_archivo(self.ruta)
+        self.productos = leer_inventario(self.ruta)
+        self.ultimas_transacciones = {}
+        self.ultimo_id = max((int(i) for i in self.productos if i.isdigit()), default=0)
+        if os.path.exists(self.ruta_log_anterior):
+            self._repetir_log(self.ruta_log_anterior)
+        firma_log = firma_diario(self.ruta_log)
+        self._inodo_log = firma_log[0] if firma_log else None
+        self._registros_log, self._leido_log = self._repetir_log(self.ruta_log)
+
+    def _repetir_log(self, ruta, desde=0, cambios=None, absoluto=True):
+        """Aplica los registros del diario a partir del byte `desde`.
+
+        Devuelve (cuántos se aplicaron, byte después del último registro
+        completo). Con cambios (una lista), agrega ahí los avisos de cada
+        registro. Con absoluto=False el stock se suma en vez de reemplazarse.
+        """
+        aplicados = 0
+        try:
+            with open(ruta, "rb") as file:
+                file.seek(desde)
+                for linea in file:
+                    # Un registro sin salto de línea quedó cortado por una caída
+                    if not linea.endswith(b"\n"):
+                        break
+                    desde += len(linea)
+                    try:
+                        avisos = self._aplicar(linea.decode("utf-8").rstrip("\r\n"), absoluto)
+                        aplicados += 1
+                    except (ValueError, IndexError):
+                        continue
+                    if cambios is not None:
+                        cambios.extend(avisos)
+        except FileNotFoundError:
+            pass
+        return aplicados, desde
+
+    def _aplicar(self, registro, absoluto=True):
+        """Aplica un registro del diario; devuelve los avisos [(evento, id_producto)]"""
+        tipo, resto = registro.split(": ", 1)
+        if tipo == "alta":
+            id_producto, precio_compra, precio_venta, cantidad, nombre = resto.split(": ", 4)
+            self._poner(id_producto, nombre, float(precio_compra), float(precio_venta), int(cantidad))
+            return [("alta", id_producto)]
+        elif tipo == "baja":
+            self.productos.pop(resto, None)
+            return [("baja", resto)]
+        elif tipo == "precio":
+            id_producto, precio_venta = resto.split(": ")
+            if id_producto in self.productos:
+                self.productos[id_producto].precio_venta = float(precio_venta)
+            return [("precio", id_producto)]
+        elif tipo == "stock":
+            id_producto, diferencia, cantidad = resto.split(": ")
+            self._poner_cantidad(id_producto, diferencia, cantidad, absoluto)
+            return [("stock", id_producto)]
+        elif tipo == "transaccion":
+            # transaccion: caja/N: id=diferencia=cantidad, id=diferencia=cantidad (la caja 0 solo N)
+            numero, cambios = resto.split(": ", 1)
+            caja, _, numero = numero.rpartition("/")
+            avisos = []
+            for cambio in filter(None, cambios.split(", ")):
+                id_producto, diferencia, cantidad = cambio.split("=")
+                self._poner_cantidad(id_producto, diferencia, cantidad, absoluto)
+                avisos.append(("stock", id_producto))
+            caja = int(caja or 0)
+            self.ultimas_transacciones[caja] = max(self.ultimas_transacciones.get(caja, 0), int(numero))
+            return avisos
+        else:
+            raise ValueError(tipo)
+
+    def _poner_cantidad(self, id_producto, diferencia, cantidad, absoluto):
+        producto = self.productos.get(id_producto)
+        if producto is not None:
+            producto.cantidad = int(cantidad) if absoluto else producto.cantidad + int(diferencia)
+
+    def _poner(self, id_producto, nombre, precio_compra, precio_venta, cantidad):
+        self.productos[id_producto] = Producto(nombre, precio_compra, precio_venta, cantidad)
+        if id_producto.isdigit() and int(id_producto) > self.ultimo_id:
+            self.ultimo_id = int(id_producto)
+
+    def generar_nuevo_id(self):
+        self.ultimo_id += 1
+        return str(self.ultimo_id)
+
+    def agregar(self, nombre, precio_compra, precio_venta, cantidad):
+        """Agrega un producto nuevo y devuelve su ID"""
+        with self.bloqueado():
+            id_producto = self.generar_nuevo_id()
+            self._poner(id_producto, nombre, precio_compra, precio_venta, cantidad)
+            self._escribir([self._registro_alta(id_producto)])
+            self._avisos.append(("alta", id_producto))
+        return id_producto
+
+    def borrar(self, id_producto):
+        with self.bloqueado():
+            if id_producto not in self.productos:
+                raise KeyError(id_producto)
+            del self.productos[id_producto]
+            self._escribir([f"baja: {id_producto}"])
+            self._avisos.append(("baja", id_producto))
+
+    def fijar_precio_venta(self, id_producto, precio_venta):
+        with self.bloqueado():
+            self.productos[id_producto].precio_venta = precio_venta
+            self._escribir([f"precio: {id_producto}: {precio_venta}"])
+            self._avisos.append(("precio", id_producto))
+
+    def ajustar_cantidades(self, cambios, transaccion=None, caja=0):
+        """Suma a cada producto la diferencia indicada ({id: diferencia}) en un solo registro a disco.
+
+        Con `transaccion` (número en el diario de transacciones de `caja`) los
+        cambios van en un solo registro sin fsync: la venta ya está en ese diario.
+        """
+        with self.bloqueado():
+            for id_producto, diferencia in cambios.items():
+                if id_producto not in self.productos:
+                    raise KeyError(id_producto)
+                if self.productos[id_producto].cantidad + diferencia < 0:
+                    raise StockInsuficiente(id_producto)
+            registros = []
+            for id_producto, diferencia in cambios.items():
+                producto = self.productos[id_producto]
+                producto.cantidad += diferencia
+                registros.append(f"stock: {id_producto}: {diferencia}: {producto.cantidad}")
+            if transaccion is None:
+                self._escribir(registros)
+            else:
+                self._escribir([f"transaccion: {numero_transaccion(caja, transaccion)}: " + ", ".join(
+                    f"{id_producto}={diferencia}={self.productos[id_producto].cantidad}"
+                    for id_producto, diferencia in cambios.items())], sincronizar=False)
+                self.ultimas_transacciones[caja] = transaccion
+            self._avisos.extend(("stock", id_producto) for id_producto in cambios)
+
+    def ajustar_cantidad(self, id_producto, diferencia):
+        self.ajustar_cantidades({id_producto: diferencia})
+
+    def importar_pedido(self, lineas):
+        """Suma un pedido de proveedor (líneas "nombre: precio_compra: cantidad") al inventario.
+
+        Los productos se buscan por (nombre, precio_compra) en un índice hash;
+        si no existen se agregan con precio de venta = precio de compra * 1.5.
+        Las líneas con errores no detienen la carga: se devuelven junto con los
+        totales y el resto del pedido se guarda en una sola escritura al diario.
+        Devuelve (agregados, actualizados, errores), donde errores es una lista
+        de (número de línea, mensaje).
+        """
+        errores = []
+        with self.bloqueado():
+            indice = {}
+            for id_producto, producto in self.productos.items():
+                indice.setdefault((producto.nombre, producto.precio_compra), id_producto)
+
+            nuevos = {}
+            diferencias = {}
+            for numero, linea in enumerate(lineas, start=1):
+                linea = linea.strip().lstrip("\ufeff")
+                if not linea:
+                    continue
+                try:
+                    nombre, precio_compra, cantidad = leer_linea_pedido(linea)
+                except ValueError as error:
+                    errores.append((numero, str(error)))
+                    continue
+
+                clave = (nombre, precio_compra)
+                id_producto = indice.get(clave)
+                if id_producto is None:
+                    id_producto = self.generar_nuevo_id()
+                    self._poner(id_producto, nombre, precio_compra, precio_compra * 1.5, cantidad)
+                    indice[clave] = id_producto
+                    nuevos[id_producto] = True
+                else:
+                    self.productos[id_producto].cantidad += cantidad
+                    if id_producto not in nuevos:
+                        diferencias[id_producto] = diferencias.get(id_producto, 0) + cantidad
+
+            registros = [self._registro_alta(id_producto) for id_producto in nuevos]
+            registros.extend(
+                f"stock: {id_producto}: {diferencia}: {self.productos[id_producto].cantidad}"
+                for id_producto, diferencia in diferencias.items()
+            )
+            self._escribir(registros)
+            self._avisos.extend([("alta", id_producto) for id_producto in nuevos] +
+                                [("stock", id_producto) for id_producto in diferencias])
+        return len(nuevos), len(diferencias), errores
+
+    def _registro_alta(self, id_producto):
+        producto = self.productos[id_producto]
+        return (f"alta: {id_producto}: {producto.precio_compra}: {producto.precio_venta}: "
+                f"{producto.cantidad}: {producto.nombre}")
+
+    def _escribir(self, registros, sincronizar=True):
+        """Agrega los registros al diario con una sola escritura y un solo fsync (con el diario bloqueado)"""
+        if not registros:
+            return
+        self._escribir_texto("".join(registro + "\n" for registro in registros), sincronizar)
+        self._registros_log += len(registros)
+
+        if self._registros_log >= self.umbral_compactacion and self._compactando is None:
+            self._compactando = threading.Thread(target=self._compactar_en_segundo_plano, daemon=True)
+            self._compactando.start()
+
+    def _escribir_texto(self, texto, sincronizar=False):
+        if self._log is None:
+            self._log = open(self.ruta_log, "a", encoding="utf-8", newline="")
+        self._log.write(texto)
+        self._log.flush()
+        if sincronizar:
+            os.fsync(self._log.fileno())
+        # Nadie más escribe mientras el diario está bloqueado: lo leído llega hasta el final
+        estado = os.fstat(self._log.fileno())
+        self._inodo_log, self._leido_log = estado.st_ino, estado.st_size
+
+    def _cerrar_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _compactar_en_segundo_plano(self):
+        try:
+            self._compactar(esperar=False)  # Si otra caja está compactando, alcanza con esa
+        finally:
+            self._compactando = None
+
+    def compactar(self):
+        """Guarda una foto nueva del inventario y descarta el diario ya incluido en ella"""
+        self._compactar(esperar=True)
+
+    def _compactar(self, esperar):
+        # Una compactación por vez, también entre cajas; el bloqueo dura hasta borrar el diario anterior
+        if not self._lock_compactacion.acquire(blocking=esperar):
+            return
+        try:
+            with archivo_bloqueado(self.ruta_bloqueo_compactacion, esperar) as tomado:
+                if tomado:
+                    self._compactar_bloqueado()
+        finally:
+            self._lock_compactacion.release()
+
+    def _compactar_bloqueado(self):
+        with self.bloqueado():
+            copia = {
+                id_producto: Producto(p.nombre, p.precio_compra, p.precio_venta, p.cantidad)
+                for id_producto, p in self.productos.items()
+            }
+            # El diario actual pasa a ser el "anterior" hasta que la foto quede escrita
+            self._cerrar_log()
+            if os.path.exists(self.ruta_log):
+                if os.path.exists(self.ruta_log_anterior):
+                    with open(self.ruta_log_anterior, "a", encoding="utf-8") as anterior, \
+                            open(self.ruta_log, "r", encoding="utf-8") as actual:
+                        anterior.write(actual.read())
+                    os.remove(self.ruta_log)
+                else:
+                    os.replace(self.ruta_log, self.ruta_log_anterior)
+            self._registros_log = 0
+            self._leido_log = 0
+            self._inodo_log = None
+            if self.ultimas_transacciones:
+                # La foto no guarda los números: se repiten en el diario nuevo
+                self._escribir([f"transaccion: {numero_transaccion(caja, numero)}: "
+                                for caja, numero in sorted(self.ultimas_transacciones.items())])
+
+        # La foto se escribe sin el diario bloqueado: las ventas siguen entrando al diario nuevo
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as file:
+            file.writelines(
+                f"{id_producto}: {p.nombre}: {p.precio_compra}: {p.precio_venta}: {p.cantidad}\n"
+                for id_producto, p in copia.items()
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        with self._lock:
+            os.replace(temporal, self.ruta)
+            self._firma_foto = firma_archivo(self.ruta)
+        guardar_binario(self.ruta, copia, self._firma_foto)
+        if os.path.exists(self.ruta_log_anterior):
+            os.remove(self.ruta_log_anterior)
+
+    def sincronizar(self):
+        """fsync del diario (para registros escritos sin sincronizar)"""
+        with self._lock:
+            if self._log is not None:
+                os.fsync(self._log.fileno())
+            # Una compactación en curso pudo mover ahí registros todavía sin sincronizar
+            sincronizar_archivo(self.ruta_log_anterior)
+
+    def cerrar(self):
+        """Espera una compactación en curso y cierra el diario"""
+        hilo = self._compactando
+        if hilo is not None:
+            hilo.join()
+        with self._lock:
+            self._cerrar_log()
+
+
+def leer_linea_pedido(linea):
+    """Interpreta una línea "nombre: precio_compra: cantidad"; lanza ValueError con el motivo"""
+    partes = linea.split(": ")
+    if len(partes) != 3:
+        raise ValueError("se esperaba 'nombre: precio: cantidad'")
+    nombre = partes[0].strip()
+    if not nombre:
+        raise ValueError("nombre vacío")
+    try:
+        precio_compra = float(partes[1])
+    except ValueError:
+        raise ValueError(f"precio inválido '{partes[1]}'")
+    try:
+        cantidad = int(partes[2])
+    except ValueError:
+        raise ValueError(f"cantidad inválida '{partes[2]}'")
+    if precio_compra < 0 or cantidad <= 0:
+        raise ValueError("el precio no puede ser negativo y la cantidad debe ser mayor que 0")
+    return nombre, precio_compra, cantidad
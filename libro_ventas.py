@@ -0,0 +1,349 @@
+"""Libro de ventas partido por día, con un índice de posiciones.
+
+Cada día tiene su propio archivo ventas/AAAA-MM-DD.txt con las ventas en el
+mismo formato de siempre (el bloque de texto y el separador). Al lado,
+ventas/indice.txt tiene una línea por venta:
+
+    id_factura: dia: posicion: longitud: total: unidades: costo
+
+(las ventas pasadas desde ventas.txt no tienen unidades ni costo).
+
+Con el índice en memoria, el cierre de caja lee solo el archivo del día y
+suma los totales sin interpretar texto; una factura se lee con un seek.
+
+Para pasar un ventas.txt existente al libro:
+
+    python libro_ventas.py convertir [--desde ventas.txt] [--carpeta ventas]
+
+AlmacenTexto lo hace solo la primera vez si encuentra ventas.txt y el libro
+todavía no existe; ventas.txt queda como estaba.
+
+Varias cajas escriben el mismo libro: cada venta se escribe con
+ventas/indice.lock bloqueado y, antes, se cargan las líneas que las otras
+agregaron al índice desde la última vez. releer hace lo mismo cuando
+ServicioDatos ve que el índice cambió.
+"""
+import argparse
+import bisect
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+from numeracion import archivo_bloqueado
+from transacciones import sincronizar_archivo
+
+SEPARADOR_VENTA = "=" * 50
+_FIN_VENTA = (SEPARADOR_VENTA + "\n").encode("utf-8")
+_PATRON_DIA = re.compile(r"\d{4}-\d{2}-\d{2}\.txt")
+
+
+def leer_venta_texto(bloque):
+    """Interpreta un bloque de ventas.txt (formato nuevo y el antiguo sin ID ni descuento)"""
+    id_factura = None
+    fecha = None
+    descuento = 0.0
+    total = None
+    suma_items = 0.0
+    items = []
+    for linea in bloque.splitlines():
+        if linea.startswith("ID Factura: "):
+            id_factura = int(linea.split(": ", 1)[1])
+        elif linea.startswith("Fecha: "):
+            fecha = linea.split(": ", 1)[1].strip()
+        elif linea.startswith("Descuento: "):
+            descuento = float(linea.split(": ", 1)[1].rstrip("%"))
+        elif linea.startswith("Total con descuento: $") or linea.startswith("Total de la venta: $"):
+            total = float(linea.split("$", 1)[1])
+        else:
+            match = re.match(r"Producto: (.*) x(\d+) - Total: \$([\d.]+)", linea)
+            if match:
+                cantidad = int(match.group(2))
+                total_item = float(match.group(3))
+                suma_items += total_item
+                items.append({"nombre": match.group(1), "cantidad": cantidad,
+                              "precio_venta": total_item / cantidad if cantidad else 0.0})
+    if fecha is None:
+        return None
+    return id_factura, fecha, descuento, suma_items if total is None else total, items
+
+
+class LibroVentas:
+    """Ventas guardadas en un archivo por día más un índice (ver el comentario del módulo)"""
+
+    def __init__(self, carpeta="ventas"):
+        self.carpeta = carpeta
+        self.ruta_indice = os.path.join(carpeta, "indice.txt")
+        self.ruta_bloqueo = os.path.join(carpeta, "indice.lock")
+        self._dias = None       # dia -> [(id_factura, posicion, longitud, total, unidades, costo)] en orden
+        self._facturas = {}     # id_factura -> (dia, posicion, longitud)
+        self._orden_dias = []   # días con ventas, ordenados
+        self._sin_sincronizar = set()
+        self._leido = 0         # Bytes del índice ya cargados
+        self._inodo = None      # Del índice cargado: si cambia, se carga todo de nuevo
+
+    def existe(self):
+        return os.path.exists(self.ruta_indice)
+
+    def ruta_dia(self, dia):
+        return os.path.join(self.carpeta, f"{dia}.txt")
+
+    # Índice
+    def _indice(self):
+        if self._dias is None:
+            with self._bloqueado():
+                pass
+        return self._dias
+
+    def releer(self):
+        """Carga las ventas que agregaron otras cajas (si el índice ya estaba cargado)"""
+        if self._dias is not None:
+            with self._bloqueado():
+                pass
+
+    @contextmanager
+    def _bloqueado(self):
+        """Bloquea el libro entre cajas y antes carga lo que agregaron las otras"""
+        os.makedirs(self.carpeta, exist_ok=True)
+        with archivo_bloqueado(self.ruta_bloqueo):
+            self._ponerse_al_dia()
+            yield
+
+    def _ponerse_al_dia(self):
+        """Con el libro bloqueado: carga el índice la primera vez y después solo las líneas nuevas"""
+        try:
+            estado = os.stat(self.ruta_indice)
+        except FileNotFoundError:
+            estado = None
+        inodo = None if estado is None else estado.st_ino
+        completo = self._dias is None or inodo != self._inodo or estado is not None and estado.st_size < self._leido
+        if completo:
+            self._dias = {}
+            self._facturas = {}
+            self._orden_dias = []
+            self._leido = 0
+            self._inodo = inodo
+        cortado = False
+        if estado is not None and estado.st_size > self._leido:
+            cortado = self._leer_indice()
+        if completo or cortado:
+            self._reparar()
+
+    def _leer_indice(self):
+        """Anota las líneas del índice desde self._leido; devuelve True si había una línea cortada"""
+        with open(self.ruta_indice, "rb") as f:
+            f.seek(self._leido)
+            datos = f.read()
+        fin = datos.rfind(b"\n") + 1
+        cortado = fin < len(datos)
+        if cortado:
+            # Línea cortada por un corte de luz (nadie más escribe: el libro está bloqueado).
+            # Se quita y _reparar vuelve a indexar esa venta desde el archivo del día.
+            os.truncate(self.ruta_indice, self._leido + fin)
+        for linea in datos[:fin].decode("utf-8").split("\n")[:-1]:
+            partes = linea.split(": ")
+            if len(partes) == 5:
+                partes += [None, None]
+            elif len(partes) != 7:
+                continue
+            id_factura, dia, posicion, longitud, total, unidades, costo = partes
+            self._anotar(None if id_factura == "-" else int(id_factura), dia,
+                         int(posicion), int(longitud), float(total),
+                         None if unidades is None else int(unidades),
+                         None if costo is None else float(costo))
+        self._leido += fin
+        return cortado
+
+    def _anotar(self, id_factura, dia, posicion, longitud, total, unidades=None, costo=None):
+        entradas = self._dias.get(dia)
+        if entradas is None:
+            entradas = self._dias[dia] = []
+            bisect.insort(self._orden_dias, dia)
+        entradas.append((id_factura, posicion, longitud, total, unidades, costo))
+        if id_factura is not None:
+            self._facturas[id_factura] = (dia, posicion, longitud)
+
+    def _reparar(self):
+        """Indexa las ventas que quedaron escritas en un día pero no en el índice (corte a mitad de venta)"""
+        if not os.path.isdir(self.carpeta):
+            return
+        for archivo in os.listdir(self.carpeta):
+            if not _PATRON_DIA.fullmatch(archivo):
+                continue
+            dia = archivo[:-4]
+            entradas = self._dias.get(dia, [])
+            fin = entradas[-1][1] + entradas[-1][2] if entradas else 0
+            if os.path.getsize(self.ruta_dia(dia)) <= fin:
+                continue
+            with open(self.ruta_dia(dia), "rb") as f:
+                f.seek(fin)
+                resto = f.read()
+            posicion = fin
+            nuevas = []
+            # El último pedazo no tiene separador: es una venta a medio escribir o nada
+            for bloque in resto.split(_FIN_VENTA)[:-1]:
+                if not bloque.strip():
+                    posicion += len(bloque)
+                    continue
+                longitud = len(bloque) + len(_FIN_VENTA)
+                venta = leer_venta_texto(bloque.decode("utf-8", errors="replace"))
+                if venta is not None:
+                    nuevas.append((venta[0], dia, posicion, longitud, venta[3]))
+                posicion += longitud
+            if nuevas:
+                self._escribir_indice(nuevas)
+
+    @staticmethod
+    def _linea_indice(id_factura, dia, posicion, longitud, total, unidades=None, costo=None):
+        linea = f"{'-' if id_factura is None else id_factura}: {dia}: {posicion}: {longitud}: {total:.2f}"
+        if unidades is not None:
+            linea += f": {unidades}: {costo:.2f}"
+        return linea + "\n"
+
+    def _escribir_indice(self, entradas):
+        """Con el libro bloqueado: agrega las entradas al índice, de una vez, y las anota"""
+        with open(self.ruta_indice, "ab") as f:
+            f.write("".join(self._linea_indice(*entrada) for entrada in entradas).encode("utf-8"))
+            self._leido = f.tell()
+            self._inodo = os.fstat(f.fileno()).st_ino
+        for entrada in entradas:
+            self._anotar(*entrada)
+
+    # Escritura
+    def registrar(self, id_factura, fecha, texto, total, unidades=None, costo=None):
+        """Agrega una venta (texto del bloque sin separador) al archivo de su día (sin fsync)"""
+        dia = fecha[:10]
+        datos = texto.encode("utf-8") + _FIN_VENTA
+        with self._bloqueado():
+            with open(self.ruta_dia(dia), "ab") as f:
+                posicion = f.tell()
+                f.write(datos)
+            self._sin_sincronizar.add(dia)
+            self._escribir_indice([(id_factura, dia, posicion, len(datos), total, unidades, costo)])
+
+    def registrar_varias(self, ventas):
+        """Como registrar para muchas ventas [(id_factura, fecha, texto, total, unidades, costo)].
+
+        Abre una vez el archivo de cada día y escribe el índice de una vez,
+        después de los días (igual que registrar, ver _reparar).
+        """
+        por_dia = {}
+        for venta in ventas:
+            por_dia.setdefault(venta[1][:10], []).append(venta)
+        entradas = []
+        with self._bloqueado():
+            for dia, del_dia in por_dia.items():
+                with open(self.ruta_dia(dia), "ab") as f:
+                    posicion = f.tell()
+                    for id_factura, _, texto, total, unidades, costo in del_dia:
+                        datos = texto.encode("utf-8") + _FIN_VENTA
+                        f.write(datos)
+                        entradas.append((id_factura, dia, posicion, len(datos), total, unidades, costo))
+                        posicion += len(datos)
+                self._sin_sincronizar.add(dia)
+            self._escribir_indice(entradas)
+
+    def sincronizar(self):
+        """fsync de los archivos escritos desde la última vez"""
+        for dia in self._sin_sincronizar:
+            sincronizar_archivo(self.ruta_dia(dia))
+        sincronizar_archivo(self.ruta_indice)
+        self._sin_sincronizar = set()
+
+    # Lectura
+    def dias(self, desde=None, hasta=None):
+        """Días con ventas entre desde y hasta (YYYY-MM-DD, ambos incluidos), en orden"""
+        self._indice()
+        inicio = 0 if desde is None else bisect.bisect_left(self._orden_dias, desde)
+        fin = len(self._orden_dias) if hasta is None else bisect.bisect_right(self._orden_dias, hasta)
+        return self._orden_dias[inicio:fin]
+
+    def ventas_del_dia(self, dia):
+        """Devuelve (lista de ventas en texto, total) del día; solo lee el archivo de ese día"""
+        # Copia de las entradas: una venta que entra mientras tanto (desde otro hilo) queda para la próxima
+        entradas = list(self._indice().get(dia, ()))
+        if not entradas:
+            return [], 0.0
+        with open(self.ruta_dia(dia), "rb") as f:
+            datos = f.read()
+        ventas = []
+        for _, posicion, longitud, *_ in entradas:
+            bloque = datos[posicion:posicion + longitud - len(_FIN_VENTA)]
+            ventas.append(bloque.decode("utf-8").strip())
+        return ventas, sum(entrada[3] for entrada in entradas)
+
+    def entradas(self, dia):
+        """[(id_factura, total, unidades, costo)] de las ventas del día, según el índice"""
+        return [(entrada[0], entrada[3], entrada[4], entrada[5]) for entrada in self._indice().get(dia, ())]
+
+    def total_del_dia(self, dia):
+        return sum(entrada[3] for entrada in self._indice().get(dia, ()))
+
+    def facturas(self):
+        """Conjunto de los números de factura que hay en el libro"""
+        self._indice()
+        return set(self._facturas)
+
+    def ubicacion(self, id_factura):
+        """(dia, posición en el archivo del día) de una factura, o None si no está en el libro"""
+        self._indice()
+        ubicacion = self._facturas.get(id_factura)
+        return None if ubicacion is None else ubicacion[:2]
+
+    def venta(self, id_factura):
+        """Texto de una factura, o None si no está en el libro"""
+        self._indice()
+        ubicacion = self._facturas.get(id_factura)
+        if ubicacion is None:
+            return None
+        dia, posicion, longitud = ubicacion
+        with open(self.ruta_dia(dia), "rb") as f:
+            f.seek(posicion)
+            return f.read(longitud - len(_FIN_VENTA)).decode("utf-8").strip()
+
+    # Conversión
+    def convertir(self, ruta_ventas="ventas.txt"):
+        """Pasa las ventas de un ventas.txt al libro; devuelve cuántas se pasaron"""
+        with open(ruta_ventas, "r", encoding="utf-8") as f:
+            bloques = f.read().split(SEPARADOR_VENTA + "\n")
+        cantidad = 0
+        for bloque in bloques:
+            venta = leer_venta_texto(bloque)
+            if venta is None:
+                continue
+            id_factura, fecha, _, total, _ = venta
+            self.registrar(id_factura, fecha, bloque.strip() + "\n", total)
+            cantidad += 1
+        return cantidad
+
+    def convertir_si_hace_falta(self, ruta_ventas="ventas.txt"):
+        """Convierte ventas.txt la primera vez (si existe y el libro todavía no)"""
+        if not self.existe() and os.path.exists(ruta_ventas):
+            self.convertir(ruta_ventas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Herramientas del libro de ventas por día.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_convertir = sub.add_parser("convertir", help="pasa un ventas.txt al libro de ventas")
+    p_convertir.add_argument("--desde", default="ventas.txt", help="archivo de ventas a convertir")
+    p_convertir.add_argument("--carpeta", default="ventas", help="carpeta del libro de ventas")
+    p_convertir.add_argument("--forzar", action="store_true", help="convertir aunque el libro ya exista")
+    args = parser.parse_args(argv)
+
+    libro = LibroVentas(args.carpeta)
+    if libro.existe() and not args.forzar:
+        print(f"Error: el libro en '{args.carpeta}' ya existe. Use --forzar para agregar las ventas de todos modos.",
+              file=sys.stderr)
+        return 1
+    try:
+        cantidad = libro.convertir(args.desde)
+    except FileNotFoundError:
+        print(f"Error: no se encontró {args.desde}.", file=sys.stderr)
+        return 1
+    print(f"{cantidad} ventas pasadas a {args.carpeta}/ ({len(libro.dias())} días).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Acceso por número de línea a textos largos, sin leerlos ni partirlos enteros.
+
+LineasArchivo mapea el archivo en memoria (mmap) y va anotando dónde empieza
+cada línea a medida que se le piden líneas más adelante; abrir un archivo
+de cualquier tamaño no cuesta nada. LineasTexto ofrece lo mismo para una
+lista de líneas que ya está en memoria. Ver visor.py.
+"""
+import bisect
+import mmap
+import os
+from array import array
+
+
+class LineasArchivo:
+    """Líneas de un archivo de texto UTF-8, indexadas a pedido"""
+
+    def __init__(self, ruta):
+        with open(ruta, "rb") as f:
+            self._tamano = os.fstat(f.fileno()).st_size
+            # mmap no acepta archivos vacíos
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._tamano else None
+        self._inicios = array("q", [0] if self._tamano else [])
+        self._completo = not self._tamano
+
+    def _indexar_siguiente(self):
+        fin = self._mapa.find(b"\n", self._inicios[-1])
+        if fin == -1 or fin + 1 >= self._tamano:
+            self._completo = True
+        else:
+            self._inicios.append(fin + 1)
+
+    def existe(self, numero):
+        while numero >= len(self._inicios) and not self._completo:
+            self._indexar_siguiente()
+        return 0 <= numero < len(self._inicios)
+
+    def ultima(self):
+        """Número de la última línea (-1 si no hay ninguna)"""
+        while not self._completo:
+            self._indexar_siguiente()
+        return len(self._inicios) - 1
+
+    def linea(self, numero):
+        if not self.existe(numero):
+            raise IndexError(numero)
+        inicio = self._inicios[numero]
+        fin = self._inicios[numero + 1] if self.existe(numero + 1) else self._tamano
+        return self._mapa[inicio:fin].decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def numero_de_linea(self, posicion):
+        """Número de la línea que contiene el byte `posicion`"""
+        while not self._completo and self._inicios[-1] <= posicion:
+            self._indexar_siguiente()
+        return max(bisect.bisect_right(self._inicios, posicion) - 1, 0)
+
+    def cerrar(self):
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+
+class LineasTexto:
+    """Misma interfaz que LineasArchivo para líneas que ya están en memoria"""
+
+    def __init__(self, lineas):
+        self._lineas = list(lineas)
+
+    def existe(self, numero):
+        return 0 <= numero < len(self._lineas)
+
+    def ultima(self):
+        return len(self._lineas) - 1
+
+    def linea(self, numero):
+        return self._lineas[numero]
+
+    def cerrar(self):
+        pass
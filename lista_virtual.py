@@ -0,0 +1,135 @@
+from collections import OrderedDict
+
+import urwid
+
+
+class ListaVirtual(urwid.ListWalker):
+    """ListWalker que crea los widgets de las filas solo cuando se van a mostrar.
+
+    Recibe la lista de claves (por ejemplo los IDs de producto) y una función
+    que arma el widget de una clave. El ListBox solo pide las filas visibles,
+    así que abrir una pantalla con 100.000 productos cuesta lo mismo que con 20.
+    Los widgets ya creados se guardan en una caché LRU pequeña; mientras un
+    widget sigue vivo urwid reutiliza su canvas ya dibujado al desplazarse.
+
+    Para cambios de a una fila (una venta, un cambio de precio) están
+    actualizar, quitar y agregar: solo se vuelve a dibujar esa fila y
+    ninguna recorre la lista entera. Las filas quitadas quedan marcadas y
+    se saltan al recorrer, sin correr las posiciones de las demás.
+    """
+
+    def __init__(self, claves, crear_fila, tamano_cache=256):
+        self.claves = list(claves)
+        self.crear_fila = crear_fila
+        self.tamano_cache = tamano_cache
+        self.focus = 0
+        self._cache = OrderedDict()
+        self._presentes = set(self.claves)
+        self._quitadas = set()
+
+    def cambiar_claves(self, claves):
+        """Reemplaza las filas mostradas (por ejemplo al filtrar) y vuelve al inicio"""
+        self.claves = list(claves)
+        self._presentes = set(self.claves)
+        self._quitadas = set()
+        self.focus = 0
+        self._modified()
+
+    def actualizar(self, clave):
+        """Vuelve a crear la fila de la clave, si está a la vista, con los datos actuales"""
+        if self._cache.pop(clave, None) is not None:
+            self._modified()
+
+    def quitar(self, clave):
+        """Deja de mostrar la fila de la clave"""
+        if clave in self:
+            self._quitadas.add(clave)
+            self._cache.pop(clave, None)
+            self._modified()
+
+    def agregar(self, clave):
+        """Muestra la fila de la clave; si no estaba en la lista va al final"""
+        if clave in self._quitadas:
+            self._quitadas.discard(clave)
+        elif clave not in self._presentes:
+            self.claves.append(clave)
+            self._presentes.add(clave)
+        else:
+            return
+        self._modified()
+
+    def __contains__(self, clave):
+        return clave in self._presentes and clave not in self._quitadas
+
+    def __len__(self):
+        return len(self.claves) - len(self._quitadas)
+
+    def _visible(self, posicion):
+        return 0 <= posicion < len(self.claves) and self.claves[posicion] not in self._quitadas
+
+    def __getitem__(self, posicion):
+        if not self._visible(posicion):
+            raise IndexError(posicion)
+        clave = self.claves[posicion]
+        widget = self._cache.get(clave)
+        if widget is None:
+            widget = self.crear_fila(clave)
+            self._cache[clave] = widget
+            if len(self._cache) > self.tamano_cache:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(clave)
+        return widget
+
+    def next_position(self, posicion):
+        siguiente = posicion + 1
+        while siguiente < len(self.claves) and self.claves[siguiente] in self._quitadas:
+            siguiente += 1
+        if siguiente >= len(self.claves):
+            raise IndexError(posicion)
+        return siguiente
+
+    def prev_position(self, posicion):
+        anterior = posicion - 1
+        while anterior >= 0 and self.claves[anterior] in self._quitadas:
+            anterior -= 1
+        if anterior < 0:
+            raise IndexError(posicion)
+        return anterior
+
+    def positions(self, reverse=False):
+        posiciones = range(len(self.claves) - 1, -1, -1) if reverse else range(len(self.claves))
+        if not self._quitadas:
+            return posiciones
+        return (posicion for posicion in posiciones if self.claves[posicion] not in self._quitadas)
+
+    def set_focus(self, posicion):
+        self.focus = posicion
+        self._modified()
+
+    def get_focus(self):
+        if not self._visible(self.focus):
+            # La fila con el foco se quitó: pasa a la siguiente (o a la anterior si era la última)
+            for mover in (self.next_position, self.prev_position):
+                try:
+                    self.focus = mover(self.focus)
+                    break
+                except IndexError:
+                    pass
+            else:
+                return None, None
+        return self[self.focus], self.focus
+
+    def get_next(self, posicion):
+        try:
+            posicion = self.next_position(posicion)
+        except IndexError:
+            return None, None
+        return self[posicion], posicion
+
+    def get_prev(self, posicion):
+        try:
+            posicion = self.prev_position(posicion)
+        except IndexError:
+            return None, None
+        return self[posicion], posicion
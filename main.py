@@ -1,15 +1,25 @@
-import urwid
+import asyncio
+import importlib
 
 import urwid
-from admin import AdminView
-from vendedor import VendedorView
-from domiciliario import DomiciliarioView
+from metricas import Volcado
+from servicio import ServicioDatos
+from tareas import Tareas
+
+# Vista de cada rol: (módulo, clase). Se importan recién al entrar con ese rol,
+# así el login aparece sin cargar tkinter, reportlab ni el almacén (ver medir_arranque.py)
+vistas_por_rol = {
+    "admin": ("admin", "AdminView"),
+    "vendedor": ("vendedor", "VendedorView"),
+    "domiciliario": ("domiciliario", "DomiciliarioView"),
+}
 
 # Datos de cuentas válidas (simuladas)
 cuentas_validas = [
     {"usuario": "admin", "contraseña": "123", "rol": "admin"},
     {"usuario": "vendedor", "contraseña": "456", "rol": "vendedor"},
-    {"usuario": "domiciliario", "contraseña": "456", "rol": "domiciliario"}
+    {"usuario": "domiciliario", "contraseña": "456", "rol": "domiciliario"},
+    {"usuario": "domiciliario2", "contraseña": "456", "rol": "domiciliario"}
 ]
 
 # Paleta de colores
@@ -48,38 +58,77 @@ class LoginView(urwid.WidgetWrap):
         # Verificar credenciales
         for cuenta in cuentas_validas:
             if cuenta["usuario"] == usuario and cuenta["contraseña"] == contraseña:
-                self.main.mostrar_menu(cuenta["rol"])
+                self.main.mostrar_menu(cuenta["rol"], cuenta["usuario"])
                 return
         
         self.error.set_text(('error', "Credenciales incorrectas. Intente nuevamente"))
         self.usuario.set_edit_text("")
         self.contraseña.set_edit_text("")
 
+class LoopPrincipal(urwid.MainLoop):
+    """MainLoop que deja a la vista, debajo de cualquier pantalla, la línea de tareas en segundo plano"""
+
+    def __init__(self, widget, pie, *args, **kwargs):
+        self._marco = urwid.Frame(widget, footer=pie)
+        super().__init__(self._marco, *args, **kwargs)
+
+    # Las vistas siguen usando loop.widget como antes; la línea de tareas queda fija
+    @property
+    def widget(self):
+        return self._marco.body
+
+    @widget.setter
+    def widget(self, widget):
+        self._marco.body = widget
+
+
 class MainApp:
     def __init__(self):
+        self.usuario = None  # Quién entró (los domiciliarios se distinguen por usuario)
         self.login_view = LoginView(self)
-        self.loop = urwid.MainLoop(
+        self.loop_asyncio = asyncio.new_event_loop()
+        pie = urwid.Text("")
+        self.loop = LoopPrincipal(
             self.login_view,
+            pie,
             palette,
+            event_loop=urwid.AsyncioEventLoop(loop=self.loop_asyncio),
             unhandled_input=lambda k: exit_program(None) if k in ('q', 'Q') else None
         )
+        self.tareas = Tareas(self.loop, self.loop_asyncio, pie)
+        self.servicio = ServicioDatos(self.loop)
+        self.volcado = Volcado(self.loop)  # Tiempos de las pantallas a config.RUTA_METRICAS
+        self.vistas = {}  # (rol, usuario) -> pantalla ya armada, para volver a ella sin releer nada
         self.mostrar_login()
 
     def mostrar_login(self):
         self.loop.widget = self.login_view
 
-    def mostrar_menu(self, rol):
-        if rol == "admin":
-            self.loop.widget = AdminView(self)
-        elif rol == "vendedor":
-            self.loop.widget = VendedorView(self)
-        elif rol == "domiciliario":
-            self.loop.widget = DomiciliarioView(self)
+    def mostrar_menu(self, rol, usuario=None):
+        self.usuario = usuario
+        vista = self.vistas.get((rol, usuario))
+        if vista is not None:
+            vista.reanudar()
+            return
+        modulo, clase = vistas_por_rol[rol]
+        try:
+            vista = getattr(importlib.import_module(modulo), clase)
+        except ImportError as error:
+            # Falta una dependencia de este rol: los demás siguen funcionando
+            self.login_view.error.set_text(('error', f"No se puede abrir el rol {rol}: falta {error.name}"))
+            return
+        self.vistas[(rol, usuario)] = vista = vista(self)
+        self.loop.widget = vista
 
 def exit_program(button):
     raise urwid.ExitMainLoop()
 
 if __name__ == '__main__':
     app = MainApp()
-    app.loop.run()
+    try:
+        app.loop.run()
+    finally:
+        app.volcado.cerrar()
+        app.tareas.cerrar()
+        app.servicio.cerrar()
 
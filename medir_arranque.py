@@ -0,0 +1,87 @@
+"""Mide cuánto tarda en aparecer el login y falla si se pasa del presupuesto.
+
+    python medir_arranque.py [--presupuesto 500] [--veces 5]
+
+Arranca un intérprete nuevo varias veces; en cada uno importa main y crea
+MainApp (todo lo que pasa antes de dibujar el login) y toma la mediana del
+tiempo total, contando el arranque de Python. También revisa que antes del
+login no se haya cargado nada que solo usa algún rol (tkinter, reportlab,
+las vistas, el almacén). Sale con código 1 si algo de eso falla, así se
+puede usar como control antes de publicar un cambio.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PRESUPUESTO_MS = 500
+
+# Módulos que no tienen que estar cargados cuando aparece el login
+MODULOS_PROHIBIDOS = ("tkinter", "reportlab", "admin", "vendedor", "domiciliario",
+                      "almacen", "almacen_sqlite", "facturas")
+
+_HIJO = """
+import json, sys, time
+inicio = time.perf_counter()
+import main
+main.MainApp()
+fin = time.perf_counter()
+print(json.dumps({"app_ms": (fin - inicio) * 1000,
+                  "cargados": [m for m in %r if m in sys.modules or any(n.startswith(m + ".") for n in sys.modules)]}))
+"""
+
+
+def medir_una_vez(carpeta):
+    inicio = time.perf_counter()
+    salida = subprocess.run([sys.executable, "-c", _HIJO % (MODULOS_PROHIBIDOS,)], cwd=carpeta,
+                            capture_output=True, text=True, check=True).stdout
+    total = (time.perf_counter() - inicio) * 1000
+    datos = json.loads(salida.strip().splitlines()[-1])
+    return total, datos["app_ms"], datos["cargados"]
+
+
+def modulos_mas_lentos(carpeta, cantidad=10):
+    """Los módulos que más tardan en importarse (python -X importtime), con su tiempo acumulado en ms"""
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=carpeta,
+                            capture_output=True, text=True).stderr
+    tiempos = []
+    for linea in salida.splitlines():
+        partes = linea.split("|")
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            tiempos.append((int(partes[1]) / 1000, partes[2].strip()))
+    return sorted(tiempos, reverse=True)[:cantidad]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controla el tiempo de arranque hasta el login.")
+    parser.add_argument("--presupuesto", type=float, default=PRESUPUESTO_MS, help="máximo en milisegundos")
+    parser.add_argument("--veces", type=int, default=5, help="arranques a medir (se toma la mediana)")
+    args = parser.parse_args(argv)
+
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    medidas = [medir_una_vez(carpeta) for _ in range(args.veces)]
+    total = statistics.median(medida[0] for medida in medidas)
+    app = statistics.median(medida[1] for medida in medidas)
+    cargados = sorted({modulo for medida in medidas for modulo in medida[2]})
+
+    print(f"Arranque hasta el login: {total:.0f} ms (import main + MainApp: {app:.0f} ms), "
+          f"presupuesto {args.presupuesto:.0f} ms")
+    print("Módulos más lentos de importar:")
+    for ms, modulo in modulos_mas_lentos(carpeta):
+        print(f"  {ms:8.1f} ms  {modulo}")
+
+    fallo = False
+    if cargados:
+        print(f"ERROR: se cargan antes del login: {', '.join(cargados)}")
+        fallo = True
+    if total > args.presupuesto:
+        print(f"ERROR: el arranque se pasa del presupuesto por {total - args.presupuesto:.0f} ms")
+        fallo = True
+    return 1 if fallo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
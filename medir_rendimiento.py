@@ -0,0 +1,320 @@
+"""Mide los caminos más usados de la tienda con datos generados, sin interfaz.
+
+    python medir_rendimiento.py [--productos 10000] [--ventas 100000] [--dias 30] [--pedidos 2000]
+                                [--veces 200] [--almacen texto|sqlite] [--salida -]
+                                [--comparar anterior.json] [--tolerancia 1.25] [--conservar]
+
+Arma una carpeta temporal con un inventario.txt de --productos productos,
+un ventas.txt con --ventas ventas repartidas en los últimos --dias días,
+una cola pedidosDom.txt con --pedidos pedidos y el historial de cierres en
+diario/, y ahí mide lo mismo que hacen las pantallas:
+
+    cargar_inventario       leer el inventario (texto y foto binaria, o la base)
+    abrir_almacen           abrir el almacén (la primera vez pasa ventas.txt al libro)
+    importar_pedido         cargar un pedido de proveedor (agregar productos desde un pedido)
+    procesar_venta          confirmar una venta de mostrador (motor_ventas.confirmar)
+    cerrar_caja             escribir el cierre del día con más ventas
+    filtrar_ventas_por_fecha  totales de un rango de fechas (resumen precalculado)
+    reporte_ventas          el reporte de texto de una semana
+    agendar_pedido          armar un lote de pedidos a domicilio
+    generar_factura_pdf     el PDF de una factura (se omite si falta reportlab)
+
+El resultado es un JSON con la mediana, el p95 y el máximo en ms de cada
+operación, los parámetros y el commit, que va a --salida (por defecto a
+la salida estándar; la tabla legible va a stderr). Guardado por commit se
+compara con --comparar: sale con código 1 si alguna operación quedó más
+lenta que la tolerancia, así que, como medir_arranque.py, sirve de
+control antes de publicar. Los datos se generan siempre iguales (semilla
+fija) para que dos corridas sean comparables.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SEMILLA = 20240501
+# Diferencias menores que esto (en ms) son ruido aunque la proporción sea grande
+RUIDO_MS = 0.05
+
+
+def _percentil(ordenados, porcentaje):
+    return ordenados[max(0, min(len(ordenados) - 1, math.ceil(porcentaje / 100 * len(ordenados)) - 1))]
+
+
+def resumir(tiempos):
+    """Estadísticas de una lista de tiempos en segundos"""
+    ordenados = sorted(tiempos)
+    return {
+        "veces": len(ordenados),
+        "mediana_ms": round(_percentil(ordenados, 50) * 1000, 4),
+        "p95_ms": round(_percentil(ordenados, 95) * 1000, 4),
+        "max_ms": round(ordenados[-1] * 1000, 4),
+        "total_s": round(sum(ordenados), 4),
+    }
+
+
+def medir(resultados, nombre, funcion, veces=1, preparar=None):
+    """Corre funcion(*preparar(i)) `veces` veces y guarda el resumen; devuelve el último resultado"""
+    tiempos = []
+    resultado = None
+    for vez in range(veces):
+        argumentos = preparar(vez) if preparar else ()
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos)
+        tiempos.append(time.perf_counter() - inicio)
+    resultados[nombre] = resumir(tiempos)
+    print(f"  {nombre:<26} {resultados[nombre]['mediana_ms']:10.3f} ms  (p95 {resultados[nombre]['p95_ms']:.3f}, "
+          f"{veces} veces)", file=sys.stderr)
+    return resultado
+
+
+# Generadores de datos
+def generar_inventario(ruta, cantidad, azar):
+    """inventario.txt con `cantidad` productos; devuelve {id: (nombre, precio_compra, precio_venta)}"""
+    productos = {}
+    with open(ruta, "w", encoding="utf-8") as f:
+        for numero in range(1, cantidad + 1):
+            precio_compra = round(azar.uniform(0.5, 50), 2)
+            precio_venta = round(precio_compra * 1.5, 2)
+            nombre = f"Producto {numero:07d}"
+            productos[str(numero)] = (nombre, precio_compra, precio_venta)
+            f.write(f"{numero}: {nombre}: {precio_compra}: {precio_venta}: {azar.randint(10**6, 2 * 10**6)}\n")
+    return productos
+
+
+def items_al_azar(productos, ids, azar, maximo=4):
+    items = []
+    for id_producto in azar.sample(ids, azar.randint(1, maximo)):
+        nombre, precio_compra, precio_venta = productos[id_producto]
+        items.append({"id": id_producto, "nombre": nombre, "precio_venta": precio_venta,
+                      "precio_compra": precio_compra, "cantidad": azar.randint(1, 3)})
+    return items
+
+
+def generar_ventas(ruta, productos, cantidad, dias, azar):
+    """ventas.txt (el formato de siempre) con `cantidad` ventas en orden, repartidas en los días dados"""
+    from almacen import texto_venta
+    from libro_ventas import SEPARADOR_VENTA
+    ids = list(productos)
+    bloques = []
+    with open(ruta, "w", encoding="utf-8") as f:
+        for numero in range(1, cantidad + 1):
+            dia = dias[(numero - 1) * len(dias) // cantidad]
+            fecha = f"{dia} {8 + (numero * 11) % 12:02d}:{numero % 60:02d}:{(numero * 7) % 60:02d}"
+            items = items_al_azar(productos, ids, azar)
+            descuento = 10 if numero % 10 == 0 else 0
+            total = sum(item["precio_venta"] * item["cantidad"] for item in items) * (1 - descuento / 100)
+            bloques.append(texto_venta(numero, fecha, descuento, items, total) + SEPARADOR_VENTA + "\n")
+            if len(bloques) >= 10000:
+                f.write("".join(bloques))
+                bloques = []
+        f.write("".join(bloques))
+    # Los números ya usados no se vuelven a repartir (ver numeracion.py)
+    with open("ultima_factura.txt", "w", encoding="utf-8") as f:
+        f.write(str(cantidad))
+
+
+def generar_pedidos(ruta, productos, cantidad, azar):
+    """pedidosDom.txt con `cantidad` pedidos a domicilio en direcciones de la grilla (ver rutas.py)"""
+    from almacen import texto_pedido_domicilio
+    from libro_ventas import SEPARADOR_VENTA
+    ids = list(productos)
+    inicio = datetime.now() - timedelta(hours=2)
+    with open(ruta, "w", encoding="utf-8") as f:
+        for numero in range(cantidad):
+            direccion = f"{azar.choice(('Calle', 'Carrera'))} {azar.randint(1, 120)} # {azar.randint(1, 120)}-{azar.randint(1, 99)}"
+            fecha = (inicio + timedelta(seconds=numero)).strftime("%Y-%m-%d %H:%M:%S")
+            texto = texto_pedido_domicilio(f"Cliente {numero}", direccion, items_al_azar(productos, ids, azar, 3), fecha)
+            f.write(texto + "\n" + SEPARADOR_VENTA + "\n")
+
+
+def generar_pedido_proveedor(productos, cantidad, azar):
+    """Líneas de un pedido de proveedor: la mitad productos que ya existen, la mitad nuevos"""
+    lineas = []
+    for numero in range(cantidad):
+        if numero % 2:
+            nombre, precio_compra, _ = productos[azar.choice(list(productos))]
+        else:
+            nombre, precio_compra = f"Nuevo {azar.random():.12f}", round(azar.uniform(0.5, 50), 2)
+        lineas.append(f"{nombre}: {precio_compra}: {azar.randint(1, 100)}\n")
+    return lineas
+
+
+def abrir(tipo):
+    if tipo == "sqlite":
+        from almacen_sqlite import AlmacenSQLite
+        return AlmacenSQLite("tienda.db")
+    from almacen import AlmacenTexto
+    return AlmacenTexto()
+
+
+def correr(args):
+    """Genera los datos en la carpeta actual y mide; devuelve {operación: resumen}"""
+    import config
+    import motor_ventas
+    azar = random.Random(SEMILLA)
+    resultados = {}
+    hoy = datetime.now().date()
+    dias = [(hoy - timedelta(days=atras)).strftime("%Y-%m-%d") for atras in range(args.dias - 1, -1, -1)]
+
+    inicio = time.perf_counter()
+    productos = generar_inventario("inventario.txt", args.productos, azar)
+    generar_ventas("ventas.txt", productos, args.ventas, dias, azar)
+    generar_pedidos("pedidosDom.txt", productos, args.pedidos, azar)
+    print(f"Datos generados en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+
+    if args.almacen == "texto":
+        from inventario import Inventario, ruta_binaria
+
+        def cargar_texto():
+            if os.path.exists(ruta_binaria("inventario.txt")):
+                os.remove(ruta_binaria("inventario.txt"))
+            return Inventario("inventario.txt")
+        medir(resultados, "cargar_inventario_texto", lambda: cargar_texto().cerrar(), 3)
+        medir(resultados, "cargar_inventario", lambda: Inventario("inventario.txt").cerrar(), 3)
+        almacen = medir(resultados, "convertir_ventas", lambda: abrir("texto"))
+    else:
+        from almacen_sqlite import migrar
+        almacen = abrir("sqlite")
+        medir(resultados, "migrar", lambda: migrar(almacen))
+        medir(resultados, "cargar_inventario", almacen.inventario.cargar, 3)
+    almacen.cerrar()
+    almacen = medir(resultados, "abrir_almacen", lambda: abrir(args.almacen))
+
+    try:
+        # Historial de cierres: todos los días anteriores ya tienen su archivo en diario/
+        for dia in dias[:-1]:
+            motor_ventas.cerrar_caja(almacen, dia)
+
+        ids = list(productos)
+        medir(resultados, "importar_pedido", almacen.inventario.importar_pedido, 5,
+              lambda vez: (generar_pedido_proveedor(productos, 1000, azar),))
+        medir(resultados, "procesar_venta", motor_ventas.confirmar, args.veces,
+              lambda vez: (almacen, items_al_azar(productos, ids, azar), 10 if vez % 10 == 0 else 0))
+        mas_ventas = max(dias, key=lambda dia: len(almacen.ventas_del_dia(dia)[0]))
+        medir(resultados, "cerrar_caja", motor_ventas.cerrar_caja, 5, lambda vez: (almacen, mas_ventas))
+
+        def rango(vez):
+            desde = azar.randrange(len(dias))
+            hasta = azar.randrange(desde, len(dias))
+            return (datetime.strptime(dias[desde], "%Y-%m-%d"), datetime.strptime(dias[hasta], "%Y-%m-%d"))
+        medir(resultados, "filtrar_ventas_por_fecha", almacen.resumen_ventas, args.veces, rango)
+        semana = (datetime.strptime(dias[max(0, len(dias) - 7)], "%Y-%m-%d"), datetime.strptime(dias[-1], "%Y-%m-%d"))
+        medir(resultados, "reporte_ventas", almacen.reporte_ventas, 3, lambda vez: semana)
+        lotes = max(1, min(args.veces, args.pedidos // max(1, config.PEDIDOS_POR_LOTE) - 1))
+        medir(resultados, "agendar_pedido", almacen.agendar_pedidos, lotes)
+
+        try:
+            import facturas
+        except ImportError as error:
+            resultados["generar_factura_pdf"] = {"omitido": f"falta {error.name}"}
+            print(f"  generar_factura_pdf omitido: falta {error.name}", file=sys.stderr)
+        else:
+            facturas_azar = azar.sample(range(1, args.ventas + 1), min(10, args.ventas))
+            medir(resultados, "generar_factura_pdf", facturas.pdf_de_factura, len(facturas_azar),
+                  lambda vez: (almacen, facturas_azar[vez]))
+    finally:
+        almacen.cerrar()
+    return resultados
+
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(anterior, actual, tolerancia):
+    """Imprime la comparación por operación; devuelve las que quedaron más lentas que la tolerancia"""
+    lentas = []
+    print(f"Comparado con {anterior.get('commit') or 'la corrida anterior'}:", file=sys.stderr)
+    for nombre, datos in actual["operaciones"].items():
+        antes = anterior.get("operaciones", {}).get(nombre)
+        if not antes or "mediana_ms" not in antes or "mediana_ms" not in datos:
+            continue
+        proporcion = datos["mediana_ms"] / antes["mediana_ms"] if antes["mediana_ms"] else 1.0
+        marca = ""
+        if proporcion > tolerancia and datos["mediana_ms"] - antes["mediana_ms"] > RUIDO_MS:
+            lentas.append(nombre)
+            marca = "  <-- más lenta"
+        print(f"  {nombre:<26} {antes['mediana_ms']:10.3f} -> {datos['mediana_ms']:10.3f} ms  x{proporcion:.2f}{marca}",
+              file=sys.stderr)
+    return lentas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide los caminos más usados con datos generados.")
+    parser.add_argument("--productos", type=int, default=10000, help="productos del inventario")
+    parser.add_argument("--ventas", type=int, default=100000, help="ventas del historial")
+    parser.add_argument("--dias", type=int, default=30, help="días en los que se reparten las ventas")
+    parser.add_argument("--pedidos", type=int, default=2000, help="pedidos a domicilio en la cola")
+    parser.add_argument("--veces", type=int, default=200, help="repeticiones de las operaciones rápidas")
+    parser.add_argument("--almacen", choices=("texto", "sqlite"), default="texto", help="almacén a medir")
+    parser.add_argument("--salida", default="-", help="archivo JSON de resultados (- para la salida estándar)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=1.25,
+                        help="cuántas veces más lenta puede quedar una operación antes de fallar")
+    parser.add_argument("--conservar", action="store_true", help="no borrar la carpeta con los datos generados")
+    args = parser.parse_args(argv)
+    if args.productos < 4 or args.ventas < 1 or args.dias < 1:
+        parser.error("hacen falta al menos 4 productos, 1 venta y 1 día")
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+    salida = args.salida if args.salida == "-" else os.path.abspath(args.salida)
+
+    # Los almacenes usan rutas relativas: se trabaja dentro de la carpeta temporal
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    carpeta = tempfile.mkdtemp(prefix="rendimiento_")
+    anterior_cwd = os.getcwd()
+    os.chdir(carpeta)
+    try:
+        operaciones = correr(args)
+    finally:
+        os.chdir(anterior_cwd)
+        if args.conservar:
+            print(f"Datos en {carpeta}", file=sys.stderr)
+        else:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    actual = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "almacen": args.almacen,
+        "parametros": {"productos": args.productos, "ventas": args.ventas, "dias": args.dias,
+                       "pedidos": args.pedidos, "veces": args.veces},
+        "operaciones": operaciones,
+    }
+    texto = json.dumps(actual, indent=2, ensure_ascii=False)
+    if salida == "-":
+        print(texto)
+    else:
+        with open(salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+
+    if anterior is not None:
+        if anterior.get("parametros") != actual["parametros"] or anterior.get("almacen") != args.almacen:
+            print("Aviso: la corrida anterior usó otros parámetros; la comparación es orientativa.", file=sys.stderr)
+        lentas = comparar(anterior, actual, args.tolerancia)
+        if lentas:
+            print(f"ERROR: más lentas que x{args.tolerancia}: {', '.join(lentas)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Tiempos de las pantallas, medidos siempre (también en la tienda).
+
+Cada botón de AdminView, VendedorView y DomiciliarioView (los métodos
+cuyo primer argumento es `button`, ver instrumentar) y las operaciones
+con archivos marcadas con @medido anotan aquí cuántas veces se llamaron,
+cuánto tardaron y cuántos bytes leyó y escribió el proceso mientras
+tanto. De cada operación se guardan solo las últimas MUESTRAS duraciones
+(un buffer circular), así que la memoria no crece y los percentiles
+p50/p95/p99 son de lo reciente.
+
+Anotar cuesta dos perf_counter y, en Linux, dos lecturas de
+/proc/self/io (unos microsegundos): se puede dejar siempre prendido.
+Los bytes son los de todo el proceso, así que incluyen lo que hacen
+otros hilos al mismo tiempo; en sistemas sin /proc no se cuentan.
+
+main.py vuelca un resumen cada config.VOLCAR_METRICAS_S segundos, una
+línea JSON por vez, en config.RUTA_METRICAS; el administrador los ve en
+vivo en "Rendimiento". Con TIENDA_METRICAS=0 no se mide nada.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+import config
+
+# Duraciones que se guardan por operación para los percentiles
+MUESTRAS = 1000
+
+
+def _abrir_io():
+    try:
+        return os.open("/proc/self/io", os.O_RDONLY)
+    except OSError:
+        return None
+
+
+_io = _abrir_io()
+_leido_propio = 0  # Lo que se leyó de /proc/self/io, que no es de la tienda
+
+
+def bytes_del_proceso():
+    """(bytes leídos, bytes escritos) desde que arrancó el proceso, o None si no se pueden saber"""
+    global _leido_propio
+    if _io is None:
+        return None
+    # rchar y wchar son las dos primeras líneas; pread vuelve a generar el archivo
+    datos = os.pread(_io, 256, 0)
+    lineas = datos.split(b"\n", 2)
+    leidos = int(lineas[0].split()[1]) - _leido_propio
+    _leido_propio += len(datos)
+    return leidos, int(lineas[1].split()[1])
+
+
+def tamano(cantidad):
+    """Bytes en B, KB o MB para mostrar"""
+    if cantidad < 1024:
+        return f"{cantidad} B"
+    if cantidad < 1024 * 1024:
+        return f"{cantidad / 1024:.1f} KB"
+    return f"{cantidad / (1024 * 1024):.1f} MB"
+
+
+def percentil(ordenados, porcentaje):
+    return ordenados[max(0, min(len(ordenados) - 1, -(-porcentaje * len(ordenados) // 100) - 1))]
+
+
+class Medida:
+    """Lo acumulado de una operación"""
+
+    __slots__ = ("veces", "total_s", "leidos", "escritos", "ultimas")
+
+    def __init__(self):
+        self.veces = 0
+        self.total_s = 0.0
+        self.leidos = 0
+        self.escritos = 0
+        self.ultimas = deque(maxlen=MUESTRAS)  # Duraciones en segundos
+
+
+class Metricas:
+    def __init__(self):
+        self.medidas = {}
+        self.widgets = None  # Widgets en pantalla en el último recuento
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre, segundos, leidos=0, escritos=0):
+        with self._lock:
+            medida = self.medidas.get(nombre)
+            if medida is None:
+                medida = self.medidas[nombre] = Medida()
+            medida.veces += 1
+            medida.total_s += segundos
+            medida.leidos += leidos
+            medida.escritos += escritos
+            medida.ultimas.append(segundos)
+
+    def resumen(self):
+        """{operación: {veces, p50_ms, p95_ms, p99_ms, max_ms, leidos, escritos}}, las que más tiempo llevan primero"""
+        with self._lock:
+            copias = [(nombre, medida.veces, medida.total_s, medida.leidos, medida.escritos, sorted(medida.ultimas))
+                      for nombre, medida in self.medidas.items()]
+        copias.sort(key=lambda copia: copia[2], reverse=True)
+        return {nombre: {
+            "veces": veces,
+            "p50_ms": round(percentil(ultimas, 50) * 1000, 3),
+            "p95_ms": round(percentil(ultimas, 95) * 1000, 3),
+            "p99_ms": round(percentil(ultimas, 99) * 1000, 3),
+            "max_ms": round(ultimas[-1] * 1000, 3),
+            "total_s": round(total_s, 3),
+            "leidos": leidos,
+            "escritos": escritos,
+        } for nombre, veces, total_s, leidos, escritos, ultimas in copias}
+
+    def volcar(self, ruta=None):
+        """Agrega una línea JSON con el resumen al archivo de métricas (si se midió algo)"""
+        operaciones = self.resumen()
+        if not operaciones:
+            return
+        linea = {"fecha": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid(),
+                 "widgets": self.widgets, "operaciones": operaciones}
+        with open(ruta or config.RUTA_METRICAS, "a", encoding="utf-8") as f:
+            f.write(json.dumps(linea, ensure_ascii=False) + "\n")
+
+
+registro = Metricas()
+
+
+def medido(nombre=None):
+    """Decorador: anota en el registro la duración y los bytes de cada llamada"""
+    def decorar(funcion):
+        if not config.METRICAS:
+            return funcion
+        etiqueta = nombre or funcion.__qualname__
+
+        @wraps(funcion)
+        def medida(*args, **kwargs):
+            antes = bytes_del_proceso()
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                segundos = time.perf_counter() - inicio
+                if antes is None:
+                    registro.registrar(etiqueta, segundos)
+                else:
+                    despues = bytes_del_proceso()
+                    registro.registrar(etiqueta, segundos, despues[0] - antes[0], despues[1] - antes[1])
+        medida.medido = True
+        return medida
+    return decorar
+
+
+def instrumentar(clase):
+    """Decorador de clase: mide todos los métodos que reciben un botón (los callbacks de urwid)"""
+    for nombre, funcion in list(vars(clase).items()):
+        codigo = getattr(funcion, "__code__", None)
+        if codigo is None or getattr(funcion, "medido", False) or codigo.co_argcount < 2:
+            continue
+        if codigo.co_varnames[1] == "button":
+            setattr(clase, nombre, medido(f"{clase.__name__}.{nombre}")(funcion))
+    return clase
+
+
+def contar_widgets(widget):
+    """Widgets vivos debajo de `widget` (de una lista virtual, solo los que están armados)"""
+    import urwid
+    vistos = set()
+    pendientes = [widget]
+    while pendientes:
+        actual = pendientes.pop()
+        if actual is None or id(actual) in vistos:
+            continue
+        vistos.add(id(actual))
+        if isinstance(actual, urwid.WidgetWrap):
+            pendientes.append(actual._w)
+        elif isinstance(actual, urwid.WidgetDecoration):
+            pendientes.append(actual.original_widget)
+        elif isinstance(actual, urwid.ListBox):
+            cuerpo = actual.body
+            if isinstance(cuerpo, list):
+                pendientes.extend(cuerpo)
+            else:
+                pendientes.extend(getattr(cuerpo, "_cache", {}).values())  # ListaVirtual
+                pendientes.append(actual.focus)
+        elif hasattr(actual, "contents"):  # Pile, Columns, Frame, Overlay
+            contenido = actual.contents
+            for hijo, _ in (contenido.values() if hasattr(contenido, "values") else contenido):
+                pendientes.append(hijo)
+    return len(vistos)
+
+
+class Volcado:
+    """Alarma del loop que cuenta los widgets en pantalla y vuelca el resumen cada tanto"""
+
+    def __init__(self, loop, ruta=None, cada=None):
+        self.loop = loop
+        self.ruta = ruta
+        self.cada = config.VOLCAR_METRICAS_S if cada is None else cada
+        self._alarma = None
+        if config.METRICAS and self.cada > 0:
+            self._programar()
+
+    def _programar(self):
+        self._alarma = self.loop.set_alarm_in(self.cada, self._volcar)
+
+    def _volcar(self, loop=None, user_data=None):
+        self.volcar()
+        self._programar()
+
+    def volcar(self):
+        registro.widgets = contar_widgets(self.loop.widget)
+        try:
+            registro.volcar(self.ruta)
+        except OSError:
+            pass  # Mejor perder métricas que cortar una venta
+
+    def cerrar(self):
+        """Deja de programar y vuelca lo último"""
+        if self._alarma is not None:
+            self.loop.remove_alarm(self._alarma)
+            self._alarma = None
+            self.volcar()
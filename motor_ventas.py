@@ -0,0 +1,155 @@
+"""Reglas de una venta, sin pantalla: carrito, descuento y confirmación.
+
+La caja (vendedor.py, una venta por vez, y el cierre del día) y la carga de ventas desde un
+archivo (importar_ventas.py, miles de ventas de una tienda web o de una
+caja sin conexión) usan estas mismas funciones, así que una venta cargada
+de un archivo queda igual que una hecha a mano.
+
+Los errores que se pueden mostrar al usuario son VentaInvalida, con el
+mensaje ya escrito.
+"""
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from almacen import texto_cierre_caja
+
+
+class VentaInvalida(ValueError):
+    """Datos de una venta que no se pueden usar (el mensaje es para mostrar)"""
+
+
+def item_venta(producto, id_producto, cantidad, precio_venta=None):
+    """Línea del carrito, con el formato que guardan los almacenes"""
+    return {
+        'id': id_producto,
+        'nombre': producto.nombre,
+        'precio_venta': producto.precio_venta if precio_venta is None else precio_venta,
+        'precio_compra': producto.precio_compra,
+        'cantidad': cantidad,
+    }
+
+
+class Carrito:
+    """Productos de la venta en curso"""
+
+    def __init__(self):
+        self.items = []
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def agregar(self, productos, id_producto, cantidad):
+        """Suma `cantidad` del producto (productos es el dict del inventario)"""
+        if cantidad <= 0:
+            raise VentaInvalida("Cantidad inválida")
+        producto = productos[id_producto]
+        item = next((item for item in self.items if item['id'] == id_producto), None)
+        en_carrito = item['cantidad'] if item is not None else 0
+        if en_carrito + cantidad > producto.cantidad:
+            raise VentaInvalida("Cantidad excede el inventario")
+        if item is not None:
+            item['cantidad'] += cantidad
+        else:
+            self.items.append(item_venta(producto, id_producto, cantidad))
+
+    def total(self):
+        return sum(item['cantidad'] * item['precio_venta'] for item in self.items)
+
+    def vaciar(self):
+        self.items = []
+
+
+def leer_descuento(texto):
+    """Porcentaje de descuento escrito por el usuario (0 a 100)"""
+    try:
+        descuento = float(texto)
+    except (TypeError, ValueError):
+        descuento = -1
+    if not 0 <= descuento <= 100:
+        raise VentaInvalida("Descuento inválido. Debe ser un número entre 0 y 100.")
+    return descuento
+
+
+def total_con_descuento(items, descuento):
+    return sum(item['cantidad'] * item['precio_venta'] for item in items) * (1 - descuento / 100)
+
+
+def ahora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def confirmar(almacen, items, descuento, cliente=None, fecha=None):
+    """Descuenta el stock y registra la venta (ver almacen.confirmar_venta).
+
+    Devuelve (id_factura, fecha, total con descuento). Lanza
+    StockInsuficiente o KeyError si otra caja se llevó el stock o borró un
+    producto mientras tanto; en ese caso no cambia nada.
+    """
+    fecha = fecha or ahora()
+    total = total_con_descuento(items, descuento)
+    return almacen.confirmar_venta(fecha, descuento, items, total, cliente), fecha, total
+
+
+def cerrar_caja(almacen, dia=None, carpeta="diario"):
+    """Escribe las ventas del día (YYYY-MM-DD, hoy si no se da) en diario/; devuelve el mensaje para mostrar"""
+    dia = dia or datetime.now().strftime("%Y-%m-%d")
+    try:
+        ventas_del_dia, total_ventas_dia = almacen.ventas_del_dia(dia)
+    except FileNotFoundError:
+        ventas_del_dia = None
+    if not ventas_del_dia:
+        return "No hay ventas registradas hoy."
+    os.makedirs(carpeta, exist_ok=True)
+    nombre_archivo = f"{carpeta}/ventas_dia_{dia}.txt"
+    with open(nombre_archivo, "w", encoding="utf-8") as f:
+        f.write(texto_cierre_caja(ventas_del_dia, total_ventas_dia))
+    return f"Caja cerrada. Ventas guardadas en {nombre_archivo}."
+
+
+@lru_cache(maxsize=4096)
+def _fecha_valida(fecha):
+    """strptime es lento y en un archivo de ventas las fechas se repiten mucho"""
+    try:
+        datetime.strptime(fecha, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def armar_venta(productos, datos):
+    """Venta lista para almacen.confirmar_ventas desde un dict leído de un archivo.
+
+    datos tiene "items" ([{"id", "cantidad", y opcional "precio_venta"}]) y
+    opcionales "fecha" (YYYY-MM-DD HH:MM:SS, si no la hora actual),
+    "descuento" (porcentaje) y "cliente" ([nombre, dirección], ventas a
+    domicilio). Los precios que faltan salen del inventario. No revisa el
+    stock: eso lo hace el almacén al confirmar, con todas las ventas juntas.
+    """
+    fecha = datos.get("fecha") or ahora()
+    if not isinstance(fecha, str) or not _fecha_valida(fecha):
+        raise VentaInvalida(f"Fecha inválida: {fecha}")
+    descuento = leer_descuento(datos.get("descuento") or 0)
+    cliente = datos.get("cliente")
+    if cliente is not None and (not isinstance(cliente, (list, tuple)) or len(cliente) != 2 or not all(cliente)):
+        raise VentaInvalida("El cliente debe tener nombre y dirección")
+
+    items = []
+    for item in datos.get("items") or ():
+        if not isinstance(item, dict):
+            raise VentaInvalida("Producto inválido")
+        id_producto = str(item.get("id", ""))
+        producto = productos.get(id_producto)
+        if producto is None:
+            raise VentaInvalida(f"No existe el producto {id_producto}")
+        try:
+            cantidad = int(item.get("cantidad"))
+            precio_venta = None if item.get("precio_venta") in (None, "") else float(item["precio_venta"])
+        except (TypeError, ValueError):
+            raise VentaInvalida(f"Cantidad o precio inválido del producto {id_producto}")
+        if cantidad <= 0 or (precio_venta is not None and precio_venta < 0):
+            raise VentaInvalida(f"Cantidad o precio inválido del producto {id_producto}")
+        items.append(item_venta(producto, id_producto, cantidad, precio_venta))
+    if not items:
+        raise VentaInvalida("Venta sin productos")
+    return fecha, descuento, items, total_con_descuento(items, descuento), cliente
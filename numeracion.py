@@ -0,0 +1,214 @@
+"""Números de factura únicos para varias cajas abiertas a la vez.
+
+Cada proceso toma un bloque de números (por ejemplo 50) con el archivo
+bloqueado: lee ultima_factura.txt (el último número ya repartido), lo
+avanza en el tamaño del bloque y anota el bloque en bloques_factura.txt.
+Después reparte los números del bloque desde memoria, sin tocar el disco
+en cada venta. Dos cajas nunca reciben el mismo bloque.
+
+Al cerrar, la caja anota los números que no usó. Los bloques de una caja
+que se cayó quedan con huecos sin anotar; el reporte de huecos los muestra:
+
+    python numeracion.py huecos [--libro ventas]
+"""
+import argparse
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def bloquear(archivo, esperar=True):
+    """Bloqueo exclusivo entre procesos de un archivo abierto; sin esperar, devuelve False si otro lo tiene.
+
+    Cada open() es un bloqueo aparte, también entre hilos del mismo proceso.
+    """
+    if fcntl is not None:
+        try:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    archivo.seek(0)
+    while True:
+        try:
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK if esperar else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not esperar:
+                return False
+            # LK_LOCK se rinde a los 10 segundos: se vuelve a intentar
+
+
+def desbloquear(archivo):
+    if fcntl is not None:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+    else:
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def archivo_bloqueado(ruta, esperar=True):
+    """Bloqueo exclusivo entre procesos mientras dura el with (espera si otro lo tiene).
+
+    Con esperar=False no espera: el with recibe False si otro lo tiene.
+    """
+    with open(ruta, "a+b") as f:
+        tomado = bloquear(f, esperar)
+        try:
+            yield tomado
+        finally:
+            if tomado:
+                desbloquear(f)
+
+
+class NumeradorFacturas:
+    """Reparte números de factura de a bloques (ver el comentario del módulo)"""
+
+    def __init__(self, ruta="ultima_factura.txt", tamano_bloque=50, ruta_bloques="bloques_factura.txt"):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        self.ruta_bloques = ruta_bloques
+        self.ruta_bloqueo = ruta + ".lock"
+        self._lock = threading.Lock()
+        self._siguiente = 1
+        self._fin = 0  # Último número del bloque actual (vacío al empezar)
+
+    def siguiente(self):
+        """Devuelve el siguiente número de factura de esta caja"""
+        with self._lock:
+            if self._siguiente > self._fin:
+                self._tomar_bloque()
+            numero = self._siguiente
+            self._siguiente += 1
+            return numero
+
+    def siguientes(self, cantidad):
+        """Devuelve `cantidad` números de esta caja, en orden; si el bloque no alcanza toma uno solo más grande"""
+        with self._lock:
+            numeros = list(range(self._siguiente, min(self._fin + 1, self._siguiente + cantidad)))
+            self._siguiente += len(numeros)
+            faltan = cantidad - len(numeros)
+            if faltan:
+                self._tomar_bloque(max(self.tamano_bloque, faltan))
+                numeros.extend(range(self._siguiente, self._siguiente + faltan))
+                self._siguiente += faltan
+            return numeros
+
+    def _tomar_bloque(self, tamano=None):
+        with archivo_bloqueado(self.ruta_bloqueo):
+            try:
+                with open(self.ruta, "r", encoding="utf-8") as f:
+                    ultimo = int(f.read().strip() or 0)
+            except FileNotFoundError:
+                ultimo = 0  # Si el archivo no existe, empezamos desde 0
+            inicio, fin = ultimo + 1, ultimo + (tamano or self.tamano_bloque)
+
+            # El bloque queda en disco antes de usar cualquiera de sus números
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                f.write(str(fin))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
+            self._anotar(f"bloque: {inicio}: {fin}: {os.getpid()}: {datetime.now():%Y-%m-%d %H:%M:%S}")
+        self._siguiente, self._fin = inicio, fin
+
+    def _anotar(self, linea):
+        with open(self.ruta_bloques, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def cerrar(self):
+        """Anota los números del bloque actual que no se usaron"""
+        with self._lock:
+            if self._siguiente <= self._fin:
+                with archivo_bloqueado(self.ruta_bloqueo):
+                    self._anotar(f"devuelto: {self._siguiente}: {self._fin}: {os.getpid()}")
+                self._siguiente = self._fin + 1
+
+
+def leer_bloques(ruta_bloques="bloques_factura.txt"):
+    """Devuelve ([(inicio, fin, pid, fecha)] repartidos, [(inicio, fin)] devueltos)"""
+    bloques, devueltos = [], []
+    try:
+        with open(ruta_bloques, "r", encoding="utf-8") as f:
+            for linea in f:
+                partes = linea.rstrip("\n").split(": ")
+                if partes[0] == "bloque" and len(partes) == 5:
+                    bloques.append((int(partes[1]), int(partes[2]), partes[3], partes[4]))
+                elif partes[0] == "devuelto" and len(partes) == 4:
+                    devueltos.append((int(partes[1]), int(partes[2])))
+    except FileNotFoundError:
+        pass
+    return bloques, devueltos
+
+
+def _rangos(numeros):
+    """[1, 2, 3, 7, 8] -> [(1, 3), (7, 8)]"""
+    rangos = []
+    for numero in sorted(numeros):
+        if rangos and rangos[-1][1] == numero - 1:
+            rangos[-1] = (rangos[-1][0], numero)
+        else:
+            rangos.append((numero, numero))
+    return rangos
+
+
+def reporte_huecos(usados, ruta_bloques="bloques_factura.txt"):
+    """Líneas del reporte de números repartidos que no llegaron a ninguna venta"""
+    bloques, devueltos = leer_bloques(ruta_bloques)
+    devuelto = set()
+    for inicio, fin in devueltos:
+        devuelto.update(range(inicio, fin + 1))
+
+    lineas = []
+    total_perdidos = 0
+    for inicio, fin, pid, fecha in bloques:
+        sin_usar = [n for n in range(inicio, fin + 1) if n not in usados]
+        perdidos = [n for n in sin_usar if n not in devuelto]
+        if not sin_usar:
+            continue
+        texto = f"Bloque {inicio}-{fin} (proceso {pid}, {fecha}): {fin - inicio + 1 - len(sin_usar)} usados"
+        if len(sin_usar) > len(perdidos):
+            texto += f", {len(sin_usar) - len(perdidos)} devueltos al cerrar"
+        if perdidos:
+            texto += ", sin usar por una caída (o caja todavía abierta): " + ", ".join(
+                str(a) if a == b else f"{a}-{b}" for a, b in _rangos(perdidos))
+            total_perdidos += len(perdidos)
+        lineas.append(texto)
+    lineas.append(f"Números sin usar y sin devolver: {total_perdidos}")
+    return lineas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Numeración de facturas por bloques.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_huecos = sub.add_parser("huecos", help="muestra los números de factura repartidos que no se usaron")
+    p_huecos.add_argument("--libro", default="ventas", help="carpeta del libro de ventas")
+    p_huecos.add_argument("--bloques", default="bloques_factura.txt", help="archivo de bloques repartidos")
+    args = parser.parse_args(argv)
+
+    if config.ALMACEN == "sqlite":
+        print("Con TIENDA_ALMACEN=sqlite los números salen de la base y no quedan huecos.")
+        return 0
+    from libro_ventas import LibroVentas
+    usados = LibroVentas(args.libro).facturas()
+    for linea in reporte_huecos(usados, args.bloques):
+        print(linea)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Reparto de los lotes pendientes entre los domiciliarios disponibles.
+
+Cada lote se estima en minutos: las cuadras del recorrido (ida desde la
+tienda por las paradas en el orden del lote y vuelta, ver rutas.py) por
+config.MINUTOS_POR_CUADRA, más config.MINUTOS_POR_PARADA por pedido. La
+carga de un domiciliario es la suma de sus lotes aceptados.
+
+repartir() asigna primero los lotes más largos, cada uno al domiciliario
+con menos carga en ese momento (LPT): así ninguno queda con mucho más
+trabajo que los demás y las entregas por hora crecen con la cantidad de
+domiciliarios. El plan es solo una sugerencia y sale igual en todas las
+pantallas (mismos datos, mismo orden), así que no hace falta coordinarlas:
+el que acepta un lote lo toma con aceptar_lote(), que detecta si otro se
+adelantó.
+"""
+import heapq
+
+import config
+from libro_ventas import SEPARADOR_VENTA
+from rutas import direccion_pedido, largo, punto_de_salida, ubicar
+
+# nombre del lote -> (sello del lote, minutos); si el sello cambia se vuelven a calcular (ver sello_lote)
+_minutos_por_lote = {}
+
+
+def minutos_lote(contenido, origen=None):
+    """Minutos estimados para entregar un lote (su texto, con los pedidos en orden de visita)"""
+    pedidos = [pedido for pedido in contenido.split(SEPARADOR_VENTA) if pedido.strip()]
+    if not pedidos:
+        return 0.0
+    puntos = ubicar([direccion_pedido(pedido) for pedido in pedidos])
+    salida = punto_de_salida(origen)
+    cuadras = largo(puntos, salida)
+    if salida is not None:
+        cuadras += largo([puntos[-1], salida])  # Vuelta a la tienda
+    return cuadras * config.MINUTOS_POR_CUADRA + len(pedidos) * config.MINUTOS_POR_PARADA
+
+
+def repartir(minutos, cargas):
+    """Asigna lotes a domiciliarios.
+
+    minutos: {lote: minutos estimados}; cargas: {domiciliario: minutos que
+    ya tiene}. Devuelve {domiciliario: [lotes]} con los lotes de cada uno
+    del más largo al más corto.
+    """
+    plan = {domiciliario: [] for domiciliario in cargas}
+    if not cargas:
+        return plan
+    monticulo = [(carga, domiciliario) for domiciliario, carga in cargas.items()]
+    heapq.heapify(monticulo)
+    for lote in sorted(minutos, key=lambda lote: (-minutos[lote], lote)):
+        carga, domiciliario = heapq.heappop(monticulo)
+        plan[domiciliario].append(lote)
+        heapq.heappush(monticulo, (carga + minutos[lote], domiciliario))
+    return plan
+
+
+def _minutos(almacen, nombre_lote, estado):
+    sello = almacen.sello_lote(nombre_lote, estado)
+    if sello is None:
+        raise FileNotFoundError(nombre_lote)
+    guardado = _minutos_por_lote.get(nombre_lote)
+    if guardado is None or guardado[0] != sello:
+        guardado = (sello, minutos_lote(almacen.leer_lote(nombre_lote, estado)))
+        _minutos_por_lote[nombre_lote] = guardado
+    return guardado[1]
+
+
+def plan_reparto(almacen, incluir=(), pendientes=None):
+    """Plan sugerido para los lotes pendientes del almacén.
+
+    Cuenta a los domiciliarios disponibles y además a los de `incluir`
+    (el que está mirando la pantalla cuenta aunque se le haya vencido la
+    marca). pendientes es la lista de lotes pendientes si ya se tiene.
+    Devuelve (plan, minutos) como repartir() y los minutos de cada lote
+    pendiente.
+    """
+    if pendientes is None:
+        pendientes = almacen.lotes("pendiente")
+    minutos = {}
+    vistos = set(pendientes)
+    for nombre_lote in pendientes:
+        try:
+            minutos[nombre_lote] = _minutos(almacen, nombre_lote, "pendiente")
+        except FileNotFoundError:
+            pass  # Alguien lo aceptó mientras tanto
+    cargas = {}
+    for domiciliario in sorted(set(almacen.domiciliarios_disponibles()) | set(incluir)):
+        cargas[domiciliario] = 0.0
+        for nombre_lote in almacen.lotes("aceptado", domiciliario):
+            vistos.add(nombre_lote)
+            try:
+                cargas[domiciliario] += _minutos(almacen, nombre_lote, "aceptado")
+            except FileNotFoundError:
+                pass
+    # Los lotes entregados ya no hacen falta
+    for nombre_lote in [nombre for nombre in _minutos_por_lote if nombre not in vistos]:
+        del _minutos_por_lote[nombre_lote]
+    return repartir(minutos, cargas), minutos
@@ -0,0 +1,203 @@
+"""Totales de ventas por día, precalculados para el reporte por fechas.
+
+ventas/resumen.txt recibe una línea por venta con lo que esa venta suma a
+su día:
+
+    dia: total: unidades: costo
+
+Al cargar se acumula por día y se arman sumas acumuladas, así el total de
+cualquier rango sale de dos búsquedas binarias y una resta, sin leer las
+ventas. Cuando el archivo tiene muchas más líneas que días se reescribe
+con una sola línea por día.
+
+Como el libro de ventas, se escribe y se reescribe con ventas/resumen.lock
+bloqueado, después de sumar las líneas que agregaron las otras cajas
+(releer hace lo mismo cuando el archivo cambia).
+"""
+import bisect
+import os
+from contextlib import contextmanager
+
+from numeracion import archivo_bloqueado
+from transacciones import sincronizar_archivo
+
+
+class ResumenDiario:
+    """Total, unidades, facturas y costo de lo vendido, por día"""
+
+    def __init__(self, ruta=os.path.join("ventas", "resumen.txt")):
+        self.ruta = ruta
+        self.ruta_bloqueo = os.path.splitext(ruta)[0] + ".lock"
+        self._por_dia = None    # dia -> [total, unidades, facturas, costo]
+        self._dias = []         # días ordenados
+        self._acumulado = []    # acumulado[i] = suma de los días 0..i (mismas 4 columnas)
+        self._lineas = 0        # Líneas del archivo, para saber cuándo compactarlo
+        self._leido = 0         # Bytes del archivo ya sumados
+        self._inodo = None      # Del archivo sumado: cambia cuando otra caja lo compacta
+
+    def existe(self):
+        return os.path.exists(self.ruta)
+
+    def _datos(self):
+        if self._por_dia is None:
+            with self._bloqueado():
+                pass
+        return self._por_dia
+
+    def releer(self):
+        """Suma las ventas que agregaron otras cajas (si el resumen ya estaba cargado)"""
+        if self._por_dia is not None:
+            with self._bloqueado():
+                pass
+
+    @contextmanager
+    def _bloqueado(self):
+        """Bloquea el resumen entre cajas y antes suma lo que agregaron las otras"""
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        with archivo_bloqueado(self.ruta_bloqueo):
+            self._ponerse_al_dia()
+            yield
+
+    def _ponerse_al_dia(self):
+        """Con el resumen bloqueado: lo carga la primera vez y después suma solo las líneas nuevas"""
+        try:
+            estado = os.stat(self.ruta)
+        except FileNotFoundError:
+            estado = None
+        inodo = None if estado is None else estado.st_ino
+        if self._por_dia is None or inodo != self._inodo or estado is not None and estado.st_size < self._leido:
+            self._por_dia = {}
+            self._dias = []
+            self._acumulado = []
+            self._lineas = 0
+            self._leido = 0
+            self._inodo = inodo
+        if estado is None or estado.st_size == self._leido:
+            return
+        with open(self.ruta, "rb") as f:
+            f.seek(self._leido)
+            datos = f.read()
+        fin = datos.rfind(b"\n") + 1
+        if fin < len(datos):
+            # Línea cortada por un corte de luz (nadie más escribe: el resumen está bloqueado)
+            os.truncate(self.ruta, self._leido + fin)
+        for linea in datos[:fin].decode("utf-8").split("\n")[:-1]:
+            partes = linea.split(": ")
+            if len(partes) != 4:
+                continue
+            dia, total, unidades, costo = partes
+            facturas = 1
+            if "/" in unidades:  # Línea ya compactada: unidades/facturas
+                unidades, facturas = unidades.split("/")
+            self._sumar(dia, float(total), int(unidades), int(facturas), float(costo))
+            self._lineas += 1
+        self._leido += fin
+        self._dias = sorted(self._por_dia)
+        self._armar_acumulado()
+        if self._lineas > 2 * len(self._dias) + 100:
+            self._compactar()
+
+    def _sumar(self, dia, total, unidades, facturas, costo):
+        fila = self._por_dia.get(dia)
+        if fila is None:
+            self._por_dia[dia] = [total, unidades, facturas, costo]
+        else:
+            fila[0] += total
+            fila[1] += unidades
+            fila[2] += facturas
+            fila[3] += costo
+
+    def _armar_acumulado(self):
+        self._acumulado = []
+        suma = (0.0, 0, 0, 0.0)
+        for dia in self._dias:
+            suma = tuple(a + b for a, b in zip(suma, self._por_dia[dia]))
+            self._acumulado.append(suma)
+
+    def _compactar(self):
+        """Reescribe el archivo con una línea por día (unidades/facturas en la misma columna)"""
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for dia in self._dias:
+                total, unidades, facturas, costo = self._por_dia[dia]
+                f.write(f"{dia}: {total:.2f}: {unidades}/{facturas}: {costo:.2f}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta)
+        estado = os.stat(self.ruta)
+        self._lineas = len(self._dias)
+        self._leido = estado.st_size
+        self._inodo = estado.st_ino
+
+    def _escribir(self, lineas):
+        """Con el resumen bloqueado: agrega las líneas al archivo"""
+        with open(self.ruta, "ab") as f:
+            f.write("".join(lineas).encode("utf-8"))
+            self._leido = f.tell()
+            self._inodo = os.fstat(f.fileno()).st_ino
+        self._lineas += len(lineas)
+
+    def registrar(self, dia, total, unidades, costo):
+        """Suma una venta al día (con una línea nueva en el archivo)"""
+        with self._bloqueado():
+            self._escribir([f"{dia}: {total:.2f}: {unidades}: {costo:.2f}\n"])
+            self._sumar(dia, total, unidades, 1, costo)
+            if self._dias and dia == self._dias[-1]:
+                # Caso normal: la venta es del último día, solo cambia la última suma acumulada
+                self._acumulado[-1] = tuple(a + b for a, b in zip(self._acumulado[-1], (total, unidades, 1, costo)))
+            elif not self._dias or dia > self._dias[-1]:
+                self._dias.append(dia)
+                anterior = self._acumulado[-1] if self._acumulado else (0.0, 0, 0, 0.0)
+                self._acumulado.append(tuple(a + b for a, b in zip(anterior, (total, unidades, 1, costo))))
+            else:
+                # Venta de un día anterior al último (ventas cargadas de un archivo, por ejemplo)
+                if self._dias[bisect.bisect_left(self._dias, dia)] != dia:
+                    bisect.insort(self._dias, dia)
+                self._armar_acumulado()
+
+    def registrar_varias(self, ventas):
+        """Como registrar para muchas ventas [(dia, total, unidades, costo)], con una sola escritura"""
+        with self._bloqueado():
+            self._escribir([f"{dia}: {total:.2f}: {unidades}: {costo:.2f}\n" for dia, total, unidades, costo in ventas])
+            for dia, total, unidades, costo in ventas:
+                self._sumar(dia, total, unidades, 1, costo)
+            self._dias = sorted(self._por_dia)
+            self._armar_acumulado()
+
+    def sincronizar(self):
+        sincronizar_archivo(self.ruta)
+
+    def reconstruir(self, ventas):
+        """Arma el resumen desde cero con (dia, total, unidades, costo) de cada venta"""
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        with archivo_bloqueado(self.ruta_bloqueo):
+            self._por_dia = {}
+            for dia, total, unidades, costo in ventas:
+                self._sumar(dia, total, unidades, 1, costo)
+            self._dias = sorted(self._por_dia)
+            self._armar_acumulado()
+            self._compactar()
+
+    def totales(self, desde, hasta):
+        """(total, unidades, facturas, margen) de los días entre desde y hasta (YYYY-MM-DD, incluidos)"""
+        self._datos()
+        inicio = bisect.bisect_left(self._dias, desde)
+        fin = bisect.bisect_right(self._dias, hasta)
+        if fin <= inicio:
+            return 0.0, 0, 0, 0.0
+        suma = self._acumulado[fin - 1]
+        if inicio > 0:
+            suma = tuple(a - b for a, b in zip(suma, self._acumulado[inicio - 1]))
+        total, unidades, facturas, costo = suma
+        return total, unidades, facturas, total - costo
+
+    def por_dia(self, desde, hasta):
+        """[(dia, total, unidades, facturas, margen)] de cada día con ventas en el rango"""
+        datos = self._datos()
+        inicio = bisect.bisect_left(self._dias, desde)
+        fin = bisect.bisect_right(self._dias, hasta)
+        filas = []
+        for dia in self._dias[inicio:fin]:
+            total, unidades, facturas, costo = datos[dia]
+            filas.append((dia, total, unidades, facturas, total - costo))
+        return filas
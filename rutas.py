@@ -0,0 +1,270 @@
+"""Lotes de domicilios por cercanía y orden de las paradas.
+
+Las direcciones colombianas ya dicen dónde quedan en la cuadrícula:
+"Calle 45 # 12-30" está sobre la calle 45, a 30 metros de la carrera 12;
+"Carrera 12 # 45-30" es casi el mismo punto visto desde la carrera. Con eso
+cada dirección se pasa a coordenadas (carrera, calle) y:
+
+- agrupar() reparte los pedidos en lotes de vecinos: toma el pedido más
+  viejo sin lote y le suma los más cercanos, buscando en una grilla por
+  celdas (no compara todos contra todos, así anda con miles de pedidos);
+- ruta() ordena las paradas de un lote con vecino más cercano y después
+  mejora el recorrido con 2-opt.
+
+Las distancias son de cuadras (suma de diferencias en x y en y), como se
+camina o se maneja en una cuadrícula.
+"""
+import re
+
+import config
+from busqueda import normalizar
+
+_TAMANO_CELDA = 5.0  # Cuadras por celda de la grilla de búsqueda
+# Ninguna calle ni carrera llega a este número: más es un error al escribir la dirección
+_NUMERO_MAXIMO = 400
+
+# Tipo de vía -> eje: "calle" si corre como las calles, "carrera" si corre como las carreras
+_VIAS = {
+    "calle": "calle", "cl": "calle", "cll": "calle", "diagonal": "calle", "dg": "calle",
+    "avenida": "calle", "av": "calle", "ac": "calle",
+    "carrera": "carrera", "cra": "carrera", "kr": "carrera", "cr": "carrera", "k": "carrera",
+    "transversal": "carrera", "tv": "carrera", "ak": "carrera",
+}
+_PATRON_DIRECCION = re.compile(
+    r"(?:(?:avenida|av)\s+)?(?P<via>" + "|".join(sorted(_VIAS, key=len, reverse=True)) + r")\s*"
+    r"(?P<numero>\d+)\s*(?P<letra>[a-z](?![a-z]))?\s*(?:bis\b\s*)?(?P<sur_via>sur\b)?\s*"
+    r"(?:(?:#|no\b|n°|numero\b)\s*(?P<cruce>\d+)\s*(?:[a-z](?![a-z]))?\s*(?:bis\b\s*)?-?\s*(?P<metros>\d+)?)?"
+    r"(?P<resto>.*)$")
+_PATRON_AVENIDA_EJE = re.compile(r"(?:avenida|av)\s+(?P<eje>calle|carrera)\b")
+
+
+def coordenadas(direccion):
+    """(x, y) de una dirección: x sobre el eje de las carreras, y sobre el de las calles.
+
+    Una coordenada queda en None si la dirección no la dice ("Calle 123"
+    sin número de casa) o si pasa de _NUMERO_MAXIMO ("Calle 45 # 120450":
+    un número de casa mal escrito); devuelve None si no se reconoce la
+    dirección.
+    """
+    texto = normalizar(direccion).replace(".", " ").strip()
+    match = _PATRON_DIRECCION.match(texto)
+    if match is None:
+        return None
+    eje = _VIAS[match.group("via")]
+    avenida = _PATRON_AVENIDA_EJE.match(texto)
+    if avenida is not None:
+        eje = avenida.group("eje")  # "Avenida Carrera 68" corre como las carreras
+    numero = float(match.group("numero"))
+    if numero > _NUMERO_MAXIMO:
+        return None
+    if match.group("letra"):
+        numero += (ord(match.group("letra")) - ord("a") + 1) * 0.1  # 45A queda entre la 45 y la 46
+    cruce = None
+    if match.group("cruce"):
+        cruce = float(match.group("cruce")) + float(match.group("metros") or 0) / 100
+        if cruce > _NUMERO_MAXIMO:
+            cruce = None
+    resto = match.group("resto")
+    sur = match.group("sur_via") is not None or re.search(r"\bsur\b", resto) is not None
+    este = re.search(r"\beste\b", resto) is not None
+
+    if eje == "calle":
+        x, y = cruce, numero
+    else:
+        x, y = numero, cruce
+    # Al sur y al este la numeración vuelve a empezar: se cuenta hacia el otro lado
+    if sur and y is not None:
+        y = -y
+    if este and x is not None:
+        x = -x
+    return x, y
+
+
+def direccion_pedido(texto):
+    """La dirección de un pedido a domicilio (línea "Dirección: ")"""
+    for linea in texto.splitlines():
+        if linea.startswith("Dirección: "):
+            return linea.split(": ", 1)[1].strip()
+    return ""
+
+
+def _mediana(valores, por_defecto=0.0):
+    valores = sorted(valores)
+    return valores[len(valores) // 2] if valores else por_defecto
+
+
+def ubicar(direcciones):
+    """Coordenadas completas para cada dirección.
+
+    Lo que falta (una dirección sin número de casa, o que no se reconoce)
+    se completa con la mediana de ese eje entre las demás: queda "en el
+    medio" en vez de descartar el pedido.
+    """
+    crudas = [coordenadas(direccion) or (None, None) for direccion in direcciones]
+    medio_x = _mediana([x for x, _ in crudas if x is not None])
+    medio_y = _mediana([y for _, y in crudas if y is not None])
+    return [(medio_x if x is None else x, medio_y if y is None else y) for x, y in crudas]
+
+
+def distancia(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class _Grilla:
+    """Puntos repartidos en celdas cuadradas para buscar los más cercanos sin recorrerlos todos"""
+
+    def __init__(self, puntos, tamano_celda=_TAMANO_CELDA):
+        self.puntos = puntos
+        self.tamano = tamano_celda
+        self.celdas = {}
+        for indice, punto in enumerate(puntos):
+            self.celdas.setdefault(self._celda(punto), set()).add(indice)
+        # Celdas de las esquinas de la grilla: ningún anillo tiene que pasar de ahí
+        self.minima = tuple(map(min, zip(*self.celdas))) if self.celdas else (0, 0)
+        self.maxima = tuple(map(max, zip(*self.celdas))) if self.celdas else (0, 0)
+
+    def _celda(self, punto):
+        return int(punto[0] // self.tamano), int(punto[1] // self.tamano)
+
+    def quitar(self, indice):
+        celda = self._celda(self.puntos[indice])
+        self.celdas[celda].discard(indice)
+        if not self.celdas[celda]:
+            del self.celdas[celda]
+
+    def _todos(self, punto, cantidad):
+        """Como cercanos, comparando contra todos los puntos que quedan"""
+        todos = [indice for indices in self.celdas.values() for indice in indices]
+        return sorted(todos, key=lambda indice: distancia(punto, self.puntos[indice]))[:cantidad]
+
+    def cercanos(self, punto, cantidad):
+        """Los `cantidad` índices más cercanos a punto (de los que siguen en la grilla)"""
+        restantes = sum(len(indices) for indices in self.celdas.values())
+        if restantes <= cantidad * 4:
+            # Quedan pocos (y seguramente desparramados): sale más barato compararlos todos
+            return self._todos(punto, cantidad)
+        cx, cy = self._celda(punto)
+        # Más allá de las esquinas de la grilla no hay nada; y si el punto está lejos de todos
+        # (una dirección rara), recorrer anillos vacíos cuesta más que compararlos todos
+        radio_maximo = max(cx - self.minima[0], self.maxima[0] - cx, cy - self.minima[1], self.maxima[1] - cy)
+        encontrados = []
+        radio = 0
+        while len(encontrados) < restantes:
+            if radio > radio_maximo or (2 * radio + 1) ** 2 > 4 * len(self.celdas) + 64:
+                return self._todos(punto, cantidad)
+            # Anillo de celdas a distancia `radio` (en celdas) de la del punto
+            for x in range(cx - radio, cx + radio + 1):
+                for y in (cy - radio, cy + radio) if abs(x - cx) != radio else range(cy - radio, cy + radio + 1):
+                    for indice in self.celdas.get((x, y), ()):
+                        encontrados.append((distancia(punto, self.puntos[indice]), indice))
+            # Lo que está más allá del anillo queda a más de radio * tamaño cuadras
+            if len(encontrados) >= cantidad:
+                encontrados.sort()
+                if encontrados[cantidad - 1][0] <= radio * self.tamano:
+                    break
+            radio += 1
+        encontrados.sort()
+        return [indice for _, indice in encontrados[:cantidad]]
+
+
+def agrupar(puntos, tamano):
+    """Reparte los puntos (en orden de llegada) en lotes de hasta `tamano` vecinos.
+
+    Cada lote empieza por el punto más viejo que todavía no tiene lote, así
+    ningún pedido queda esperando para siempre. Devuelve listas de índices.
+    """
+    grilla = _Grilla(puntos)
+    asignados = [False] * len(puntos)
+    lotes = []
+    for semilla in range(len(puntos)):
+        if asignados[semilla]:
+            continue
+        lote = _lote_de(grilla, semilla, tamano)
+        for indice in lote:
+            asignados[indice] = True
+            grilla.quitar(indice)
+        lotes.append(lote)
+    return lotes
+
+
+def _lote_de(grilla, semilla, tamano):
+    lote = grilla.cercanos(grilla.puntos[semilla], tamano)
+    if semilla not in lote:  # Empate de distancias: la semilla va sí o sí
+        lote = [semilla] + lote[:tamano - 1]
+    return lote
+
+
+def largo(puntos, origen=None):
+    """Cuadras de recorrer los puntos en ese orden (desde origen, si se da)"""
+    total = 0.0
+    anterior = origen
+    for punto in puntos:
+        if anterior is not None:
+            total += distancia(anterior, punto)
+        anterior = punto
+    return total
+
+
+def ruta(puntos, origen=None):
+    """Orden de visita de los puntos (índices), saliendo de origen si se da.
+
+    Vecino más cercano para empezar y 2-opt (dar vuelta un tramo si acorta
+    el recorrido) hasta que no haya mejora. El recorrido no vuelve al origen.
+    """
+    if not puntos:
+        return []
+    pendientes = set(range(len(puntos)))
+    actual = origen
+    if actual is None:
+        primero = 0
+    else:
+        primero = min(pendientes, key=lambda i: distancia(actual, puntos[i]))
+    orden = [primero]
+    pendientes.discard(primero)
+    while pendientes:
+        siguiente = min(pendientes, key=lambda i: distancia(puntos[orden[-1]], puntos[i]))
+        orden.append(siguiente)
+        pendientes.discard(siguiente)
+
+    # 2-opt sobre el camino abierto; con origen, la primera parada también puede cambiar
+    inicio = 0 if origen is not None else 1
+    mejoro = True
+    while mejoro:
+        mejoro = False
+        for i in range(inicio, len(orden) - 1):
+            anterior = puntos[orden[i - 1]] if i > 0 else origen
+            for j in range(i + 1, len(orden)):
+                a, b = puntos[orden[i]], puntos[orden[j]]
+                despues = puntos[orden[j + 1]] if j + 1 < len(orden) else None
+                antes = distancia(anterior, a) + (distancia(b, despues) if despues is not None else 0)
+                ahora = distancia(anterior, b) + (distancia(a, despues) if despues is not None else 0)
+                if ahora < antes - 1e-9:
+                    orden[i:j + 1] = reversed(orden[i:j + 1])
+                    mejoro = True
+    return orden
+
+
+def punto_de_salida(origen=None):
+    """Coordenadas de donde sale el domiciliario (config.DIRECCION_TIENDA por defecto), o None"""
+    if origen is None:
+        origen = config.DIRECCION_TIENDA
+    salida = coordenadas(origen) if origen else None
+    if salida is None or None in salida:
+        return None
+    return salida
+
+
+def elegir_lote(pedidos, cantidad, origen=None):
+    """Índices de los pedidos (textos, en orden de llegada) que forman el próximo lote, en orden de visita.
+
+    El lote es el del pedido más viejo con sus vecinos más cercanos.
+    origen es la dirección de donde sale el domiciliario (por defecto
+    config.DIRECCION_TIENDA).
+    """
+    puntos = ubicar([direccion_pedido(texto) for texto in pedidos])
+    if len(pedidos) > cantidad:
+        lote = _lote_de(_Grilla(puntos), 0, cantidad)  # Solo hace falta el primer lote de agrupar()
+    else:
+        lote = list(range(len(pedidos)))
+    orden = ruta([puntos[indice] for indice in lote], punto_de_salida(origen))
+    return [lote[posicion] for posicion in orden]
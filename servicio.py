@@ -0,0 +1,78 @@
+"""Datos de la tienda compartidos por todas las pantallas del proceso.
+
+MainApp tiene un solo ServicioDatos: el almacén (inventario, ventas y
+pedidos) se abre una vez, la primera vez que una pantalla lo pide, y las
+pantallas se guardan para volver a mostrarlas en el próximo login sin
+releer nada.
+
+Lo que cambian otras terminales se detecta con sellos baratos (fecha y
+tamaño de los archivos, o PRAGMA data_version y un contador en SQLite):
+vigilar(sello, funcion) anota una función que devuelve el sello y otra a
+la que se llama cuando el sello cambia. Una sola alarma del loop revisa
+todos los sellos cada config.REVISAR_CAMBIOS_S segundos. El inventario ya
+queda vigilado: sus cambios llegan a las pantallas con los avisos de
+siempre (inventario.suscribir). Las ventas también: el libro y el resumen
+diario cargan lo que agregaron las otras cajas, así el cierre de caja y
+los reportes las incluyen.
+"""
+import config
+
+
+class ServicioDatos:
+    def __init__(self, loop):
+        self.loop = loop
+        self._almacen = None
+        self._vigilados = []  # [sello, funcion, último sello visto]
+        self._alarma = None
+
+    @property
+    def almacen(self):
+        """El almacén del proceso (se abre al primer uso, ver medir_arranque.py)"""
+        if self._almacen is None:
+            from almacen import abrir_almacen
+            self._almacen = abrir_almacen()
+            self.vigilar(self._almacen.sello_inventario, self._almacen.inventario.releer)
+            self.vigilar(self._almacen.sello_ventas, self._almacen.releer_ventas)
+        return self._almacen
+
+    def vigilar(self, sello, funcion):
+        """Llama a funcion() cada vez que cambie sello(); devuelve una clave para dejar_de_vigilar"""
+        vigilado = [sello, funcion, sello()]
+        self._vigilados.append(vigilado)
+        if self._alarma is None:
+            self._programar()
+        return vigilado
+
+    def dejar_de_vigilar(self, clave):
+        self._vigilados = [vigilado for vigilado in self._vigilados if vigilado is not clave]
+
+    def _programar(self):
+        self._alarma = self.loop.set_alarm_in(config.REVISAR_CAMBIOS_S, self.revisar)
+
+    def revisar(self, loop=None, user_data=None):
+        """Revisa todos los sellos y avisa los que cambiaron.
+
+        Un sello o una relectura que falla (un archivo a medio escribir, la
+        base ocupada por otra caja) no corta la revisión de los demás ni la
+        próxima alarma: ese sello se vuelve a probar en la siguiente vuelta.
+        """
+        try:
+            for vigilado in list(self._vigilados):
+                sello, funcion, visto = vigilado
+                try:
+                    actual = sello()
+                    if actual != visto:
+                        funcion()
+                        vigilado[2] = actual
+                except Exception:
+                    continue
+        finally:
+            self._programar()
+
+    def cerrar(self):
+        if self._alarma is not None:
+            self.loop.remove_alarm(self._alarma)
+            self._alarma = None
+        if self._almacen is not None:
+            self._almacen.cerrar()
+            self._almacen = None
@@ -0,0 +1,250 @@
+"""Servidor del almacén para varias terminales en la misma máquina.
+
+    python servidor.py [--socket tienda.sock] [--almacen texto|sqlite] [--hilos 8]
+
+Con varias cajas, el administrador y los domiciliarios abriendo los mismos
+archivos a la vez, las escrituras se pisan. Con el servidor, un solo
+proceso tiene el almacén (texto o SQLite) y las terminales le hablan por
+un socket Unix: se configuran con TIENDA_ALMACEN=servidor (ver
+cliente_almacen.py) y ya no tocan los archivos.
+
+El protocolo es una línea JSON por mensaje, en los dos sentidos:
+
+    -> {"id": 7, "op": "confirmar_venta", "args": [...]}
+    <- {"id": 7, "ok": 123}
+    <- {"id": 8, "error": "StockInsuficiente", "args": ["5"]}
+    <- {"aviso": "inventario", "productos": {"5": ["Pan", 1.0, 1.5, 9]}, "bajas": []}
+    <- {"aviso": "lotes"}
+
+Los pedidos se atienden en un grupo de hilos: el almacén ya ordena los
+descuentos de stock (en texto, el inventario bloqueado para validar y
+descontar; en SQLite, una conexión por hilo y BEGIN IMMEDIATE) y junta los
+fsync de ventas que llegan a la vez (ver transacciones.py), así que muchas
+cajas vendiendo a la vez comparten las escrituras a disco. Los cambios del
+inventario se juntan y se mandan a todas las terminales una vez por vuelta
+del loop, con los datos nuevos de cada producto; los cambios de lotes, como
+un aviso para que los domiciliarios vuelvan a mirar.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import config
+
+# Operaciones del almacén que se pueden pedir (las demás se rechazan)
+OPERACIONES_ALMACEN = {
+    "confirmar_venta", "registrar_venta", "ventas_del_dia", "factura", "facturas_entre", "ubicar_factura",
+    "agregar_pedido_domicilio", "agendar_pedidos", "lotes", "domiciliario_de", "leer_lote", "aceptar_lote",
+    "entregar_lote", "sello_lote", "marcar_disponible", "domiciliarios_disponibles",
+}
+# Las que atiende ServidorAlmacen (pasan fechas, líneas o errores a JSON)
+OPERACIONES_SERVIDOR = {"productos", "dias_ventas", "lineas_dia", "confirmar_ventas", "resumen_ventas", "reporte_ventas"}
+OPERACIONES_INVENTARIO = {"agregar", "borrar", "fijar_precio_venta", "ajustar_cantidades", "importar_pedido"}
+# Después de estas se avisa a los domiciliarios
+OPERACIONES_LOTES = {"agendar_pedidos", "aceptar_lote", "entregar_lote"}
+
+
+def datos_producto(producto):
+    return [producto.nombre, producto.precio_compra, producto.precio_venta, producto.cantidad]
+
+
+def _fecha(texto):
+    return datetime.strptime(texto, "%Y-%m-%d")
+
+
+class ServidorAlmacen:
+    def __init__(self, almacen, hilos=8):
+        self.almacen = almacen
+        self.clientes = set()
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="pedido")
+        self._loop = None
+        self._lock_avisos = threading.Lock()
+        self._cambiados = set()  # Productos cambiados desde el último aviso
+        self._aviso_programado = False
+        almacen.inventario.suscribir(self._inventario_cambiado)
+
+    # Lo que se puede pedir además de las operaciones del almacén
+    def productos(self):
+        # list() copia de una vez, aunque un hilo esté agregando productos
+        return {id_producto: datos_producto(p) for id_producto, p in list(self.almacen.inventario.productos.items())}
+
+    def dias_ventas(self):
+        return [dia for dia, _ in self.almacen.partes_ventas()]
+
+    def lineas_dia(self, dia):
+        for otro_dia, abrir in self.almacen.partes_ventas():
+            if otro_dia == dia:
+                lineas = abrir()
+                try:
+                    return [lineas.linea(numero) for numero in range(lineas.ultima() + 1)]
+                finally:
+                    lineas.cerrar()
+        return []
+
+    def confirmar_ventas(self, ventas):
+        """Como almacen.confirmar_ventas; las ventas rechazadas vuelven como [tipo de error, argumentos]"""
+        return [resultado if isinstance(resultado, int) else [type(resultado).__name__, list(map(str, resultado.args))]
+                for resultado in self.almacen.confirmar_ventas(ventas)]
+
+    def resumen_ventas(self, desde, hasta):
+        return self.almacen.resumen_ventas(_fecha(desde), _fecha(hasta))
+
+    def reporte_ventas(self, desde, hasta):
+        return self.almacen.reporte_ventas(_fecha(desde), _fecha(hasta))
+
+    def _ejecutar(self, operacion, argumentos):
+        """Corre una operación en un hilo del grupo"""
+        if operacion.startswith("inventario."):
+            nombre = operacion.split(".", 1)[1]
+            if nombre not in OPERACIONES_INVENTARIO:
+                raise ValueError(f"Operación desconocida: {operacion}")
+            return getattr(self.almacen.inventario, nombre)(*argumentos)
+        if operacion in OPERACIONES_ALMACEN:
+            resultado = getattr(self.almacen, operacion)(*argumentos)
+        elif operacion in OPERACIONES_SERVIDOR:
+            resultado = getattr(self, operacion)(*argumentos)
+        else:
+            raise ValueError(f"Operación desconocida: {operacion}")
+        if operacion in OPERACIONES_LOTES:
+            self._loop.call_soon_threadsafe(self._difundir, {"aviso": "lotes"})
+        return resultado
+
+    async def _responder(self, pedido, escritor):
+        respuesta = {"id": pedido.get("id")}
+        try:
+            respuesta["ok"] = await self._loop.run_in_executor(
+                self._ejecutor, self._ejecutar, pedido["op"], pedido.get("args", []))
+        except Exception as error:
+            respuesta["error"] = type(error).__name__
+            respuesta["args"] = [str(argumento) for argumento in error.args]
+            if getattr(error, "domiciliario", None) is not None:
+                respuesta["domiciliario"] = error.domiciliario  # LoteTomado
+        self._enviar(escritor, respuesta)
+
+    @staticmethod
+    def _enviar(escritor, mensaje):
+        if not escritor.is_closing():
+            escritor.write(json.dumps(mensaje, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _difundir(self, mensaje):
+        for escritor in list(self.clientes):
+            self._enviar(escritor, mensaje)
+
+    def _inventario_cambiado(self, cambios):
+        """Aviso del inventario (desde el hilo que hizo el cambio): se junta para el próximo envío"""
+        with self._lock_avisos:
+            self._cambiados.update(id_producto for _, id_producto in cambios)
+            if self._aviso_programado:
+                return
+            self._aviso_programado = True
+        self._loop.call_soon_threadsafe(self._avisar_inventario)
+
+    def _avisar_inventario(self):
+        with self._lock_avisos:
+            self._aviso_programado = False
+            cambiados, self._cambiados = self._cambiados, set()
+        productos = self.almacen.inventario.productos
+        if None in cambiados:  # "carga": el catálogo entero
+            self._difundir({"aviso": "inventario", "carga": self.productos()})
+            return
+        self._difundir({
+            "aviso": "inventario",
+            "productos": {i: datos_producto(productos[i]) for i in cambiados if i in productos},
+            "bajas": [i for i in cambiados if i not in productos],
+        })
+
+    async def atender(self, lector, escritor):
+        """Una terminal conectada: lee pedidos hasta que se desconecta"""
+        self.clientes.add(escritor)
+        tareas = set()
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    pedido = json.loads(linea)
+                except ValueError:
+                    continue
+                # Cada pedido en su tarea: una consulta lenta no frena las ventas de la misma terminal
+                tarea = asyncio.ensure_future(self._responder(pedido, escritor))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+        except ConnectionError:
+            pass
+        finally:
+            self.clientes.discard(escritor)
+            escritor.close()
+
+    async def servir(self, ruta_socket):
+        self._loop = asyncio.get_running_loop()
+        servidor = await asyncio.start_unix_server(self.atender, path=ruta_socket, limit=16 * 1024 * 1024)
+        print(f"Almacén atendiendo en {ruta_socket}")
+        async with servidor:
+            await servidor.serve_forever()
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=True)
+        self.almacen.cerrar()
+
+
+def _quitar_socket_viejo(ruta_socket):
+    """Borra el socket de un servidor anterior que se cortó; falla si hay uno andando"""
+    if not os.path.exists(ruta_socket):
+        return
+    prueba = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        prueba.connect(ruta_socket)
+    except OSError:
+        os.remove(ruta_socket)
+    else:
+        raise RuntimeError(f"Ya hay un servidor en {ruta_socket}")
+    finally:
+        prueba.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sirve el almacén a varias terminales por un socket Unix.")
+    parser.add_argument("--socket", default=config.RUTA_SOCKET, help="ruta del socket")
+    parser.add_argument("--almacen", choices=("texto", "sqlite"),
+                        default="sqlite" if config.ALMACEN == "sqlite" else "texto", help="dónde se guardan los datos")
+    parser.add_argument("--hilos", type=int, default=8, help="pedidos atendidos a la vez")
+    args = parser.parse_args(argv)
+
+    try:
+        _quitar_socket_viejo(args.socket)
+    except RuntimeError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+    if args.almacen == "sqlite":
+        from almacen_sqlite import AlmacenSQLite
+        almacen = AlmacenSQLite(config.RUTA_SQLITE)
+    else:
+        from almacen import AlmacenTexto
+        almacen = AlmacenTexto()
+    servidor = ServidorAlmacen(almacen, args.hilos)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # kill cierra igual que Ctrl+C
+    try:
+        asyncio.run(servidor.servir(args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Que una segunda señal no corte el cierre a medias
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        servidor.cerrar()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
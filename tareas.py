@@ -0,0 +1,128 @@
+"""Trabajos lentos fuera del hilo de la pantalla.
+
+La pantalla corre sobre el loop de asyncio de urwid. Lo que tarda (armar
+el PDF de una factura, el cierre de caja, el reporte por fechas, cargar un
+pedido grande) se manda a un grupo de hilos, o de procesos si la función
+no toca el estado del programa. Mientras tanto la última línea de la
+pantalla muestra qué está en curso y el usuario puede seguir trabajando.
+Cuando el trabajo termina, su resultado vuelve al loop y recién ahí se
+toca la pantalla: urwid no se usa nunca desde otro hilo. Lo mismo con los
+avisos del inventario que dispara un trabajo (cargar un pedido cambia el
+inventario desde el hilo de la tarea): las pantallas se suscriben con
+en_el_loop, que los pasa al loop.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+_GIRO = "|/-\\"
+
+
+class Tareas:
+    """Lanza funciones en segundo plano y llama a al_terminar/al_fallar en el loop de la pantalla"""
+
+    def __init__(self, loop, loop_asyncio, indicador, hilos=2, procesos=2):
+        self.loop = loop                  # urwid.MainLoop
+        self.loop_asyncio = loop_asyncio  # el loop de asyncio sobre el que corre
+        self.procesos = procesos
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="tarea")
+        self._procesos = None  # Se crea la primera vez que hace falta
+        self._en_curso = {}    # futuro -> descripción
+        self._giro = 0
+        self._alarma = None
+        self._aviso = ""
+        self.indicador = indicador        # urwid.Text donde se muestra lo que está en curso
+        self._hilo_loop = threading.get_ident()  # Se crea desde el hilo de la pantalla
+
+    def en_el_loop(self, funcion):
+        """Envuelve un suscriptor para que corra siempre en el loop de la pantalla.
+
+        Llamado desde el loop corre enseguida, como siempre; desde otro hilo
+        se agenda en el loop (y después se redibuja).
+        """
+        def en_el_loop(*args):
+            if threading.get_ident() == self._hilo_loop:
+                funcion(*args)
+            else:
+                self.loop_asyncio.call_soon_threadsafe(self._correr, funcion, args)
+        return en_el_loop
+
+    def _correr(self, funcion, args):
+        funcion(*args)
+        # Igual que en _terminada: call_soon_threadsafe no pasa por el ciclo de urwid
+        self.loop.draw_screen()
+
+    def lanzar(self, descripcion, funcion, *args, al_terminar=None, al_fallar=None, en_proceso=False):
+        """Corre funcion(*args) en segundo plano; devuelve el Future.
+
+        al_terminar(resultado) y al_fallar(error) se llaman en el loop de la
+        pantalla. Con en_proceso=True la función corre en otro proceso: tiene
+        que ser una función de módulo y sus argumentos tienen que poder
+        copiarse (nada de widgets ni del almacén).
+        """
+        futuro = self._ejecutor(en_proceso).submit(funcion, *args)
+        self._aviso = ""
+        self._en_curso[futuro] = descripcion
+        self._mostrar()
+        futuro.add_done_callback(
+            lambda f: self.loop_asyncio.call_soon_threadsafe(self._terminada, f, al_terminar, al_fallar))
+        return futuro
+
+    def _ejecutor(self, en_proceso):
+        if not en_proceso:
+            return self._hilos
+        if self._procesos is None:
+            # "spawn": el proceso nuevo no hereda los hilos ni los archivos abiertos de la pantalla
+            self._procesos = ProcessPoolExecutor(max_workers=self.procesos,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._procesos
+
+    def _terminada(self, futuro, al_terminar, al_fallar):
+        descripcion = self._en_curso.pop(futuro, "")
+        try:
+            resultado = futuro.result()
+        except Exception as error:
+            if al_fallar is None:
+                self.avisar(('error', f"Falló: {descripcion} ({error})"))
+            else:
+                al_fallar(error)
+        else:
+            if al_terminar is not None:
+                al_terminar(resultado)
+        self._mostrar()
+        # call_soon_threadsafe no pasa por el ciclo de urwid: hay que redibujar a mano
+        self.loop.draw_screen()
+
+    def avisar(self, texto):
+        """Deja un mensaje en la línea de tareas hasta que se lance la próxima"""
+        self._aviso = texto
+        self._mostrar()
+
+    def _mostrar(self):
+        if not self._en_curso:
+            if self._alarma is not None:
+                self.loop.remove_alarm(self._alarma)
+                self._alarma = None
+            self.indicador.set_text(self._aviso)
+            return
+        descripciones = list(self._en_curso.values())
+        texto = f"{_GIRO[self._giro % len(_GIRO)]} {descripciones[0]}"
+        if len(descripciones) > 1:
+            texto += f" (y {len(descripciones) - 1} más)"
+        self.indicador.set_text(texto)
+        if self._alarma is None:
+            self._alarma = self.loop.set_alarm_in(0.2, self._girar)
+
+    def _girar(self, loop, datos):
+        self._alarma = None
+        self._giro += 1
+        self._mostrar()
+
+    def en_curso(self):
+        return len(self._en_curso)
+
+    def cerrar(self):
+        """Espera a que terminen los trabajos lanzados (al salir del programa)"""
+        self._hilos.shutdown(wait=True)
+        if self._procesos is not None:
+            self._procesos.shutdown(wait=True)
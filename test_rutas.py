@@ -0,0 +1,43 @@
+"""Pruebas de rutas.py: un número de casa mal escrito no traba el armado de lotes.
+
+    python -m unittest test_rutas
+"""
+import time
+import unittest
+
+from rutas import _Grilla, coordenadas, distancia, elegir_lote
+
+
+def _pedido(direccion):
+    return f"Cliente: Prueba\nDirección: {direccion}\n"
+
+
+class DireccionRaraTest(unittest.TestCase):
+    def test_numero_de_casa_imposible_queda_sin_coordenada(self):
+        self.assertEqual(coordenadas("Calle 45 # 120450"), (None, 45.0))
+        self.assertIsNone(coordenadas("Calle 120450 # 12-30"))
+        self.assertEqual(coordenadas("Calle 45 # 12-30"), (12.3, 45.0))
+
+    def test_elegir_lote_con_un_pedido_lejano_termina(self):
+        # El pedido más viejo (la semilla del lote) tiene la dirección mal escrita
+        pedidos = [_pedido("Calle 45 # 120450")]
+        pedidos += [_pedido(f"Calle {10 + i % 8} # {20 + i // 8}-10") for i in range(60)]
+        inicio = time.perf_counter()
+        lote = elegir_lote(pedidos, 5)
+        self.assertLess(time.perf_counter() - inicio, 2)
+        self.assertEqual(len(lote), 5)
+        self.assertIn(0, lote)
+
+    def test_cercanos_desde_un_punto_lejano(self):
+        # Aunque el punto pase el filtro de coordenadas, la búsqueda por anillos tiene tope
+        puntos = [(1e6, 45.0)] + [(20.0 + i // 8, 10.0 + i % 8) for i in range(60)]
+        inicio = time.perf_counter()
+        cercanos = _Grilla(puntos).cercanos(puntos[0], 5)
+        self.assertLess(time.perf_counter() - inicio, 2)
+        esperados = sorted(range(len(puntos)), key=lambda i: distancia(puntos[0], puntos[i]))[:5]
+        self.assertEqual(sorted(distancia(puntos[0], puntos[i]) for i in cercanos),
+                         sorted(distancia(puntos[0], puntos[i]) for i in esperados))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Recibos de mostrador sin PDF: texto de ancho fijo o bytes ESC/POS.
+
+Con MODO_RECIBO = "texto" o "escpos" (ver config.py) la venta local no
+arma PDF: el recibo se agrega a RUTA_RECIBO, que puede ser un archivo o
+directamente la impresora térmica (/dev/usb/lp0, LPT1...). Las ventas a
+domicilio siguen con su factura en PDF (ver facturas.py).
+"""
+import config
+
+# Comandos ESC/POS
+_INICIAR = b"\x1b@"
+_PAGINA_CODIGOS = b"\x1bt\x02"  # PC850: letras con tilde y ñ
+_CENTRAR = b"\x1ba\x01"
+_IZQUIERDA = b"\x1ba\x00"
+_NEGRITA = b"\x1bE\x01"
+_SIN_NEGRITA = b"\x1bE\x00"
+_CORTAR = b"\x1dV\x42\x03"  # Avanza unas líneas y corta el papel
+
+
+def _renglon(izquierda, derecha, ancho):
+    """Texto a la izquierda y a la derecha en un renglón (la izquierda se corta si no entra)"""
+    espacio = ancho - len(derecha) - 1
+    return izquierda[:espacio].ljust(espacio) + " " + derecha
+
+
+def lineas_recibo(id_factura, fecha, descuento, items, total_con_descuento, ancho=None):
+    """Renglones del recibo: (texto, estilo) con estilo None, "titulo" o "total" """
+    ancho = ancho or config.ANCHO_RECIBO
+    raya = "-" * ancho
+    lineas = [
+        ("Factura de Venta", "titulo"),
+        (f"ID Factura: {id_factura}", None),
+        (f"Fecha: {fecha}", None),
+        (raya, None),
+    ]
+    subtotal = 0.0
+    for item in items:
+        total_item = item['precio_venta'] * item['cantidad']
+        subtotal += total_item
+        lineas.append((_renglon(item['nombre'], f"{item['cantidad']} x {item['precio_venta']:.2f}  {total_item:>9.2f}",
+                                ancho), None))
+    lineas.append((raya, None))
+    if descuento:
+        lineas.append((_renglon("Subtotal:", f"{subtotal:.2f}", ancho), None))
+        lineas.append((_renglon(f"Descuento {descuento}%:", f"-{subtotal - total_con_descuento:.2f}", ancho), None))
+    lineas.append((_renglon("TOTAL:", f"{total_con_descuento:.2f}", ancho), "total"))
+    return lineas
+
+
+def texto_recibo(id_factura, fecha, descuento, items, total_con_descuento, ancho=None):
+    """Recibo en texto plano de ancho fijo (termina con una línea en blanco)"""
+    ancho = ancho or config.ANCHO_RECIBO
+    renglones = []
+    for texto, estilo in lineas_recibo(id_factura, fecha, descuento, items, total_con_descuento, ancho):
+        renglones.append(texto.center(ancho).rstrip() if estilo == "titulo" else texto)
+    return "\n".join(renglones) + "\n\n"
+
+
+def bytes_escpos(id_factura, fecha, descuento, items, total_con_descuento, ancho=None):
+    """Recibo listo para mandar tal cual a una impresora térmica ESC/POS"""
+    partes = [_INICIAR, _PAGINA_CODIGOS]
+    for texto, estilo in lineas_recibo(id_factura, fecha, descuento, items, total_con_descuento, ancho):
+        datos = texto.encode("cp850", errors="replace") + b"\n"
+        if estilo == "titulo":
+            partes += [_CENTRAR, _NEGRITA, datos, _SIN_NEGRITA, _IZQUIERDA]
+        elif estilo == "total":
+            partes += [_NEGRITA, datos, _SIN_NEGRITA]
+        else:
+            partes.append(datos)
+    partes.append(_CORTAR)
+    return b"".join(partes)
+
+
+def imprimir_recibo(id_factura, fecha, descuento, items, total_con_descuento, modo=None, ruta=None):
+    """Agrega el recibo a la ruta configurada (archivo o impresora) y devuelve la ruta"""
+    modo = modo or config.MODO_RECIBO
+    ruta = ruta or config.RUTA_RECIBO
+    if modo == "escpos":
+        datos = bytes_escpos(id_factura, fecha, descuento, items, total_con_descuento)
+    else:
+        datos = texto_recibo(id_factura, fecha, descuento, items, total_con_descuento).encode("utf-8")
+    with open(ruta, "ab") as f:
+        f.write(datos)
+    return ruta
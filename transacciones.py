@@ -0,0 +1,192 @@
+"""Diario de transacciones de venta con confirmación agrupada.
+
+Cada venta se guarda primero como un solo registro (una línea JSON) en
+transacciones.log; la venta queda hecha cuando ese registro llega al disco.
+Recién después se aplican sus efectos (stock, libro de ventas, resumen),
+sin fsync propio. Si el programa se cae en el medio, al arrancar se
+vuelven a aplicar las transacciones que no tienen su registro "fin".
+
+Varias ventas que llegan juntas (desde varios hilos) comparten un solo
+fsync: el primer hilo que necesita sincronizar lo hace por todos los
+registros escritos hasta ese momento y los demás solo esperan.
+
+Cada caja abierta tiene su propio diario, con su propia numeración:
+transacciones.log la caja 0, transacciones.1.log la 1, etc. Al abrir, una
+caja toma el primer diario libre y lo deja bloqueado (transacciones.lock,
+transacciones.1.lock...) hasta cerrar; el diario de una caja que se cayó
+queda libre para que otra lo recupere (ver cajas_con_diario).
+"""
+import json
+import os
+import re
+import threading
+
+from numeracion import bloquear, desbloquear
+
+
+class DiarioOcupado(Exception):
+    """El diario de esa caja lo tiene abierto otro proceso"""
+
+
+def ruta_de_caja(ruta, caja):
+    """transacciones.log para la caja 0, transacciones.1.log para la 1..."""
+    if caja == 0:
+        return ruta
+    base, extension = os.path.splitext(ruta)
+    return f"{base}.{caja}{extension}"
+
+
+def cajas_con_diario(ruta="transacciones.log"):
+    """Números de las cajas que tienen un diario junto a `ruta`, en orden"""
+    carpeta, nombre = os.path.split(ruta)
+    base, extension = os.path.splitext(nombre)
+    patron = re.compile(re.escape(base) + r"(?:\.(\d+))?" + re.escape(extension))
+    cajas = []
+    for archivo in os.listdir(carpeta or "."):
+        coincidencia = patron.fullmatch(archivo)
+        if coincidencia:
+            cajas.append(int(coincidencia.group(1) or 0))
+    return sorted(cajas)
+
+
+class DiarioTransacciones:
+    """Registros numerados en orden; confirmar(n) vuelve cuando el registro n está en disco.
+
+    Con caja=None toma el primer diario libre; con un número, ese diario
+    (DiarioOcupado si lo tiene otro proceso).
+    """
+
+    def __init__(self, ruta="transacciones.log", espera_grupo=0.0, caja=None):
+        self._bloqueo = None
+        if caja is None:
+            caja = 0
+            while not self._tomar(ruta, caja):
+                caja += 1
+        elif not self._tomar(ruta, caja):
+            raise DiarioOcupado(caja)
+        self.caja = caja
+        self.ruta = ruta_de_caja(ruta, caja)
+        self.espera_grupo = espera_grupo
+        self._lock = threading.Lock()
+        self._condicion = threading.Condition(self._lock)
+        self._sincronizando = False
+        self.primero = 1
+        self.registros = []     # registros leídos al abrir, para la recuperación
+        self._terminados = set()
+        self._leer()
+        self.ultimo = max([self.primero - 1] + [registro["n"] for registro in self.registros])
+        self._sincronizado = self.ultimo
+        self._archivo = open(self.ruta, "a", encoding="utf-8")
+
+    def _tomar(self, ruta, caja):
+        """Bloquea el diario de la caja mientras este proceso lo tenga abierto; False si otro lo tiene"""
+        archivo = open(os.path.splitext(ruta_de_caja(ruta, caja))[0] + ".lock", "a+b")
+        if not bloquear(archivo, esperar=False):
+            archivo.close()
+            return False
+        self._bloqueo = archivo
+        return True
+
+    def _leer(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                for linea in f:
+                    if not linea.endswith("\n"):
+                        break  # Registro cortado por una caída: nunca se confirmó
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        continue
+                    if "inicio" in registro:
+                        self.primero = registro["inicio"]
+                    elif "fin" in registro:
+                        self._terminados.add(registro["fin"])
+                    else:
+                        self.registros.append(registro)
+        except FileNotFoundError:
+            pass
+
+    def continuar_desde(self, numero):
+        """Asegura que los próximos números sean mayores que `numero` (por si se borró el diario)"""
+        with self._lock:
+            self.ultimo = max(self.ultimo, numero)
+            self._sincronizado = max(self._sincronizado, numero)
+
+    def pendientes(self):
+        """Transacciones confirmadas cuyos efectos pueden no haberse aplicado, en orden"""
+        return [registro for registro in self.registros if registro["n"] not in self._terminados]
+
+    def agregar(self, registro):
+        """Escribe el registro (sin esperar al disco) y devuelve su número"""
+        with self._lock:
+            self.ultimo += 1
+            registro = dict(registro, n=self.ultimo)
+            self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            # Antes que el registro del stock en el inventario: si el proceso se cae, la venta se recupera
+            self._archivo.flush()
+            return self.ultimo
+
+    def confirmar(self, numero):
+        """Espera a que el registro `numero` esté en disco (un fsync para todos los que esperan)"""
+        with self._condicion:
+            while self._sincronizado < numero:
+                if self._sincronizando:
+                    self._condicion.wait()
+                    continue
+                self._sincronizando = True
+                try:
+                    if self.espera_grupo:
+                        # Un momento para que se sumen las ventas que están llegando
+                        self._condicion.wait(self.espera_grupo)
+                    self._archivo.flush()
+                    hasta = self.ultimo
+                    descriptor = self._archivo.fileno()
+                    self._lock.release()
+                    try:
+                        os.fsync(descriptor)
+                    finally:
+                        self._lock.acquire()
+                    self._sincronizado = max(self._sincronizado, hasta)
+                finally:
+                    self._sincronizando = False
+                    self._condicion.notify_all()
+
+    def terminar(self, *numeros):
+        """Marca que los efectos de las transacciones ya se aplicaron (no hace falta fsync)"""
+        with self._lock:
+            self._archivo.write("".join(json.dumps({"fin": numero}) + "\n" for numero in numeros))
+            self._archivo.flush()
+
+    def reiniciar(self):
+        """Vacía el diario cuando todos sus efectos ya están en disco; la numeración sigue"""
+        with self._lock:
+            self._archivo.close()
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"inicio": self.ultimo + 1}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+            self.registros = []
+            self._terminados = set()
+
+    def cerrar(self):
+        with self._lock:
+            self._archivo.close()
+            if self._bloqueo is not None:
+                desbloquear(self._bloqueo)
+                self._bloqueo.close()
+                self._bloqueo = None
+
+
+def sincronizar_archivo(ruta):
+    """fsync de un archivo escrito antes sin sincronizar (si no existe no hace nada)"""
+    try:
+        descriptor = os.open(ruta, os.O_WRONLY)  # Sin O_CREAT: no crea el archivo
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
@@ -1,27 +1,27 @@
 import urwid
-import datetime
-import re
-import os
 import warnings
-import subprocess  # Para abrir el PDF
 from urwid.widget import ColumnsWarning
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import config
+import metricas
+from busqueda import IndiceBusqueda
+from inventario import StockInsuficiente
+from lista_virtual import ListaVirtual
+from motor_ventas import Carrito, VentaInvalida, cerrar_caja, confirmar, leer_descuento
+from tiquete import imprimir_recibo
 
 # Ignorar warnings específicos de urwid
 warnings.filterwarnings("ignore", category=ColumnsWarning)
 
+@metricas.instrumentar
 class VendedorView(urwid.WidgetWrap):
     def __init__(self, main):
         self.main = main
-        self.carrito = []
+        self.carrito = Carrito()
         self.total_venta = 0.0
         self.descuento = 0.0  # Porcentaje de descuento
+        self.cliente = None  # (nombre, dirección) si la venta es a domicilio
         self.cargar_inventario()
         
-        # Cargar el último ID de factura
-        self.ultimo_id_factura = self.cargar_ultimo_id_factura()
-        
         # Crear elementos de la UI
         self.inventario_frame = self.crear_inventario_frame()
         self.carrito_listbox = urwid.SimpleListWalker([])
@@ -48,62 +48,76 @@ class VendedorView(urwid.WidgetWrap):
         
         super().__init__(urwid.Filler(pile, valign='top'))
     
-    def cargar_ultimo_id_factura(self):
-        """Carga el último ID de factura desde un archivo"""
-        try:
-            with open("ultima_factura.txt", "r", encoding="utf-8") as f:
-                return int(f.read().strip())
-        except FileNotFoundError:
-            return 0  # Si el archivo no existe, empezamos desde 0
-
-    def guardar_ultimo_id_factura(self):
-        """Guarda el último ID de factura en un archivo"""
-        with open("ultima_factura.txt", "w", encoding="utf-8") as f:
-            f.write(str(self.ultimo_id_factura))
-
-    def generar_id_factura(self):
-        """Genera un nuevo ID de factura"""
-        self.ultimo_id_factura += 1
-        return self.ultimo_id_factura
-
     def crear_inventario_frame(self):
-        """Crea el contenedor del inventario para poder refrescarlo"""
+        """Crea el contenedor del inventario (buscador + lista) para poder refrescarlo"""
+        # Los avisos pueden llegar desde el hilo de una tarea (un pedido cargado por el administrador)
+        self.indice_busqueda = IndiceBusqueda(self.gestor_inventario, en_el_loop=self.main.tareas.en_el_loop)
+        self.gestor_inventario.suscribir(self.main.tareas.en_el_loop(self.inventario_cambiado))
+        self.busqueda_edit = urwid.Edit("Buscar: ")
+        urwid.connect_signal(self.busqueda_edit, 'postchange', self.filtrar_inventario)
         self.inventario_listbox = self.crear_lista_inventario()
-        return urwid.LineBox(urwid.BoxAdapter(self.inventario_listbox, 20))
+        return urwid.LineBox(urwid.Pile([
+            self.busqueda_edit,
+            urwid.Divider("-"),
+            urwid.BoxAdapter(self.inventario_listbox, 20)
+        ]))
     
     def cargar_inventario(self):
-        """Carga el inventario desde el archivo inventario.txt"""
-        self.inventario = {}
-        try:
-            with open("inventario.txt", "r", encoding="utf-8") as file:
-                for linea in file:
-                    partes = linea.strip().split(": ")
-                    if len(partes) >= 5:
-                        id_producto = partes[0]
-                        self.inventario[id_producto] = {
-                            "nombre": partes[1],
-                            "precio_compra": float(partes[2]),
-                            "precio_venta": float(partes[3]),
-                            "cantidad": int(partes[4])
-                        }
-        except FileNotFoundError:
-            self.inventario = {}
+        """Carga el inventario desde el almacén compartido (texto o SQLite, ver servicio.py)"""
+        if not hasattr(self, 'almacen'):
+            self.almacen = self.main.servicio.almacen
+            self.gestor_inventario = self.almacen.inventario
+        else:
+            self.gestor_inventario.cargar()
+        self.inventario = self.gestor_inventario.productos
 
     def crear_lista_inventario(self):
         """Crea la lista de productos disponibles en el inventario"""
-        items = []
-        for id_producto, datos in self.inventario.items():
-            if datos['cantidad'] > 0:
-                nombre_producto = datos['nombre']
-                if datos['cantidad'] < 5:
-                    nombre_producto += " (!!!)"
-                btn = urwid.Button(
-                    f"{id_producto}: {nombre_producto} - ${datos['precio_venta']} ({datos['cantidad']} disponibles)",
-                    on_press=self.seleccionar_producto,
-                    user_data=id_producto
-                )
-                items.append(btn)
-        return urwid.ListBox(urwid.SimpleFocusListWalker(items))
+        # Solo se guardan los IDs; los botones se crean al mostrarse (ver lista_virtual.py)
+        return urwid.ListBox(ListaVirtual(self.ids_disponibles(), self.crear_boton_producto))
+
+    def ids_disponibles(self):
+        """IDs con stock que coinciden con el texto del buscador (todos si está vacío)"""
+        encontrados = self.indice_busqueda.buscar(self.busqueda_edit.get_edit_text())
+        if encontrados is None:
+            encontrados = self.inventario
+        return [id_producto for id_producto in encontrados if self.inventario[id_producto].cantidad > 0]
+
+    def filtrar_inventario(self, edit, texto_anterior):
+        """Filtra la lista del inventario mientras se escribe en el buscador"""
+        self.inventario_listbox.body.cambiar_claves(self.ids_disponibles())
+
+    def inventario_cambiado(self, cambios):
+        """Actualiza solo las filas de los productos que cambiaron (aviso del inventario)"""
+        lista = self.inventario_listbox.body
+        for evento, id_producto in cambios:
+            if evento == "carga":
+                self.inventario = self.gestor_inventario.productos
+                self.refrescar_inventario()
+                return
+            producto = self.inventario.get(id_producto)
+            if producto is None or producto.cantidad <= 0:
+                lista.quitar(id_producto)
+            elif id_producto in lista:
+                lista.actualizar(id_producto)
+            elif self.busqueda_edit.get_edit_text().strip():
+                # Hay un filtro puesto: se vuelve a buscar para saber si el producto coincide
+                self.refrescar_inventario()
+                return
+            else:
+                lista.agregar(id_producto)
+
+    def crear_boton_producto(self, id_producto):
+        """Crea el botón de un producto de la lista del inventario"""
+        datos = self.inventario[id_producto]
+        nombre_producto = datos.nombre
+        if datos.cantidad < 5:
+            nombre_producto += " (!!!)"
+        return urwid.Button(
+            f"{id_producto}: {nombre_producto} - ${datos.precio_venta} ({datos.cantidad} disponibles)",
+            on_press=self.seleccionar_producto,
+            user_data=id_producto
+        )
 
     def seleccionar_producto(self, button, id_producto):
         """Muestra un popup para seleccionar la cantidad del producto"""
@@ -115,7 +129,7 @@ class VendedorView(urwid.WidgetWrap):
         
         self.popup = urwid.Overlay(
             urwid.LineBox(urwid.Pile([
-                urwid.Text(f"Seleccionar cantidad para\n{producto['nombre']}"),
+                urwid.Text(f"Seleccionar cantidad para\n{producto.nombre}"),
                 self.cantidad_edit,
                 urwid.Button("Agregar al carrito", on_press=self.agregar_al_carrito),
                 urwid.Button("Cancelar", on_press=self.cerrar_popup)
@@ -132,44 +146,25 @@ class VendedorView(urwid.WidgetWrap):
         """Agrega el producto seleccionado al carrito"""
         try:
             cantidad = int(self.cantidad_edit.get_edit_text())
-            producto = self.inventario[self.id_seleccionado]
-            
-            if cantidad <= 0:
-                raise ValueError
-                
-            if cantidad > producto['cantidad']:
-                self.mostrar_error("Cantidad excede el inventario")
-                return
-                
-            # Buscar si ya está en el carrito
-            for item in self.carrito:
-                if item['id'] == self.id_seleccionado:
-                    item['cantidad'] += cantidad
-                    break
-            else:
-                self.carrito.append({
-                    'id': self.id_seleccionado,
-                    'nombre': producto['nombre'],
-                    'precio_venta': producto['precio_venta'],
-                    'precio_compra': producto['precio_compra'],
-                    'cantidad': cantidad
-                })
-            
-            self.actualizar_carrito_ui()
-            self.cerrar_popup(None)
-            
         except ValueError:
             self.mostrar_error("Cantidad inválida")
+            return
+        # Las reglas (cantidad válida, stock, mismo producto en una línea) están en motor_ventas.py
+        try:
+            self.carrito.agregar(self.inventario, self.id_seleccionado, cantidad)
+        except VentaInvalida as error:
+            self.mostrar_error(str(error))
+            return
+        self.actualizar_carrito_ui()
+        self.cerrar_popup(None)
 
     def actualizar_carrito_ui(self):
         """Actualiza la interfaz del carrito de compras"""
         self.carrito_listbox.clear()
-        self.total_venta = 0.0
+        self.total_venta = self.carrito.total()
         
-        for item in self.carrito:
+        for item in self.carrito.items:
             total_item = item['cantidad'] * item['precio_venta']
-            self.total_venta += total_item  # Sumamos el total de la venta
-            
             txt = urwid.Text(
                 f"{item['nombre']} x{item['cantidad']}\n"
                 f"Total: ${total_item:.2f}",
@@ -205,6 +200,7 @@ class VendedorView(urwid.WidgetWrap):
         if not self.carrito:
             self.mostrar_error("Carrito vacío")
             return
+        self.cliente = None
         
         # Preguntar por el descuento
         self.preguntar_descuento()
@@ -248,14 +244,9 @@ class VendedorView(urwid.WidgetWrap):
             self.mostrar_error("Debe ingresar nombre y dirección del cliente.")
             return
     
-        # Guardar los datos del cliente en pedidosDom.txt
-        with open("pedidosDom.txt", "a", encoding="utf-8") as f:
-            f.write(f"Cliente: {nombre_cliente}\n")
-            f.write(f"Dirección: {direccion_cliente}\n")
-            f.write("Productos:\n")
-            for item in self.carrito:
-                f.write(f"{item['nombre']} x{item['cantidad']}\n")
-            f.write("=" * 50 + "\n")  # Asegurar que el separador esté al final
+        # Guardar los datos del cliente en la cola de pedidos a domicilio
+        self.almacen.agregar_pedido_domicilio(nombre_cliente, direccion_cliente, self.carrito.items)
+        self.cliente = (nombre_cliente, direccion_cliente)
     
         self.cerrar_popup_datos_cliente()
         self.preguntar_descuento()
@@ -286,13 +277,12 @@ class VendedorView(urwid.WidgetWrap):
     def aplicar_descuento(self, button):
         """Aplica el descuento a la venta"""
         try:
-            self.descuento = float(self.descuento_edit.get_edit_text())
-            if self.descuento < 0 or self.descuento > 100:
-                raise ValueError
-            self.cerrar_popup_descuento()
-            self.procesar_venta()
-        except ValueError:
-            self.mostrar_error("Descuento inválido. Debe ser un número entre 0 y 100.")
+            self.descuento = leer_descuento(self.descuento_edit.get_edit_text())
+        except VentaInvalida as error:
+            self.mostrar_error(str(error))
+            return
+        self.cerrar_popup_descuento()
+        self.procesar_venta()
 
     def sin_descuento(self, button):
         """No aplica descuento a la venta"""
@@ -304,115 +294,43 @@ class VendedorView(urwid.WidgetWrap):
         """Cierra el popup de descuento"""
         self.main.loop.widget = self
 
+    @metricas.medido()
     def procesar_venta(self):
         """Procesa la venta con el descuento aplicado"""
-        # Generar un ID de factura
-        id_factura = self.generar_id_factura()
-        
-        # Calcular el total con descuento
-        total_con_descuento = self.total_venta * (1 - self.descuento / 100)
-        
-        # Actualizar inventario
-        for item in self.carrito:
-            id_producto = item['id']
-            self.inventario[id_producto]['cantidad'] -= item['cantidad']
-            
-        # Guardar inventario actualizado
-        with open("inventario.txt", "w", encoding="utf-8") as f:
-            for id_producto, datos in self.inventario.items():
-                f.write(f"{id_producto}: {datos['nombre']}: {datos['precio_compra']}: "
-                        f"{datos['precio_venta']}: {datos['cantidad']}\n")
-        
-        # Recargar y refrescar inventario
-        self.cargar_inventario()
-        self.refrescar_inventario()
-        
-        # Guardar venta en historial
-        fecha = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("ventas.txt", "a", encoding="utf-8") as f:
-            f.write(f"ID Factura: {id_factura}\n")
-            f.write(f"Fecha: {fecha}\n")
-            f.write(f"Descuento: {self.descuento}%\n")  # Guardar el descuento
-            for item in self.carrito:
-                f.write(f"Producto: {item['nombre']} x{item['cantidad']} - "
-                    f"Total: ${item['precio_venta'] * item['cantidad']:.2f}\n")
-            f.write(f"Total con descuento: ${total_con_descuento:.2f}\n")
-            f.write("="*50 + "\n")
-        
-        # Guardar el último ID de factura
-        self.guardar_ultimo_id_factura()
+        # Stock, número de factura y venta se guardan juntos en una sola transacción.
+        # La lista del inventario se actualiza fila por fila con el aviso del inventario.
+        try:
+            id_factura, fecha, total_con_descuento = confirmar(self.almacen, self.carrito.items, self.descuento,
+                                                               self.cliente)
+        except (StockInsuficiente, KeyError):
+            # Otra caja vendió o borró el producto mientras se armaba el carrito
+            self.cargar_inventario()
+            self.mostrar_error("Stock insuficiente para completar la venta")
+            return
         
-        # Generar factura en PDF
-        if hasattr(self, 'nombre_cliente_edit') and hasattr(self, 'direccion_cliente_edit'):
-            # Si es una venta a domicilio, guardar en la carpeta facturas_domicilios
-            self.generar_factura_pdf(fecha, id_factura, total_con_descuento, "facturas_domicilios")
+        mensaje = "Venta finalizada exitosamente"
+        if self.cliente is None and config.MODO_RECIBO != "pdf":
+            # Venta de mostrador: recibo en texto o ESC/POS, sin PDF (ver tiquete.py)
+            try:
+                imprimir_recibo(id_factura, fecha, self.descuento, self.carrito.items, total_con_descuento)
+            except OSError as error:
+                mensaje = f"Venta hecha. Recibo no impreso ({error.strerror})"
         else:
-            # Si es una venta local, guardar en la carpeta facturas
-            self.generar_factura_pdf(fecha, id_factura, total_con_descuento, "facturas")
-        
-        # Preguntar si desea abrir el PDF
-        self.preguntar_abrir_pdf(id_factura)
+            # La factura queda guardada con la venta; el PDF se arma solo si se pide (ver facturas.py)
+            self.preguntar_abrir_pdf(id_factura)
         
         # Resetear carrito
-        self.carrito = []
+        self.carrito.vaciar()
+        self.cliente = None
         self.actualizar_carrito_ui()
-        self.mostrar_error("Venta finalizada exitosamente")
-
-    def generar_factura_pdf(self, fecha, id_factura, total_con_descuento, carpeta):
-        """Genera un PDF con la factura de la venta"""
-        # Crear el archivo PDF
-        nombre_archivo = f"{carpeta}/factura_{id_factura}.pdf"
-        if not os.path.exists(carpeta):
-            os.makedirs(carpeta)
-        
-        c = canvas.Canvas(nombre_archivo, pagesize=letter)
-        width, height = letter
-        
-        # Encabezado de la factura
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, height - 50, "Factura de Venta")
-        c.setFont("Helvetica", 12)
-        c.drawString(50, height - 70, f"ID Factura: {id_factura}")
-        c.drawString(50, height - 90, f"Fecha: {fecha}")
-        c.drawString(50, height - 110, f"Descuento: {self.descuento}%")
-        
-        # Si es una venta a domicilio, agregar datos del cliente
-        if carpeta == "facturas_domicilios":
-            c.drawString(50, height - 130, f"Cliente: {self.nombre_cliente_edit.get_edit_text().strip()}")
-            c.drawString(50, height - 150, f"Dirección: {self.direccion_cliente_edit.get_edit_text().strip()}")
-        
-        # Detalles de la venta
-        y = height - 170 if carpeta == "facturas_domicilios" else height - 140
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y, "Producto")
-        c.drawString(200, y, "Cantidad")
-        c.drawString(300, y, "Precio Unitario")
-        c.drawString(400, y, "Total")
-        
-        c.setFont("Helvetica", 12)
-        y -= 20
-        for item in self.carrito:
-            c.drawString(50, y, item['nombre'])
-            c.drawString(200, y, str(item['cantidad']))
-            c.drawString(300, y, f"${item['precio_venta']:.2f}")
-            c.drawString(400, y, f"${item['precio_venta'] * item['cantidad']:.2f}")
-            y -= 20
-        
-        # Total de la venta
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(300, y - 20, "Total de la Venta:")
-        c.drawString(400, y - 20, f"${total_con_descuento:.2f}")
-        
-        # Guardar el PDF
-        c.save()
+        self.mostrar_error(mensaje)
 
     def preguntar_abrir_pdf(self, id_factura):
         """Pregunta al usuario si desea abrir el PDF de la factura"""
-        nombre_archivo = f"facturas/factura_{id_factura}.pdf"
         self.popup_abrir_pdf = urwid.Overlay(
             urwid.LineBox(urwid.Pile([
                 urwid.Text("¿Desea abrir el PDF de la factura?", align='center'),
-                urwid.Button("Sí", on_press=lambda x: self.abrir_pdf(nombre_archivo)),
+                urwid.Button("Sí", on_press=lambda x: self.abrir_pdf(id_factura)),
                 urwid.Button("No", on_press=self.cerrar_popup_abrir_pdf)
             ])),
             self.main.loop.widget,
@@ -423,12 +341,21 @@ class VendedorView(urwid.WidgetWrap):
         )
         self.main.loop.widget = self.popup_abrir_pdf
 
-    def abrir_pdf(self, nombre_archivo):
-        """Abre el PDF de la factura"""
-        if os.name == 'nt':  # Windows
-            os.startfile(nombre_archivo)
-        elif os.name == 'posix':  # Linux o macOS
-            subprocess.run(["xdg-open", nombre_archivo])
+    def abrir_pdf(self, id_factura):
+        """Arma el PDF de la factura en segundo plano y lo abre cuando está listo"""
+        # facturas.py (y reportlab) se cargan recién la primera vez que se pide un PDF
+        try:
+            import facturas
+        except ImportError as error:
+            self.cerrar_popup_abrir_pdf()
+            self.mostrar_error(f"No se puede generar el PDF: falta {error.name}")
+            return
+        self.main.tareas.lanzar(
+            f"Generando factura {id_factura}...", facturas.pdf_de_factura, self.almacen, id_factura,
+            al_terminar=facturas.abrir_pdf,
+            al_fallar=lambda error: self.main.tareas.avisar(
+                ('error', f"No se pudo generar la factura {id_factura}: {error}"))
+        )
         self.cerrar_popup_abrir_pdf()
 
     def cerrar_popup_abrir_pdf(self, button=None):
@@ -436,98 +363,45 @@ class VendedorView(urwid.WidgetWrap):
         self.main.loop.widget = self
 
     def refrescar_inventario(self):
-        """Actualiza la lista del inventario y su contenedor"""
-        nuevo_inventario = self.crear_lista_inventario()
-        nuevo_frame = urwid.LineBox(urwid.BoxAdapter(nuevo_inventario, 20))
-        self.inventario_frame = nuevo_frame
-        self
+        """Vuelve a armar la lista del inventario completa (la que ya está en pantalla)"""
+        self.inventario_listbox.body.cambiar_claves(self.ids_disponibles())
     
     def cerrar_caja(self, button):
-        """Cierra la caja y guarda las ventas del día en un archivo"""
-        # Crear la carpeta 'diario' si no existe
-        if not os.path.exists("diario"):
-            os.makedirs("diario")
-        
-        # Obtener la fecha actual
-        fecha_actual = datetime.datetime.now().strftime("%Y-%m-%d")
-        nombre_archivo = f"diario/ventas_dia_{fecha_actual}.txt"
-        
-        # Leer el archivo de ventas y filtrar las del día actual
-        ventas_del_dia = []
-        total_ventas_dia = 0.0  # Variable para almacenar la suma total de ventas del día
-        try:
-            with open("ventas.txt", "r", encoding="utf-8") as f:
-                ventas = f.read().split("=" * 50 + "\n")  # Separar por ventas
-                for venta in ventas:
-                    if f"Fecha: {fecha_actual}" in venta:
-                        ventas_del_dia.append(venta.strip())
-                        # Extraer el total de ventas de cada transacción usando una expresión regular
-                        for line in venta.split("\n"):
-                            match = re.search(r"Total con descuento: \$(\d+\.\d+)", line)
-                            if match:
-                                total_ventas_dia += float(match.group(1))  # Sumar el total de la venta
-        except FileNotFoundError:
-            self.mostrar_error("No hay ventas registradas hoy.")
-            return
-        
-        # Guardar las ventas del día en un archivo con el formato deseado
-        if ventas_del_dia:
-            with open(nombre_archivo, "w", encoding="utf-8") as f:
-                f.write("\n\n----------------------------------------------------------------\n\n".join(ventas_del_dia))
-                f.write("\n\nTotal de ventas del día: ${:.2f}".format(total_ventas_dia))  # Escribir total ventas del día
-            self.mostrar_error(f"Caja cerrada. Ventas guardadas en {nombre_archivo}.")
-        else:
-            self.mostrar_error("No hay ventas registradas hoy.")
+        """Cierra la caja y guarda las ventas del día en un archivo (en segundo plano)"""
+        self.main.tareas.lanzar("Cerrando caja...", self.guardar_cierre_caja,
+                                al_terminar=self.mostrar_error)
+
+    @metricas.medido()
+    def guardar_cierre_caja(self):
+        """Escribe el archivo del cierre; corre en un hilo y devuelve el mensaje para mostrar"""
+        return cerrar_caja(self.almacen)
     
     def volver_al_inicio(self, button):
         """Regresa a la pantalla de inicio de sesión"""
         self.main.mostrar_login()
 
+    def reanudar(self):
+        """Vuelve a mostrar la pantalla tal como quedó (el inventario se mantuvo al día con los avisos)"""
+        self.main.loop.widget = self
+
     def agendar_pedido(self, button):
-        """Toma automáticamente los primeros 5 pedidos de pedidosDom.txt y los guarda en pedido#.txt dentro de la carpeta 'pedidos pendientes'."""
+        """Agenda los primeros pedidos a domicilio de la cola como un lote en 'pedidos pendientes'.
+
+        El lote es de config.PEDIDOS_POR_LOTE pedidos, o de menos si el más
+        viejo ya esperó config.ESPERA_MAX_LOTE_MIN minutos.
+        """
         try:
-            with open("pedidosDom.txt", "r", encoding="utf-8") as f:
-                pedidos = f.read().split("=" * 50 + "\n")  # Separar por pedidos
-                pedidos = [p.strip() for p in pedidos if p.strip()]  # Eliminar pedidos vacíos
+            nombre_lote = self.almacen.agendar_pedidos()
         except FileNotFoundError:
             self.mostrar_error("No hay pedidos registrados.")
             return
     
-        if len(pedidos) < 5:
-            self.mostrar_error("Debe haber al menos 5 pedidos para agendar.")
+        if nombre_lote is None:
+            self.mostrar_error(f"Debe haber al menos {config.PEDIDOS_POR_LOTE} pedidos para agendar.")
             return
     
-        # Tomar los primeros 5 pedidos
-        primeros_pedidos = pedidos[:5]
-    
-        # Crear la carpeta 'pedidos pendientes' si no existe
-        carpeta_pedidos = "pedidos pendientes"
-        if not os.path.exists(carpeta_pedidos):
-            os.makedirs(carpeta_pedidos)
-    
-        # Buscar el siguiente número de pedido disponible
-        numero_pedido = 1
-        while os.path.exists(os.path.join(carpeta_pedidos, f"pedido{numero_pedido}.txt")):
-            numero_pedido += 1
-    
-        # Guardar los 5 pedidos en el archivo pedido#.txt dentro de la carpeta 'pedidos pendientes'
-        nombre_archivo = os.path.join(carpeta_pedidos, f"pedido{numero_pedido}.txt")
-        with open(nombre_archivo, "w", encoding="utf-8") as f:
-            # Unir los pedidos con el separador y un salto de línea antes de cada separador
-            contenido = ("\n" + "=" * 50 + "\n").join(primeros_pedidos)
-            f.write(contenido)
-    
-        # Eliminar los primeros 5 pedidos de pedidosDom.txt
-        pedidos_restantes = pedidos[5:]  # Tomar los pedidos restantes (después del quinto)
-    
-        # Guardar los pedidos restantes en pedidosDom.txt con el formato correcto
-        with open("pedidosDom.txt", "w", encoding="utf-8") as f:
-            # Unir los pedidos restantes con el separador y un salto de línea antes de cada separador
-            contenido_restante = ("\n" + "=" * 50 + "\n").join(pedidos_restantes)
-            f.write(contenido_restante + "\n" + "=" * 50 + "\n")  # Asegurar que el separador esté al final
-    
         # Mostrar un recuadro emergente con un mensaje de éxito
-        self.mostrar_mensaje_exito(f"Los primeros 5 pedidos han sido agendados en {nombre_archivo}.")
+        self.mostrar_mensaje_exito(f"Los primeros pedidos han sido agendados en {nombre_lote}.")
 
     def mostrar_mensaje_exito(self, mensaje):
         """Muestra un recuadro emergente con un mensaje de éxito y un botón 'Cerrar'."""
@@ -555,37 +429,6 @@ class VendedorView(urwid.WidgetWrap):
         """Cierra el popup de mensaje de éxito y regresa al menú principal."""
         self.main.loop.widget = self
    
-    def generar_numero_pedido(self):
-        """Genera un número de pedido único"""
-        if not hasattr(self, 'ultimo_numero_pedido'):
-            self.ultimo_numero_pedido = 0
-        self.ultimo_numero_pedido += 1
-        return self.ultimo_numero_pedido
-
-
-    def generar_numero_pedido(self):
-        """Genera un número de pedido único"""
-        if not hasattr(self, 'ultimo_numero_pedido'):
-            self.ultimo_numero_pedido = 0
-        self.ultimo_numero_pedido += 1
-        return self.ultimo_numero_pedido
-
-    def eliminar_pedido(self, pedido):
-        """Elimina el pedido seleccionado de pedidosDom.txt"""
-        try:
-            with open("pedidosDom.txt", "r", encoding="utf-8") as f:
-                pedidos = f.read().split("=" * 50 + "\n")
-                pedidos = [p.strip() for p in pedidos if p.strip()]  # Eliminar pedidos vacíos
-        except FileNotFoundError:
-            return
-    
-        # Eliminar el pedido seleccionado
-        pedidos = [p for p in pedidos if p != pedido]
-    
-        # Guardar los pedidos restantes
-        with open("pedidosDom.txt", "w", encoding="utf-8") as f:
-            f.write(("=" * 50 + "\n").join(pedidos))
-    
     def cerrar_popup_agendar_pedido(self, button=None):
         """Cierra el popup de agendar pedido"""
         self.main.loop.widget = self
\ No newline at end of file
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+
+import urwid
+
+
+class VisorLineas(urwid.ListWalker):
+    """ListWalker para leer textos largos (historial de ventas, reportes) de a pantallas.
+
+    El texto viene en partes, por ejemplo un archivo por día del libro de
+    ventas. Cada parte es una función que devuelve un LineasArchivo o
+    LineasTexto (ver lineas.py) y se llama recién cuando el usuario llega a
+    esa parte. Solo se crean widgets para las líneas que se muestran; la
+    posición de una línea es (número de parte, número de línea).
+    """
+
+    def __init__(self, partes, tamano_cache=256):
+        self.partes = list(partes)
+        self.tamano_cache = tamano_cache
+        self._abiertas = {}
+        self._cache = OrderedDict()
+        self.focus = (0, 0)
+        self.ir_a(0)
+
+    def _parte(self, indice):
+        parte = self._abiertas.get(indice)
+        if parte is None:
+            parte = self._abiertas[indice] = self.partes[indice]()
+        return parte
+
+    def ir_a(self, indice, numero=0):
+        """Pone el foco en la línea `numero` de la parte `indice` (o en la siguiente que exista)"""
+        for actual in range(max(indice, 0), len(self.partes)):
+            if actual != indice:
+                numero = 0
+            if self._parte(actual).existe(numero):
+                self.set_focus((actual, numero))
+                return
+
+    def __getitem__(self, posicion):
+        widget = self._cache.get(posicion)
+        if widget is None:
+            indice, numero = posicion
+            if not 0 <= indice < len(self.partes):
+                raise IndexError(posicion)
+            widget = urwid.Text(self._parte(indice).linea(numero))
+            self._cache[posicion] = widget
+            if len(self._cache) > self.tamano_cache:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(posicion)
+        return widget
+
+    def next_position(self, posicion):
+        indice, numero = posicion
+        if 0 <= indice < len(self.partes) and self._parte(indice).existe(numero + 1):
+            return indice, numero + 1
+        for indice in range(max(indice + 1, 0), len(self.partes)):
+            if self._parte(indice).existe(0):
+                return indice, 0
+        raise IndexError(posicion)
+
+    def prev_position(self, posicion):
+        indice, numero = posicion
+        if numero > 0:
+            return indice, numero - 1
+        for indice in range(indice - 1, -1, -1):
+            ultima = self._parte(indice).ultima()
+            if ultima >= 0:
+                return indice, ultima
+        raise IndexError(posicion)
+
+    def set_focus(self, posicion):
+        self.focus = posicion
+        self._modified()
+
+    def get_focus(self):
+        try:
+            return self[self.focus], self.focus
+        except IndexError:
+            return None, None
+
+    def get_next(self, posicion):
+        try:
+            posicion = self.next_position(posicion)
+        except IndexError:
+            return None, None
+        return self[posicion], posicion
+
+    def get_prev(self, posicion):
+        try:
+            posicion = self.prev_position(posicion)
+        except IndexError:
+            return None, None
+        return self[posicion], posicion
+
+    def cerrar(self):
+        """Libera los archivos mapeados en memoria"""
+        for parte in self._abiertas.values():
+            parte.cerrar()
+        self._abiertas = {}
+        self._cache.clear()